@@ -1,29 +1,52 @@
+"""Headless worker that runs the bot without the web interface.
+
+Only the modules needed for the configuration are imported: the Naco client when
+Naco is enabled, and each rule and action when it is configured.
+"""
+
+# First, so that the startup time includes the other imports
+from padelbot.core.startup import get_version, since_start
+
 import asyncio
 import logging
-import tomllib
+import signal
 
-from padelbot.core.config import readconfig
-from padelbot.core.logger import start_logger
-from padelbot.padelbot import PadelBot
+from padelbot.core.config import ConfigWatcher, readconfig
+from padelbot.core.logger import configure_logging, start_logger
+from padelbot.core.loopmonitor import start_loop_monitor
+from padelbot.core.memory import MEMORY
+from padelbot.core.profiler import PROFILER
 
 
 async def main():
     await start_logger()
+    await start_loop_monitor()
 
-    with open("pyproject.toml", "rb") as f:
-        data = tomllib.load(f)
-    version = data["project"]["version"]
-
-    logging.info(f"Starting padelbot v{version}")
+    logging.info(f"Starting padelbot v{get_version()}")
 
-    cfg = readconfig()
+    # Watch from before reading, so that no change to the file is missed
+    config_watcher = ConfigWatcher()
+    cfg = readconfig(config_watcher.path)
     if cfg is None:
         logging.error("Missing configuration")
         return
 
-    logging.getLogger().setLevel(cfg["logging"]["level"])
+    configure_logging(cfg["logging"])
+
+    from padelbot.padelbot import PadelBot
+
+    logging.info(f"Imported padelbot {since_start():.2f} seconds after startup")
+
+    padelbot = PadelBot(cfg, config_watcher=config_watcher)
 
-    padelbot = PadelBot(cfg)
+    try:
+        # `kill -USR1 <pid>` profiles the next cycle
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, PROFILER.arm)
+        # `kill -USR2 <pid>` starts or stops tracing memory
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR2, MEMORY.toggle)
+    except (AttributeError, NotImplementedError):
+        # No SIGUSR1 on Windows
+        pass
 
     while True:
         await padelbot.run()
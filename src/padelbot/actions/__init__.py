@@ -1,2 +1 @@
-# Import to trigger registration
-from .naco_create_tournament import ActionNacoCreateTournament  # noqa: F401
+# Actions are imported when configured, see actionbase.get_action_class()
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
+from importlib import import_module
 
+from ..core.clock import Clock
 from ..utils import Events
 
 
@@ -11,14 +13,20 @@ class ActionIntent:
 
     event_id: str
     enforced: bool = False
+    # Name of the action that returned the intent
+    action: str = ""
 
 
 class ActionBase(ABC):
     name: str = ""
     enforced: bool = False
+    events: Events
+    clock: Clock
+    # Event fields read by the action
+    fields: frozenset[str] = frozenset()
 
     @abstractmethod
-    def __init__(self, action_name: str, events: Events, *args) -> None:
+    def __init__(self, action_name: str, events: Events, *args, **kwargs) -> None:
         pass
 
     @abstractmethod
@@ -29,19 +37,48 @@ class ActionBase(ABC):
     def expirationtimes(self) -> list[datetime]:
         pass
 
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        """Return the earliest expiration time after `now`, if any."""
+        return min((dt for dt in self.expirationtimes() if dt > now), default=None)
+
 
 ACTION_REGISTRY: dict[str, type[ActionBase]] = {}
+# Modules of the built-in actions, imported when an action of their type is configured
+ACTION_MODULES = {
+    "NacoCreateTournament": "naco_create_tournament",
+}
 
 
 def register_action(action_type: str, action_class: type[ActionBase]) -> None:
     ACTION_REGISTRY[action_type] = action_class
 
 
-def create_action(action_name: str, events: Events, action_def: dict) -> ActionBase:
-    action_cls = ACTION_REGISTRY.get(action_def["type"])
+def get_action_class(action_type: str) -> type[ActionBase] | None:
+    """Return the class registered for `action_type`, importing its module on first
+    use."""
+    if action_type not in ACTION_REGISTRY and action_type in ACTION_MODULES:
+        import_module(f"{__package__}.{ACTION_MODULES[action_type]}")
+    return ACTION_REGISTRY.get(action_type)
+
+
+def get_required_fields(action_defs: dict) -> frozenset[str]:
+    """Return the fields read by any of the configured actions."""
+    return frozenset().union(
+        *(
+            action_cls.fields
+            for action_def in action_defs.values()
+            if (action_cls := get_action_class(action_def.get("type", "")))
+        )
+    )
+
+
+def create_action(
+    action_name: str, events: Events, action_def: dict, clock: Clock | None = None
+) -> ActionBase:
+    action_cls = get_action_class(action_def["type"])
     if not action_cls:
         raise ValueError(
             f'Unknown action type "{action_def["type"]}" for {action_name}'
         )
     action_params = {k: v for k, v in action_def.items() if k not in ("type",)}
-    return action_cls(action_name, events, **action_params)
+    return action_cls(action_name, events, clock=clock, **action_params)
@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from uuid import UUID
 
+from ..core.clock import Clock
+from ..timeline import upcoming_timeline
 from ..utils import Event, Events, memberid_to_member
 from .actionbase import ActionBase, ActionIntent, register_action
 
@@ -26,6 +28,18 @@ MAX_COURT_NAME_LENGTH = 30
 
 
 class ActionNacoCreateTournament(ActionBase):
+    fields = frozenset(
+        {
+            "id",
+            "heading",
+            "description",
+            "startTimestamp",
+            "endTimestamp",
+            "responses",
+            "recipients",
+        }
+    )
+
     def __init__(
         self,
         action_name: str,
@@ -36,6 +50,7 @@ class ActionNacoCreateTournament(ActionBase):
         enforced: bool = False,
         minutes_before_start: int = 5,
         points_to_win: int | None = None,
+        clock: Clock | None = None,
     ) -> None:
         self.name = action_name
         self.events = events
@@ -45,6 +60,7 @@ class ActionNacoCreateTournament(ActionBase):
         self.minutes_before_start = minutes_before_start
         self.points_to_win = points_to_win
         self.spond_profile_id = UUID(spond_profile_id)
+        self.clock = clock or Clock()
 
     def _include(self, event: Event) -> bool:
         return bool(re.search(self.header_regex, event["heading"], re.IGNORECASE))
@@ -52,8 +68,7 @@ class ActionNacoCreateTournament(ActionBase):
     def _is_within_window(self, event: Event) -> bool:
         """Check if event starts within the configured minutes_before_start window."""
         start_time = datetime.fromisoformat(event["startTimestamp"])
-        now = datetime.now().astimezone()
-        time_until_start = start_time - now
+        time_until_start = start_time - self.clock.now()
         return (
             timedelta(0)
             < time_until_start
@@ -73,10 +88,10 @@ class ActionNacoCreateTournament(ActionBase):
 
     def evaluate(self) -> list[ActionIntent]:
         intents: list[ActionIntent] = []
-        for event in self.events.upcoming:
-            if not self._include(event):
-                continue
+        for event in upcoming_timeline(self.events).starting_after(self.clock.now()):
             if not self._is_within_window(event):
+                break  # Later events start even further from now
+            if not self._include(event):
                 continue
 
             try:
@@ -117,6 +132,7 @@ class ActionNacoCreateTournament(ActionBase):
                 CreateTournamentIntent(
                     event_id=event["id"],
                     enforced=self.enforced,
+                    action=self.name,
                     event_heading=event["heading"],
                     start_time=start_time,
                     end_time=end_time,
@@ -140,5 +156,12 @@ class ActionNacoCreateTournament(ActionBase):
             times.append(trigger_time)
         return times
 
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        window = timedelta(minutes=self.minutes_before_start)
+        for event in upcoming_timeline(self.events).starting_after(now + window):
+            if self._include(event):
+                return datetime.fromisoformat(event["startTimestamp"]) - window
+        return None
+
 
 register_action("NacoCreateTournament", ActionNacoCreateTournament)
@@ -0,0 +1,172 @@
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from .timeline import from_epoch, to_epoch
+
+AUDIT_FILE = os.path.join("data", "audit.sqlite3")
+
+# Kinds of decisions
+REMOVAL = "removal"
+TOURNAMENT = "tournament"
+
+# Outcomes of decisions
+REMOVED = "removed"
+QUEUED = "queued"
+FAILED = "failed"
+# Final outcomes of queued tournaments, recorded by the Naco outbox
+CREATED = "created"
+EXPIRED = "expired"
+NOT_ENFORCED = "not_enforced"
+# Enforced removals are not carried out in the first cycle after startup
+FIRST_RUN = "first_run"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    cycle INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    player_id TEXT,
+    enforced INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    latency REAL NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decisions_by_time ON decisions (time);
+CREATE INDEX IF NOT EXISTS decisions_by_player ON decisions (player_id, time);
+CREATE INDEX IF NOT EXISTS decisions_by_event ON decisions (event_id, time);
+CREATE INDEX IF NOT EXISTS decisions_by_source ON decisions (source, time);
+"""
+
+
+@dataclass
+class Decision:
+    """A removal or action intent, and what came of it."""
+
+    time: datetime
+    cycle: int
+    kind: str
+    # Name of the rule or action that made the decision
+    source: str
+    event_id: str
+    player_id: str | None
+    enforced: bool
+    outcome: str
+    # Seconds spent carrying out the decision, from queueing to delivery for
+    # tournaments created or expired by the Naco outbox
+    latency: float
+    # Message sent to the player, or heading of the event
+    detail: str = ""
+
+
+class AuditLog:
+    """Local store of the removals and action intents decided by the bot.
+
+    Every decision is stored with its outcome, so questions like "why was this
+    player removed" are answered from indexes by player, event, rule or action
+    and time. Times are stored as integer microseconds since the epoch.
+    The bot records from a worker thread, so the connection is shared between
+    threads and used under a lock.
+    """
+
+    def __init__(self, path: str = AUDIT_FILE):
+        self.path = path
+        if path != ":memory:" and (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def record(self, decisions: list[Decision]) -> int:
+        """Store decisions in one transaction. Returns the number stored."""
+        if not decisions:
+            return 0
+        try:
+            with self.lock, self.connection:
+                self.connection.executemany(
+                    "INSERT INTO decisions (time, cycle, kind, source, event_id, "
+                    "player_id, enforced, outcome, latency, detail) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            to_epoch(d.time),
+                            d.cycle,
+                            d.kind,
+                            d.source,
+                            d.event_id,
+                            d.player_id,
+                            d.enforced,
+                            d.outcome,
+                            d.latency,
+                            d.detail,
+                        )
+                        for d in decisions
+                    ),
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store decisions in audit log: {e}")
+            return 0
+        return len(decisions)
+
+    def _to_dict(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "time": from_epoch(row["time"]).isoformat(),
+            "cycle": row["cycle"],
+            "kind": row["kind"],
+            "source": row["source"],
+            "eventId": row["event_id"],
+            "playerId": row["player_id"],
+            "enforced": bool(row["enforced"]),
+            "outcome": row["outcome"],
+            "latency": row["latency"],
+            "detail": row["detail"],
+        }
+
+    def query(
+        self,
+        player_id: str | None = None,
+        event_id: str | None = None,
+        source: str | None = None,
+        kind: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """The latest `limit` decisions matching all given conditions, made in
+        [since, until), newest first."""
+        conditions: list[str] = []
+        params: list[Any] = []
+        for column, value in (
+            ("player_id", player_id),
+            ("event_id", event_id),
+            ("source", source),
+            ("kind", kind),
+        ):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("time >= ?")
+            params.append(to_epoch(since))
+        if until is not None:
+            conditions.append("time < ?")
+            params.append(to_epoch(until))
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT * FROM decisions {where}ORDER BY time DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
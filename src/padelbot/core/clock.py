@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime, timedelta
+
+
+class Clock:
+    """Wall clock that is frozen for the duration of a bot cycle.
+
+    `tick()` captures the current time, and `now()` returns that time until the next
+    tick so that every rule and action in a cycle agrees on what "now" is. Before
+    the first tick, `now()` returns the current time.
+    """
+
+    def __init__(self) -> None:
+        self._now: datetime | None = None
+
+    def _current_time(self) -> datetime:
+        return datetime.now().astimezone()
+
+    def current(self) -> datetime:
+        """The current time, which unlike now() keeps moving during a cycle. For code
+        running outside of the cycles, like background workers."""
+        return self._current_time()
+
+    def tick(self) -> datetime:
+        self._now = self._current_time()
+        return self._now
+
+    def now(self) -> datetime:
+        if self._now is None:
+            return self._current_time()
+        return self._now
+
+    def elapsed(self) -> float:
+        """Seconds passed since the last tick."""
+        if self._now is None:
+            return 0.0
+        return (self._current_time() - self._now).total_seconds()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock controlled by the caller, for tests and simulations.
+
+    Time only moves when `set()` or `advance()` is called, and `sleep()` returns
+    immediately after advancing the clock, so weeks of scheduling run in milliseconds.
+    """
+
+    def __init__(self, start: datetime) -> None:
+        super().__init__()
+        self._time = start
+
+    def _current_time(self) -> datetime:
+        return self._time
+
+    def set(self, time: datetime) -> None:
+        self._time = time
+
+    def advance(self, delta: timedelta) -> None:
+        self._time += delta
+
+    async def sleep(self, seconds: float) -> None:
+        self.advance(timedelta(seconds=seconds))
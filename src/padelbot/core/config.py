@@ -13,6 +13,11 @@ defaults: dict[str, Any] = {
     },
     "logging": {
         "level": "INFO",
+        "format": "text",
+        "rate_limit": 0,
+        "queue_size": 10_000,
+        "overflow": "drop_debug",
+        "trace": False,
     },
     "general": {
         "seconds_to_sleep": 600,
@@ -27,8 +32,11 @@ defaults: dict[str, Any] = {
 }
 
 
-def readconfig() -> dict[str, Any] | None:
-    with open("config.toml", "rb") as f:
+CONFIG_FILE = "config.toml"
+
+
+def readconfig(path: str = CONFIG_FILE) -> dict[str, Any] | None:
+    with open(path, "rb") as f:
         config = tomllib.load(f)
 
     # Load .env file into os.environ (won't override existing env vars)
@@ -52,3 +60,30 @@ def readconfig() -> dict[str, Any] | None:
         return None
 
     return config
+
+
+class ConfigWatcher:
+    """Detect changes to the configuration file by polling its modification time.
+
+    The bot polls once per cycle, which needs no inotify support in the container.
+    A file that is missing or still being written is reported again once it changes.
+    """
+
+    def __init__(self, path: str = CONFIG_FILE) -> None:
+        self.path = path
+        self.stamp = self._stamp()
+
+    def _stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def changed(self) -> bool:
+        """Return True once for each change to the file since the last call."""
+        stamp = self._stamp()
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        return stamp is not None
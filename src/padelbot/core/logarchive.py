@@ -0,0 +1,331 @@
+import gzip
+import json
+import logging
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+MAX_BYTES = 1024 * 1024
+# Compressed archives are about a tenth of the size, so more of them are kept
+ARCHIVE_COUNT = 20
+# Uncompressed size of the independently compressed blocks of an archive
+BLOCK_BYTES = 64 * 1024
+INDEX_SUFFIX = ".idx"
+
+# Index entry of a record: [offset, created, levelno, event, player]
+Entry = list[Any]
+
+
+def read_entries(index_path: str) -> list[Entry]:
+    """Read the index entries written next to the current log file."""
+    entries = []
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # The last line may be cut short when the process stopped
+                    break
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def unindexed_entries(path: str) -> list[Entry]:
+    """Index a log file written without an index, one record per line."""
+    created = os.path.getmtime(path)
+    entries, offset = [], 0
+    with open(path, "rb") as f:
+        for line in f:
+            entries.append([offset, created, logging.NOTSET, None, None])
+            offset += len(line)
+    return entries
+
+
+def archive_log(path: str, entries: list[Entry]) -> str:
+    """Compress the log file at `path` into an archive next to it, and return the
+    path of the archive.
+
+    The archive is a multi-member gzip file, so it reads like any other gzip file,
+    but every block of about BLOCK_BYTES is compressed on its own. Its index lists
+    the offset, time range and highest level of each block, the entries of the
+    records in it, and the blocks mentioning each event and player, so a search
+    only decompresses the blocks that can match.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if not entries:
+        entries = [[0, os.path.getmtime(path), logging.NOTSET, None, None]]
+    elif entries[0][0] > 0:
+        # Lines written before the index was, kept as one record
+        entries = [[0, entries[0][1], logging.NOTSET, None, None], *entries]
+    stamp = datetime.fromtimestamp(entries[0][1]).strftime("%Y%m%dT%H%M%S")
+    archive = f"{path}.{stamp}.gz"
+    suffix = 1
+    while os.path.exists(archive):
+        archive = f"{path}.{stamp}-{suffix}.gz"
+        suffix += 1
+
+    index: dict[str, Any] = {
+        "start": min(entry[1] for entry in entries),
+        "end": max(entry[1] for entry in entries),
+        "level": max(entry[2] for entry in entries),
+        "blocks": [],
+        "events": {},
+        "players": {},
+    }
+    with open(f"{archive}.tmp", "wb") as out:
+        first = 0
+        while first < len(entries):
+            begin = entries[first][0]
+            last = first + 1
+            while last < len(entries) and entries[last][0] - begin < BLOCK_BYTES:
+                last += 1
+            end = entries[last][0] if last < len(entries) else len(data)
+            block = entries[first:last]
+            number = len(index["blocks"])
+            member = gzip.compress(data[begin:end], mtime=0)
+            index["blocks"].append(
+                {
+                    "offset": out.tell(),
+                    "size": len(member),
+                    "start": min(entry[1] for entry in block),
+                    "end": max(entry[1] for entry in block),
+                    "level": max(entry[2] for entry in block),
+                    "records": [[entry[0] - begin, *entry[1:]] for entry in block],
+                }
+            )
+            out.write(member)
+            for _, _, _, event, player in block:
+                for key, value in (("events", event), ("players", player)):
+                    if value is not None:
+                        numbers = index[key].setdefault(value, [])
+                        if not numbers or numbers[-1] != number:
+                            numbers.append(number)
+            first = last
+    with open(f"{archive}{INDEX_SUFFIX}.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    # The archive is in place before its index, which is what searches look for
+    os.replace(f"{archive}.tmp", archive)
+    os.replace(f"{archive}{INDEX_SUFFIX}.tmp", f"{archive}{INDEX_SUFFIX}")
+    return archive
+
+
+def _archive_order(archive: str) -> tuple[str, int]:
+    """Sort key of an archive named by archive_log(): its time stamp, then the
+    suffix of archives rotated within the same second, 0 for the first one."""
+    match = re.search(r"\.(\d{8}T\d{6})(?:-(\d+))?\.gz$", archive)
+    if match is None:
+        return (archive, 0)
+    return (match[1], int(match[2] or 0))
+
+
+def list_archives(path: str) -> list[str]:
+    """Return the indexed archives of the log file at `path`, oldest first."""
+    directory, name = os.path.split(path)
+    try:
+        names = os.listdir(directory or ".")
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (
+            os.path.join(directory, file[: -len(INDEX_SUFFIX)])
+            for file in names
+            if file.startswith(f"{name}.") and file.endswith(f".gz{INDEX_SUFFIX}")
+        ),
+        key=_archive_order,
+    )
+
+
+class ArchivingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that compresses and indexes the files it rotates.
+
+    While a file is written, the entry of every record is appended to an index
+    file next to it. On rollover the file is compressed with archive_log() and
+    the oldest archives beyond `backupCount` are removed.
+    """
+
+    def __init__(
+        self, filename: str, maxBytes: int = MAX_BYTES, backupCount: int = ARCHIVE_COUNT
+    ) -> None:
+        super().__init__(
+            filename, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8"
+        )
+        self.index_path = f"{self.baseFilename}{INDEX_SUFFIX}"
+        self.index_stream: Any = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            offset = self.stream.tell()
+            logging.FileHandler.emit(self, record)
+            if self.index_stream is None:
+                self.index_stream = open(self.index_path, "a", encoding="utf-8")
+            entry = [
+                offset,
+                round(record.created, 3),
+                record.levelno,
+                getattr(record, "event", None),
+                getattr(record, "player", None),
+            ]
+            self.index_stream.write(json.dumps(entry, default=str) + "\n")
+            self.index_stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close_index(self) -> None:
+        if self.index_stream is not None:
+            self.index_stream.close()
+            self.index_stream = None
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.close_index()
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            entries = read_entries(self.index_path)
+            if not entries:
+                entries = unindexed_entries(self.baseFilename)
+            archive_log(self.baseFilename, entries)
+            for archive in list_archives(self.baseFilename)[: -self.backupCount]:
+                os.remove(f"{archive}{INDEX_SUFFIX}")
+                os.remove(archive)
+        for path in (self.baseFilename, self.index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if not self.delay:
+            self.stream = self._open()
+
+    def close(self) -> None:
+        self.close_index()
+        super().close()
+
+
+@dataclass
+class LogQuery:
+    """Conditions on the records returned by search_logs(). All must hold."""
+
+    player: str | None = None
+    event: str | None = None
+    # Lowest level
+    level: int = logging.NOTSET
+    since: float | None = None
+    until: float | None = None
+    # Substring of the record
+    text: str | None = None
+
+    def in_range(self, start: float, end: float, level: int) -> bool:
+        return (
+            level >= self.level
+            and (self.since is None or end >= self.since)
+            and (self.until is None or start <= self.until)
+        )
+
+    def candidate_blocks(self, index: dict[str, Any]) -> list[int]:
+        numbers = set(range(len(index["blocks"])))
+        for key, value in (("events", self.event), ("players", self.player)):
+            if value is not None:
+                numbers &= set(index[key].get(value, ()))
+        return sorted(
+            number
+            for number in numbers
+            if self.in_range(
+                index["blocks"][number]["start"],
+                index["blocks"][number]["end"],
+                index["blocks"][number]["level"],
+            )
+        )
+
+    def matches(self, entry: Entry) -> bool:
+        _, created, levelno, event, player = entry
+        return (
+            self.in_range(created, created, levelno)
+            and (self.event is None or event == self.event)
+            and (self.player is None or player == self.player)
+        )
+
+
+def _result(entry: Entry, text: str, source: str) -> dict[str, Any]:
+    _, created, levelno, event, player = entry
+    return {
+        "time": datetime.fromtimestamp(created).astimezone().isoformat(),
+        "level": logging.getLevelName(levelno),
+        "event": event,
+        "player": player,
+        "file": os.path.basename(source),
+        "record": text.rstrip("\n"),
+    }
+
+
+def _records(entries: list[Entry], data: bytes) -> Iterator[tuple[Entry, str]]:
+    """Pair each entry with the text of its record in `data`."""
+    for i, entry in enumerate(entries):
+        end = entries[i + 1][0] if i + 1 < len(entries) else len(data)
+        yield entry, data[entry[0] : end].decode("utf-8", errors="replace")
+
+
+def search_current(query: LogQuery, path: str) -> list[dict[str, Any]]:
+    """Search the log file that is currently written, oldest record first."""
+    entries = read_entries(f"{path}{INDEX_SUFFIX}")
+    results = []
+    try:
+        with open(path, "rb") as f:
+            for i, entry in enumerate(entries):
+                if not query.matches(entry):
+                    continue
+                f.seek(entry[0])
+                if i + 1 < len(entries):
+                    data = f.read(entries[i + 1][0] - entry[0])
+                else:
+                    data = f.read()
+                text = data.decode("utf-8", errors="replace")
+                if query.text is None or query.text in text:
+                    results.append(_result(entry, text, path))
+    except FileNotFoundError:
+        # Rotated while searching
+        pass
+    return results
+
+
+def search_archive(query: LogQuery, archive: str) -> list[dict[str, Any]]:
+    """Search an archive, decompressing only the blocks that can match."""
+    try:
+        with open(f"{archive}{INDEX_SUFFIX}", encoding="utf-8") as f:
+            index = json.load(f)
+        if not query.in_range(index["start"], index["end"], index["level"]):
+            return []
+        results = []
+        with open(archive, "rb") as f:
+            for number in query.candidate_blocks(index):
+                block = index["blocks"][number]
+                f.seek(block["offset"])
+                data = gzip.decompress(f.read(block["size"]))
+                for entry, text in _records(block["records"], data):
+                    if query.matches(entry) and (
+                        query.text is None or query.text in text
+                    ):
+                        results.append(_result(entry, text, archive))
+        return results
+    except FileNotFoundError:
+        # Removed as one of the oldest while searching
+        return []
+
+
+def search_logs(query: LogQuery, path: str, limit: int = 100) -> list[dict[str, Any]]:
+    """Return the last `limit` records matching `query` in the log file at `path`
+    and its archives, oldest first."""
+    results = search_current(query, path)
+    for archive in reversed(list_archives(path)):
+        if len(results) >= limit:
+            break
+        results[:0] = search_archive(query, archive)
+    return results[-limit:] if limit else []
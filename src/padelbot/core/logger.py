@@ -1,35 +1,340 @@
 import asyncio
+import json
 import logging
 import os
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
 from logging import StreamHandler
-from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
-from queue import Queue
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+from typing import Any
+
+from .logarchive import ArchivingFileHandler
+from .tracing import TRACE_FILE, TRACER
 
 LOG_FILE = os.path.join("logs", "padelbot.log")
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S%z"
+# Fields of the log context, see log_context()
+CONTEXT_FIELDS = ("cycle", "rule", "event", "player")
+# Pass as `extra` for repetitive lines that RateLimitFilter may suppress
+SAMPLED = {"sampled": True}
+# Records waiting to be written, see BoundedQueueHandler
+QUEUE_SIZE = 10_000
+OVERFLOW_POLICIES = ("block", "drop_debug", "coalesce")
+# Longest time the "block" policy waits for room in the queue
+BLOCK_SECONDS = 1.0
+# Interval of the warning about dropped records
+DROP_REPORT_SECONDS = 60
+
+_context: ContextVar[dict[str, Any]] = ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """Add fields to the context of records logged in the block, e.g. the rule.
+
+    Changes made with set_log_context() inside the block are undone when it exits.
+    """
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def set_log_context(**fields: Any) -> None:
+    """Add fields to the log context until the enclosing log_context() exits."""
+    _context.set({**_context.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    """Copy the log context of the logging task onto each record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context.get(field))
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Let through at most `limit` sampled records per message, rule and cycle.
+
+    Only records logged with `extra=SAMPLED` are limited. They are counted by their
+    unformatted message, so every "Processing event" line of a rule counts as the
+    same message regardless of the event. A limit of 0 lets everything through.
+    """
+
+    def __init__(self, limit: int = 0) -> None:
+        super().__init__()
+        self.limit = limit
+        self.cycle: Any = None
+        self.counts: dict[tuple[str, Any], int] = {}
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.limit or not getattr(record, "sampled", False):
+            return True
+        context = _context.get()
+        if context.get("cycle") != self.cycle:
+            self.cycle = context.get("cycle")
+            self.counts.clear()
+        key = (str(record.msg), context.get("rule"))
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        if count > self.limit:
+            self.suppressed += 1
+            return False
+        return True
+
+    def pop_suppressed(self) -> int:
+        """Return the number of records suppressed since the last call."""
+        suppressed, self.suppressed = self.suppressed, 0
+        return suppressed
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines with their log context."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created).astimezone().isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            if (value := getattr(record, field, None)) is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LevelQueue(Queue):
+    """Queue of log records that keeps the records of each level apart.
+
+    Records are dequeued in the order they were queued, but the oldest record of a
+    level is found and dropped in constant time, and the number of queued records
+    with a given level and message is counted, so overflowing never scans the queue.
+    """
+
+    def _init(self, maxsize: int) -> None:
+        # Records of each level with the sequence number they were queued with
+        self.levels: dict[int, deque[tuple[int, Any]]] = {}
+        # Queued records by level and message
+        self.messages: Counter[tuple[int, Any]] = Counter()
+        self.sequence = 0
+        self.size = 0
+
+    def _qsize(self) -> int:
+        return self.size
+
+    def _put(self, item: Any) -> None:
+        # The sentinel of QueueListener is None and goes last among its peers
+        levelno = item.levelno if item is not None else logging.CRITICAL + 1
+        self.levels.setdefault(levelno, deque()).append((self.sequence, item))
+        self.sequence += 1
+        self.size += 1
+        if item is not None:
+            self.messages[(levelno, item.msg)] += 1
+
+    def _get(self) -> Any:
+        # There are only a handful of levels, so this is constant time
+        _, levelno = min(
+            (records[0][0], levelno)
+            for levelno, records in self.levels.items()
+            if records
+        )
+        return self._pop(levelno)
+
+    def _pop(self, levelno: int) -> Any:
+        _, item = self.levels[levelno].popleft()
+        self.size -= 1
+        if item is not None:
+            key = (levelno, item.msg)
+            self.messages[key] -= 1
+            if not self.messages[key]:
+                del self.messages[key]
+        return item
+
+    def is_queued(self, record: logging.LogRecord) -> bool:
+        """Whether a record with the level and message of `record` is queued."""
+        with self.mutex:
+            return (record.levelno, record.msg) in self.messages
+
+    def pop_lowest(self, below: int) -> logging.LogRecord | None:
+        """Remove and return the oldest record of the lowest level below `below`.
+
+        Must be called holding `mutex`.
+        """
+        levels = [levelno for levelno, records in self.levels.items() if records]
+        lowest = min((levelno for levelno in levels if levelno < below), default=None)
+        return None if lowest is None else self._pop(lowest)
+
+    def records(self) -> list[logging.LogRecord]:
+        """Return the queued records in the order they are dequeued."""
+        with self.mutex:
+            queued = sorted(
+                (entry for records in self.levels.values() for entry in records),
+                key=lambda entry: entry[0],
+            )
+        return [record for _, record in queued]
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler for a bounded queue, deciding what to do when it is full.
+
+    The queue fills up when the file or stream handler stalls or cannot keep up.
+    The overflow policies are:
+
+    - "block" waits up to BLOCK_SECONDS for room. When that times out, the
+      handler behaves like "drop_debug" without waiting, until the queue has
+      drained to half its size, so a stalled disk costs one wait and not one
+      per record.
+    - "drop_debug" makes room by dropping the oldest queued record of the lowest
+      level below that of the new record, so DEBUG goes first. If there is no
+      such record, the new one is dropped.
+    - "coalesce" drops records that repeat a queued message, and otherwise
+      behaves like "drop_debug".
+
+    Dropped records are counted by level in `dropped`, and coalesced ones in
+    `coalesced`. Logging never raises, and only waits for the queue after it
+    drained since the last timeout. A LevelQueue makes each overflow decision
+    constant time, as overflowing is when the listener most needs the mutex.
+    """
+
+    queue: LevelQueue
+
+    def __init__(self, queue: LevelQueue, overflow: str = "drop_debug") -> None:
+        super().__init__(queue)
+        self.overflow = overflow
+        self.dropped: Counter[str] = Counter()
+        self.coalesced = 0
+        # Set when the "block" policy timed out, until the queue drains
+        self.stalled = False
+
+    def set_size(self, size: int) -> None:
+        with self.queue.mutex:
+            self.queue.maxsize = size
+            self.queue.not_full.notify_all()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.stalled and self.queue.qsize() <= self.queue.maxsize // 2:
+            self.stalled = False
+        try:
+            self.queue.put_nowait(record)
+            return
+        except Full:
+            pass
+        if self.overflow == "block" and not self.stalled:
+            try:
+                self.queue.put(record, timeout=BLOCK_SECONDS)
+                return
+            except Full:
+                self.stalled = True
+        # Queued records are prepared, so their message is formatted
+        if self.overflow == "coalesce" and self.queue.is_queued(record):
+            self.coalesced += 1
+            return
+        elif self._replace_lower(record):
+            return
+        self.dropped[record.levelname] += 1
+
+    def _replace_lower(self, record: logging.LogRecord) -> bool:
+        """Drop the oldest queued record of the lowest level below that of `record`
+        and queue `record` instead."""
+        if record.levelno <= logging.DEBUG:
+            return False
+        with self.queue.mutex:
+            lowest = self.queue.pop_lowest(record.levelno)
+            if lowest is None:
+                return False
+            self.dropped[lowest.levelname] += 1
+            self.queue._put(record)
+            self.queue.not_empty.notify()
+            return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "overflow": self.overflow,
+            "stalled": self.stalled,
+            "dropped": dict(self.dropped),
+            "coalesced": self.coalesced,
+        }
+
+
+# Output handlers, set up by init_logger()
+HANDLERS: list[logging.Handler] = []
+RATE_LIMIT = RateLimitFilter()
+QUEUE_HANDLER = BoundedQueueHandler(LevelQueue(QUEUE_SIZE))
+
+
+def configure_logging(cfg: dict[str, Any]) -> None:
+    """Apply the [logging] section: level, format ("text" or "json"), the
+    rate_limit of repetitive lines per rule and cycle, the queue_size and
+    overflow policy of the log queue, and whether to trace spans to trace_file."""
+    logging.getLogger().setLevel(cfg.get("level", "INFO"))
+    if cfg.get("format", "text") == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    for handler in HANDLERS:
+        handler.setFormatter(formatter)
+    RATE_LIMIT.limit = cfg.get("rate_limit", 0)
+    QUEUE_HANDLER.set_size(cfg.get("queue_size", QUEUE_SIZE))
+    QUEUE_HANDLER.overflow = cfg.get("overflow", "drop_debug")
+    TRACER.configure(cfg.get("trace_file", TRACE_FILE) if cfg.get("trace") else None)
+
+
+def logging_stats() -> dict[str, Any]:
+    """Return the state of the log queue and the number of dropped records."""
+    return QUEUE_HANDLER.stats()
+
+
+def report_dropped(reported: int) -> int:
+    """Warn about records dropped or coalesced since `reported` were, and return
+    the new total."""
+    total = QUEUE_HANDLER.dropped.total() + QUEUE_HANDLER.coalesced
+    if total > reported:
+        logging.warning(
+            "Log queue was full, dropped or coalesced %d records: %s",
+            total - reported,
+            logging_stats(),
+        )
+    return total
 
 
 async def init_logger():
     log = logging.getLogger()
-    que = Queue()
-    log.addHandler(QueueHandler(que))
+    # The context belongs to the logging task, so it is read before queueing
+    QUEUE_HANDLER.addFilter(ContextFilter())
+    QUEUE_HANDLER.addFilter(RATE_LIMIT)
+    log.addHandler(QUEUE_HANDLER)
     log.setLevel(logging.DEBUG)
 
     # Silence noisy third-party loggers
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=1024 * 1024, backupCount=5)
+    # Rotated files are compressed and indexed for search_logs()
+    file_handler = ArchivingFileHandler(LOG_FILE)
     stream_handler = StreamHandler()
-    formatter = logging.Formatter(
-        "%(asctime)s %(levelname)-7s %(message)s", datefmt="%Y-%m-%d %H:%M:%S%z"
-    )
+    formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
     file_handler.setFormatter(formatter)
     stream_handler.setFormatter(formatter)
-    listener = QueueListener(que, file_handler, stream_handler)
+    HANDLERS[:] = [file_handler, stream_handler]
+    listener = QueueListener(QUEUE_HANDLER.queue, file_handler, stream_handler)
     try:
         listener.start()
+        reported = 0
         while True:
-            await asyncio.sleep(60)
+            await asyncio.sleep(DROP_REPORT_SECONDS)
+            reported = report_dropped(reported)
     finally:
         logging.debug("Stopping logger")
         listener.stop()
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any
+
+# Interval of the lag measurements
+LAG_INTERVAL = 0.5
+# Lag at which the loop counts as blocked and the blocking stack is logged
+SLOW_SECONDS = 0.25
+# Upper bounds of the lag histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Blocking stalls kept for the web interface
+STALLS = 20
+
+
+class LoopMonitor:
+    """Measure the lag of the event loop and catch what blocks it.
+
+    A task sleeps for `interval` and measures how much later than that it wakes
+    up. A watchdog thread checks that the task keeps waking up, and when it has
+    not for `threshold` seconds beyond `interval`, it captures the stack of the
+    event loop thread, which shows the callback or request handler blocking the
+    loop. The stall is logged with that stack once the loop wakes up again.
+    """
+
+    def __init__(
+        self, interval: float = LAG_INTERVAL, threshold: float = SLOW_SECONDS
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.blocked = 0
+        self.stalls: deque[dict[str, Any]] = deque(maxlen=STALLS)
+        # How much later than scheduled the bot woke up for its last cycle
+        self.wakeup_drift: float | None = None
+        # Monotonic time the task went to sleep, read by the watchdog
+        self.sleeping_since = time.monotonic()
+        self.loop_thread: int | None = None
+        self.stack: str | None = None
+        self.running = False
+        self.task: asyncio.Task | None = None
+
+    def record(self, lag: float) -> None:
+        self.count += 1
+        self.sum += lag
+        self.last = lag
+        self.max = max(self.max, lag)
+        for i, bound in enumerate(BUCKETS):
+            if lag <= bound:
+                self.buckets[i] += 1
+        if lag >= self.threshold:
+            self.blocked += 1
+            stack, self.stack = self.stack, None
+            self.stalls.append(
+                {"time": time.time() - lag, "seconds": lag, "stack": stack}
+            )
+            logging.warning(
+                "Event loop was blocked for %.2f seconds%s",
+                lag,
+                f", in:\n{stack}" if stack else "",
+            )
+
+    async def run(self) -> None:
+        self.loop_thread = threading.get_ident()
+        self.running = True
+        threading.Thread(target=self.watch, name="loop-watchdog", daemon=True).start()
+        try:
+            while True:
+                self.sleeping_since = time.monotonic()
+                await asyncio.sleep(self.interval)
+                self.record(
+                    max(0.0, time.monotonic() - self.sleeping_since - self.interval)
+                )
+        finally:
+            self.running = False
+
+    def watch(self) -> None:
+        captured = None
+        while self.running:
+            time.sleep(self.threshold / 2)
+            sleeping_since = self.sleeping_since
+            stalled = time.monotonic() - sleeping_since - self.interval
+            if stalled > self.threshold and captured != sleeping_since:
+                captured = sleeping_since
+                if frame := sys._current_frames().get(self.loop_thread or 0):
+                    self.stack = "".join(traceback.format_stack(frame))
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "lag": {"last": self.last, "max": self.max, "count": self.count},
+            "blocked": self.blocked,
+            "wakeup_drift": self.wakeup_drift,
+            "stalls": list(self.stalls),
+        }
+
+    def metrics(self) -> str:
+        """Return the measurements in the Prometheus text format."""
+        lines = [
+            "# HELP padelbot_loop_lag_seconds Delay of event loop wakeups.",
+            "# TYPE padelbot_loop_lag_seconds histogram",
+            *(
+                f'padelbot_loop_lag_seconds_bucket{{le="{bound}"}} {count}'
+                for bound, count in zip(BUCKETS, self.buckets)
+            ),
+            f'padelbot_loop_lag_seconds_bucket{{le="+Inf"}} {self.count}',
+            f"padelbot_loop_lag_seconds_sum {self.sum}",
+            f"padelbot_loop_lag_seconds_count {self.count}",
+            "# HELP padelbot_loop_lag_max_seconds Largest event loop lag.",
+            "# TYPE padelbot_loop_lag_max_seconds gauge",
+            f"padelbot_loop_lag_max_seconds {self.max}",
+            "# HELP padelbot_loop_blocked_total Times the event loop was blocked.",
+            "# TYPE padelbot_loop_blocked_total counter",
+            f"padelbot_loop_blocked_total {self.blocked}",
+        ]
+        if self.wakeup_drift is not None:
+            lines += [
+                "# HELP padelbot_wakeup_drift_seconds Lateness of the last cycle.",
+                "# TYPE padelbot_wakeup_drift_seconds gauge",
+                f"padelbot_wakeup_drift_seconds {self.wakeup_drift}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+LOOP_MONITOR = LoopMonitor()
+
+
+async def start_loop_monitor():
+    LOOP_MONITOR.task = asyncio.create_task(LOOP_MONITOR.run())
+    await asyncio.sleep(0)
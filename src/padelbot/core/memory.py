@@ -0,0 +1,167 @@
+import logging
+import sys
+import tracemalloc
+from collections import deque
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from typing import Any
+
+from .logger import QUEUE_HANDLER
+
+# Allocation sites in each report
+TOP = 10
+# Reports kept for the web interface
+HISTORY = 48
+# Frames of the stack kept for each allocation, more is slower
+FRAMES = 1
+
+MB = 1024 * 1024
+
+# Allocations of the inspector itself and of imports are left out
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def deep_size(obj: Any) -> int:
+    """Approximate bytes held by `obj` and everything it refers to through
+    containers, dataclasses and instance dictionaries. Shared objects are only
+    counted once."""
+    seen: set[int] = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, type):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list | tuple | set | frozenset | deque):
+            stack.extend(item)
+        elif is_dataclass(item):
+            stack.extend(getattr(item, f.name) for f in fields(item))
+        elif hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return size
+
+
+def _size(obj: Any) -> dict[str, int]:
+    return {"count": len(obj), "bytes": deep_size(obj)}
+
+
+def bot_sizes(bot: Any) -> dict[str, dict[str, int]]:
+    """Sizes of the state a long-running bot holds on to between cycles."""
+    events = bot.events
+    sizes = {
+        "events": {
+            "count": len(events.previous) + len(events.ongoing) + len(events.upcoming),
+            "bytes": deep_size(events),
+        },
+        "roster": _size(bot.roster_store.roster.by_id),
+        "log_queue": {"count": QUEUE_HANDLER.queue.qsize(), "bytes": 0},
+    }
+    if registrar := getattr(bot, "naco_registrar", None):
+        sizes["registered_members"] = _size(registrar.cache_registered_spond_member_ids)
+    if creator := getattr(bot, "naco_tournament_creator", None):
+        sizes["created_events"] = _size(creator.cache_created_event_ids)
+    return sizes
+
+
+def _sites(stats: list, diff: bool = False) -> list[dict[str, Any]]:
+    sites = []
+    for stat in stats:
+        frame = stat.traceback[0]
+        site = {
+            "where": f"{frame.filename}:{frame.lineno}",
+            "bytes": stat.size,
+            "count": stat.count,
+        }
+        if diff:
+            site["bytes_diff"] = stat.size_diff
+            site["count_diff"] = stat.count_diff
+        sites.append(site)
+    return sites
+
+
+class MemoryInspector:
+    """Opt-in tracing of the memory held by the bot between cycles.
+
+    When started, tracemalloc traces allocations, and after every cycle inspect()
+    takes a snapshot and reports the top allocation sites, the growth since the
+    previous and the first snapshot, and the sizes of the events, caches and log
+    queue the bot holds on to. Tracing slows allocations down noticeably, so it
+    is off until start() is called.
+    """
+
+    def __init__(self) -> None:
+        self.first: tracemalloc.Snapshot | None = None
+        self.previous: tracemalloc.Snapshot | None = None
+        self.reports: deque[dict[str, Any]] = deque(maxlen=HISTORY)
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = FRAMES) -> None:
+        if frames < 1:
+            raise ValueError("Number of frames must be positive")
+        if not self.enabled:
+            logging.info("Tracing memory allocations")
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        if self.enabled:
+            logging.info("Stopped tracing memory allocations")
+            tracemalloc.stop()
+        self.first = self.previous = None
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.stop()
+        else:
+            self.start()
+
+    def inspect(self, bot: Any) -> dict[str, Any] | None:
+        """Snapshot the traced memory after a cycle of `bot` and report on it."""
+        if not self.enabled:
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+        traced, peak = tracemalloc.get_traced_memory()
+        report: dict[str, Any] = {
+            "time": datetime.now().astimezone().isoformat(),
+            "cycle": bot.cycles,
+            "traced": traced,
+            "peak": peak,
+            "top": _sites(snapshot.statistics("lineno")[:TOP]),
+            "sizes": bot_sizes(bot),
+        }
+        for key, base in (
+            ("growth", self.previous),
+            ("growth_since_start", self.first),
+        ):
+            if base is not None:
+                stats = snapshot.compare_to(base, "lineno")
+                growing = [stat for stat in stats if stat.size_diff > 0][:TOP]
+                report[key] = _sites(growing, diff=True)
+        self.first = self.first or snapshot
+        self.previous = snapshot
+        self.reports.append(report)
+        logging.info(
+            "Traced memory %.1f MB (peak %.1f MB), events %.1f MB",
+            traced / MB,
+            peak / MB,
+            report["sizes"]["events"]["bytes"] / MB,
+        )
+        return report
+
+    def status(self) -> dict[str, Any]:
+        return {"enabled": self.enabled, "reports": list(self.reports)}
+
+
+MEMORY = MemoryInspector()
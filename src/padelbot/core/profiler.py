@@ -0,0 +1,91 @@
+import io
+import logging
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any
+
+PROFILE_DIR = "logs"
+# Functions in the report, by cumulative time
+REPORT_LINES = 40
+
+
+class CycleProfiler:
+    """Profile the next cycles of PadelBot.run() with cProfile when armed.
+
+    arm() sets the number of cycles to profile. They are profiled together, and
+    when the last one completes the statistics are written to PROFILE_DIR, where
+    tools like snakeviz or flameprof turn them into a flame graph, and a report
+    of the slowest functions is kept for the web interface. Everything running on
+    the event loop during the cycles is profiled, including web requests. When
+    not armed, profile_cycle() costs a single comparison.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR) -> None:
+        self.directory = directory
+        self.remaining = 0
+        self.cycles = 0
+        self.profile: Any = None
+        self.last: dict[str, Any] | None = None
+
+    def arm(self, cycles: int = 1) -> None:
+        if cycles < 1:
+            raise ValueError("Number of cycles to profile must be positive")
+        logging.info(f"Profiling the next {cycles} cycle(s)")
+        self.remaining = cycles
+
+    def status(self) -> dict[str, Any]:
+        return {"remaining": self.remaining, "last": self.last}
+
+    @contextmanager
+    def profile_cycle(self) -> Iterator[None]:
+        if not self.remaining:
+            yield
+            return
+        import cProfile
+
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+            self.cycles = 0
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # E.g. another profiler or debugger is active
+            logging.error(f"Cannot profile cycle: {e}")
+            self.remaining, self.profile = 0, None
+            yield
+            return
+        try:
+            yield
+        finally:
+            self.profile.disable()
+            self.cycles += 1
+            self.remaining -= 1
+            if not self.remaining:
+                self.save()
+
+    def save(self) -> None:
+        import pstats
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.directory, f"profile-{stamp}.prof")
+        self.profile.dump_stats(path)
+        report = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LINES)
+        seconds = stats.get_stats_profile().total_tt
+        self.last = {
+            "file": path,
+            "cycles": self.cycles,
+            "seconds": seconds,
+            "report": report.getvalue(),
+        }
+        self.profile = None
+        logging.info(
+            f"Profiled {self.cycles} cycle(s) in {seconds:.2f} seconds, wrote {path}"
+        )
+
+
+PROFILER = CycleProfiler()
@@ -0,0 +1,27 @@
+import time
+import tomllib
+from pathlib import Path
+
+# Entry points import this module first, so this is close to the process start
+STARTED = time.perf_counter()
+PYPROJECT_FILE = Path(__file__).resolve().parents[3] / "pyproject.toml"
+
+
+def since_start() -> float:
+    """Seconds since the entry point started."""
+    return time.perf_counter() - STARTED
+
+
+def get_version() -> str:
+    """Version of padelbot, from pyproject.toml in the source tree if present.
+
+    The Docker image runs from the source tree without installing the project, so
+    the installed package metadata is only a fallback.
+    """
+    if PYPROJECT_FILE.is_file():
+        with open(PYPROJECT_FILE, "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+
+    from importlib import metadata
+
+    return metadata.version("padelbot")
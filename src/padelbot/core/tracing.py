@@ -0,0 +1,191 @@
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import os
+import time
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+TRACE_FILE = os.path.join("logs", "trace.json")
+# Size at which the trace file is moved to `<file>.1` and a new one is started
+MAX_BYTES = 10 * 1024 * 1024
+
+T = TypeVar("T")
+
+# Id of the span the current task is in
+_parent: ContextVar[int | None] = ContextVar("trace_parent", default=None)
+
+
+class Tracer:
+    """Write spans to a local file in the Chrome trace event format.
+
+    The file is a JSON array with one complete ("X") event per line, left open
+    so that it can be appended to, which chrome://tracing, Perfetto and
+    speedscope accept. Each asyncio task gets a track of its own, and every span
+    records the id of its own and of its parent span in `args`. Spans of tasks
+    started within a span, like the Naco outbox worker, have that span as their
+    parent. When no file is configured, span() does nothing.
+    """
+
+    def __init__(self) -> None:
+        self.path: str | None = None
+        self.file: Any = None
+        self.ids = itertools.count(1)
+        # Track ids of asyncio tasks
+        self.tracks: weakref.WeakKeyDictionary[asyncio.Task, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.next_track = itertools.count(1)
+
+    def configure(self, path: str | None) -> None:
+        """Write spans to `path`, or stop tracing if it is None."""
+        if path == self.path:
+            return
+        self.close()
+        self.path = path
+        if path is not None:
+            self.open()
+            logging.info(f"Tracing spans to {path}")
+
+    def open(self) -> None:
+        assert self.path is not None
+        if directory := os.path.dirname(self.path):
+            os.makedirs(directory, exist_ok=True)
+        new = not os.path.exists(self.path) or not os.path.getsize(self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.tracks.clear()
+        if new:
+            self.file.write("[\n")
+        self.write(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "args": {"name": "padelbot"},
+            }
+        )
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write(self, event: dict[str, Any]) -> None:
+        self.file.write(json.dumps(event, default=str) + ",\n")
+
+    def track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            # Outside of the event loop
+            return 0
+        if (track := self.tracks.get(task)) is None:
+            track = self.tracks[task] = next(self.next_track)
+            self.write(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": track,
+                    "args": {"name": task.get_name()},
+                }
+            )
+        return track
+
+    @contextmanager
+    def span(
+        self, name: str, category: str = "padelbot", **args: Any
+    ) -> Iterator[None]:
+        """Trace the block as a span named `name`, with `args` shown in viewers."""
+        if self.file is None:
+            yield
+            return
+        span_id = next(self.ids)
+        parent = _parent.get()
+        token = _parent.set(span_id)
+        start = time.time()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = repr(e)
+            raise
+        finally:
+            end = time.time()
+            _parent.reset(token)
+            if self.file is not None:
+                try:
+                    self.finish(name, category, start, end, span_id, parent, args)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Stopped tracing, failed to write span: {e}")
+                    self.configure(None)
+
+    def finish(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        span_id: int,
+        parent: int | None,
+        args: dict[str, Any],
+    ) -> None:
+        self.write(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": int(start * 1_000_000),
+                "dur": int((end - start) * 1_000_000),
+                "pid": os.getpid(),
+                "tid": self.track(),
+                "args": {"span": span_id, "parent": parent, **args},
+            }
+        )
+        if parent is None:
+            # A trace is complete, make it visible to viewers
+            self.file.flush()
+            if self.path is not None and self.file.tell() > MAX_BYTES:
+                self.close()
+                os.replace(self.path, f"{self.path}.1")
+                self.open()
+
+
+TRACER = Tracer()
+
+
+def span(name: str, category: str = "padelbot", **args: Any):
+    """Trace the block as a span, see Tracer.span()."""
+    return TRACER.span(name, category, **args)
+
+
+class TracedClient:
+    """Proxy tracing every coroutine method called on `client` as a span named
+    `<prefix>.<method>`. Other attributes are read from `client` as they are."""
+
+    def __init__(self, client: Any, prefix: str) -> None:
+        self._client = client
+        self._prefix = prefix
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._client, attr)
+        if not inspect.iscoroutinefunction(value):
+            return value
+        name = f"{self._prefix}.{attr}"
+
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            with TRACER.span(name, self._prefix):
+                return await value(*args, **kwargs)
+
+        return traced
+
+
+def traced(client: T, prefix: str) -> T:
+    """Return `client` wrapped in a TracedClient."""
+    return TracedClient(client, prefix)  # type: ignore[return-value]
@@ -0,0 +1,149 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any
+
+from .timeline import from_epoch, to_epoch
+from .utils import Event
+
+HISTORY_FILE = os.path.join("data", "history.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    heading TEXT NOT NULL,
+    series_id TEXT,
+    start_time INTEGER NOT NULL,
+    end_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_series ON events (series_id, start_time);
+CREATE INDEX IF NOT EXISTS events_by_start ON events (start_time);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    player_id TEXT NOT NULL,
+    start_time INTEGER NOT NULL,
+    event_id TEXT NOT NULL REFERENCES events (id),
+    PRIMARY KEY (player_id, start_time, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attendance_by_start ON attendance (start_time);
+"""
+
+
+class AttendanceHistory:
+    """Local store of ended events and the players that attended them.
+
+    Ended events never change, so each one is ingested once and attendance over
+    arbitrary time windows is answered from indexes without fetching old events
+    from Spond again. Times are stored as integer microseconds since the epoch.
+    The bot ingests from a worker thread, so the connection is shared between
+    threads and used under a lock.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE):
+        self.path = path
+        if path != ":memory:" and (directory := os.path.dirname(path)):
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        self.ingested_event_ids: set[str] = {
+            row["id"] for row in self.connection.execute("SELECT id FROM events")
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    def ingest(self, events: list[Event]) -> int:
+        """Store ended events that are not stored yet. Returns the number stored."""
+        new_events = [
+            event for event in events if event["id"] not in self.ingested_event_ids
+        ]
+        if not new_events:
+            return 0
+
+        try:
+            with self.lock, self.connection:
+                for event in new_events:
+                    start_time = to_epoch(event["startTimestamp"])
+                    self.connection.execute(
+                        "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?)",
+                        (
+                            event["id"],
+                            event.get("heading", ""),
+                            event.get("seriesId"),
+                            start_time,
+                            to_epoch(event["endTimestamp"]),
+                        ),
+                    )
+                    self.connection.executemany(
+                        "INSERT OR IGNORE INTO attendance VALUES (?, ?, ?)",
+                        (
+                            (player_id, start_time, event["id"])
+                            for player_id in event["responses"]["acceptedIds"]
+                        ),
+                    )
+        except sqlite3.Error as e:
+            logging.error(f"Failed to store events in attendance history: {e}")
+            return 0
+
+        self.ingested_event_ids.update(event["id"] for event in new_events)
+        logging.debug(f"Stored {len(new_events)} ended event(s) in attendance history")
+        return len(new_events)
+
+    def _to_dict(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "id": row["id"],
+            "heading": row["heading"],
+            "seriesId": row["series_id"],
+            "startTimestamp": from_epoch(row["start_time"]).isoformat(),
+            "endTimestamp": from_epoch(row["end_time"]).isoformat(),
+        }
+
+    def attended_events(
+        self, player_id: str, since: datetime, until: datetime
+    ) -> list[dict[str, Any]]:
+        """Events the player attended that started in [since, until), oldest first."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT events.* FROM attendance JOIN events ON events.id = event_id "
+                "WHERE player_id = ? AND attendance.start_time >= ? "
+                "AND attendance.start_time < ? ORDER BY attendance.start_time",
+                (player_id, to_epoch(since), to_epoch(until)),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count_attended(self, player_id: str, since: datetime, until: datetime) -> int:
+        """Number of events the player attended that started in [since, until)."""
+        with self.lock:
+            (count,) = self.connection.execute(
+                "SELECT COUNT(*) FROM attendance "
+                "WHERE player_id = ? AND start_time >= ? AND start_time < ?",
+                (player_id, to_epoch(since), to_epoch(until)),
+            ).fetchone()
+        return count
+
+    def attendance_counts(self, since: datetime, until: datetime) -> dict[str, int]:
+        """Number of attended events per player for events started in [since, until)."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT player_id, COUNT(*) FROM attendance "
+                "WHERE start_time >= ? AND start_time < ? GROUP BY player_id",
+                (to_epoch(since), to_epoch(until)),
+            ).fetchall()
+        return {player_id: count for player_id, count in rows}
+
+    def last_event_in_series(
+        self, series_id: str, before: datetime
+    ) -> dict[str, Any] | None:
+        """The latest stored event in the series that started before `before`."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM events WHERE series_id = ? AND start_time < ? "
+                "ORDER BY start_time DESC LIMIT 1",
+                (series_id, to_epoch(before)),
+            ).fetchone()
+        return self._to_dict(row) if row else None
@@ -0,0 +1,94 @@
+from .timeline import to_epoch
+from .utils import Event, Events
+
+MICROSECONDS_PER_MINUTE = 60 * 1_000_000
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# Width of a time-of-day bucket. Matches the tolerance of the "same slot last week"
+# lookup, so a match is always in the same or a neighbouring bucket.
+SLOT_MINUTES = 90
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+ONE_WEEK = 7 * MINUTES_PER_DAY * MICROSECONDS_PER_MINUTE
+TOLERANCE = SLOT_MINUTES * MICROSECONDS_PER_MINUTE
+
+Slot = tuple[str, int, int]
+
+
+def normalize_heading(heading: str) -> str:
+    return " ".join(heading.split()).casefold()
+
+
+def _week_slot(epoch: int) -> int:
+    # The epoch started on a Thursday; shift so that slot 0 starts on Monday 00:00 UTC
+    minute_of_week = (epoch // MICROSECONDS_PER_MINUTE + 3 * MINUTES_PER_DAY) % (
+        MINUTES_PER_WEEK
+    )
+    return minute_of_week // SLOT_MINUTES
+
+
+def _slot_key(heading: str, week_slot: int) -> Slot:
+    weekday, bucket = divmod(week_slot % SLOTS_PER_WEEK, SLOTS_PER_DAY)
+    return (normalize_heading(heading), weekday, bucket)
+
+
+class PreviousEventIndex:
+    """Hash indexes over previous events for the "last similar event" lookups.
+
+    Events are indexed by series id, and by (normalized heading, weekday, time-of-day
+    bucket) of their start time. Both lookups return the same event as the linear
+    scans in `utils.get_last_event_in_series` and
+    `utils.get_last_event_from_timestamp_and_title`.
+    """
+
+    def __init__(self, events: list[Event]) -> None:
+        self.latest_in_series: dict[str, tuple[int, Event]] = {}
+        self.slots: dict[Slot, list[tuple[int, int, Event]]] = {}
+
+        for position, event in enumerate(events):
+            start = to_epoch(event["startTimestamp"])
+
+            if (series_id := event.get("seriesId")) is not None:
+                latest = self.latest_in_series.get(series_id)
+                if latest is None or start > latest[0]:
+                    self.latest_in_series[series_id] = (start, event)
+
+            key = _slot_key(event.get("heading", ""), _week_slot(start))
+            self.slots.setdefault(key, []).append((position, start, event))
+
+    def last_event_in_series(self, event: Event) -> Event | None:
+        series_id = event.get("seriesId")
+        if series_id is None:
+            return None
+        latest = self.latest_in_series.get(series_id)
+        return latest[1] if latest else None
+
+    def last_event_from_timestamp_and_title(self, event: Event) -> Event | None:
+        heading = event.get("heading", "")
+        start = to_epoch(event["startTimestamp"])
+        week_slot = _week_slot(start - ONE_WEEK)
+
+        best: tuple[int, Event] | None = None
+        for offset in (-1, 0, 1):
+            for position, previous_start, previous_event in self.slots.get(
+                _slot_key(heading, week_slot + offset), []
+            ):
+                if (
+                    abs(start - previous_start - ONE_WEEK) <= TOLERANCE
+                    and previous_event.get("heading", "") == heading
+                    and (best is None or position < best[0])
+                ):
+                    best = (position, previous_event)
+        return best[1] if best else None
+
+    def last_similar_event(self, event: Event) -> Event | None:
+        return self.last_event_in_series(
+            event
+        ) or self.last_event_from_timestamp_and_title(event)
+
+
+def previous_index(events: Events) -> PreviousEventIndex:
+    """Return the index of the previous events, building it on first use."""
+    if events.previous_index is None:
+        events.previous_index = PreviousEventIndex(events.previous)
+    return events.previous_index
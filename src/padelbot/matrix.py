@@ -0,0 +1,140 @@
+import logging
+from copy import copy
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+
+from .timeline import to_epoch
+from .utils import Event, Events
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+# Optional dependency, install with the "matrix" extra. It is slow to import, so it
+# is only imported by the rules that use the matrix engine.
+HAVE_NUMPY = find_spec("numpy") is not None
+ENGINES = ("python", "matrix")
+# Rank of a player that is not on a response list
+ABSENT = -1
+
+
+def resolve_engine(name: str, engine: str) -> str:
+    """Validate the engine of a rule, falling back to python without numpy."""
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine "{engine}", expected one of {ENGINES}')
+    if engine == "matrix" and not HAVE_NUMPY:
+        logging.warning(f"[{name}]: numpy is not installed, using the python engine")
+        return "python"
+    return engine
+
+
+class AttendanceMatrix:
+    """Players × events matrices of the responses in a snapshot.
+
+    Rows are players in order of first appearance and columns are events. Besides
+    the boolean accepted and waitlisted matrices, the position of each player on
+    each response list is kept, so that vectorized rules can reproduce the order
+    of the straightforward implementations. As in Spond, a player is expected to
+    be at most once on each response list.
+    """
+
+    def __init__(self, events: list[Event]) -> None:
+        import numpy as np
+
+        self.rows: dict[str, int] = {}
+        self.columns: dict[str, int] = {
+            event["id"]: i for i, event in enumerate(events)
+        }
+        self.events = events
+        self.starts: NDArray = np.array(
+            [to_epoch(event["startTimestamp"]) for event in events], dtype=np.int64
+        )
+
+        cells: dict[str, tuple[list[int], list[int], list[int]]] = {
+            "acceptedIds": ([], [], []),
+            "waitinglistIds": ([], [], []),
+        }
+        for column, event in enumerate(events):
+            responses = event.get("responses", {})
+            for key, (rows, columns, ranks) in cells.items():
+                for rank, player_id in enumerate(responses.get(key, [])):
+                    rows.append(self.rows.setdefault(player_id, len(self.rows)))
+                    columns.append(column)
+                    ranks.append(rank)
+        self.players = list(self.rows)
+
+        shape = (len(self.rows), len(events))
+        self.accepted_rank = np.full(shape, ABSENT, dtype=np.int32)
+        self.waitlist_rank = np.full(shape, ABSENT, dtype=np.int32)
+        for key, rank_matrix in (
+            ("acceptedIds", self.accepted_rank),
+            ("waitinglistIds", self.waitlist_rank),
+        ):
+            rows, columns, ranks = cells[key]
+            rank_matrix[rows, columns] = ranks
+        self.accepted = self.accepted_rank != ABSENT
+        self.waitlisted = self.waitlist_rank != ABSENT
+        # Whether the arrays may be updated in place, see replace_event()
+        self.owned = False
+
+    def replace_event(self, event: Event) -> "AttendanceMatrix":
+        """Return a matrix with the responses of `event`, e.g. after a removal, in
+        place of those of the event with the same id.
+
+        A matrix built from a snapshot may be published, so the first replacement
+        copies its arrays. The copy owns them, and replacing an event in it updates
+        the column of the event in place and hands the arrays over to the returned
+        matrix, so a cycle with many removals copies the arrays once. The matrix
+        the arrays were handed over from must not be used afterwards. Events with
+        players that are not in the matrix rebuild it.
+        """
+        import numpy as np
+
+        column = self.columns[event["id"]]
+        events = list(self.events)
+        events[column] = event
+        responses = event.get("responses", {})
+        if any(
+            player_id not in self.rows
+            for key in ("acceptedIds", "waitinglistIds")
+            for player_id in responses.get(key, [])
+        ):
+            return AttendanceMatrix(events)
+
+        matrix = copy(self)
+        matrix.events = events
+        if not self.owned:
+            for name in ("accepted_rank", "waitlist_rank", "accepted", "waitlisted"):
+                setattr(matrix, name, getattr(self, name).copy())
+            matrix.owned = True
+        for key, rank_matrix, mask in (
+            ("acceptedIds", matrix.accepted_rank, matrix.accepted),
+            ("waitinglistIds", matrix.waitlist_rank, matrix.waitlisted),
+        ):
+            player_ids = responses.get(key, [])
+            rows = [self.rows[player_id] for player_id in player_ids]
+            rank_matrix[:, column] = ABSENT
+            rank_matrix[rows, column] = np.arange(len(rows), dtype=np.int32)
+            mask[:, column] = False
+            mask[rows, column] = True
+        return matrix
+
+    def column_indexes(self, events: list[Event]) -> "NDArray":
+        import numpy as np
+
+        return np.array([self.columns[event["id"]] for event in events], dtype=np.intp)
+
+    def row_mask(self, player_ids: set[str]) -> "NDArray":
+        import numpy as np
+
+        mask = np.zeros(len(self.rows), dtype=bool)
+        mask[[self.rows[id] for id in player_ids if id in self.rows]] = True
+        return mask
+
+
+def attendance_matrix(events: Events) -> AttendanceMatrix:
+    """Return the matrix of all events in the snapshot, building it on first use."""
+    if events.matrix is None:
+        events.matrix = AttendanceMatrix(
+            events.previous + events.ongoing + events.upcoming
+        )
+    return events.matrix
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from ..actions.naco_create_tournament import CreateTournamentIntent
+from ..audit import CREATED, EXPIRED, TOURNAMENT, AuditLog, Decision
+from ..core.clock import Clock
+from .tournament import NacoTournamentCreator
+
+OUTBOX_FILE = os.path.join("data", "naco_outbox.json")
+
+
+def intent_to_record(intent: CreateTournamentIntent) -> dict[str, Any]:
+    return {
+        "event_id": intent.event_id,
+        "enforced": intent.enforced,
+        "action": intent.action,
+        "event_heading": intent.event_heading,
+        "start_time": intent.start_time.isoformat(),
+        "end_time": intent.end_time.isoformat() if intent.end_time else None,
+        "created_by_spond_id": str(intent.created_by_spond_id),
+        "tournament_type": intent.tournament_type,
+        "points_to_win": intent.points_to_win,
+        "player_spond_ids": [str(id) for id in intent.player_spond_ids],
+        "court_names": list(intent.court_names),
+    }
+
+
+def record_to_intent(record: dict[str, Any]) -> CreateTournamentIntent:
+    end_time = record.get("end_time")
+    return CreateTournamentIntent(
+        event_id=record["event_id"],
+        enforced=record.get("enforced", False),
+        action=record.get("action", ""),
+        event_heading=record["event_heading"],
+        start_time=datetime.fromisoformat(record["start_time"]),
+        end_time=datetime.fromisoformat(end_time) if end_time else None,
+        created_by_spond_id=UUID(record["created_by_spond_id"]),
+        tournament_type=record.get("tournament_type", "americano"),
+        points_to_win=record.get("points_to_win"),
+        player_spond_ids=[UUID(id) for id in record.get("player_spond_ids", [])],
+        court_names=record.get("court_names", []),
+    )
+
+
+class NacoOutbox:
+    """Durable queue of tournament intents that are delivered to Naco in the background.
+
+    Intents are written to disk before delivery is attempted, so a slow or failing
+    Naco never blocks the bot loop and a restart never loses an intent. Delivery is
+    retried with exponential backoff until Naco acknowledges the tournament (created
+    or 409), or until the event has ended. Either outcome is recorded in the audit
+    log, if one is given, with the seconds from queueing to delivery. Without a
+    `path`, intents are only kept in memory.
+    """
+
+    def __init__(
+        self,
+        creator: NacoTournamentCreator,
+        path: str | None = OUTBOX_FILE,
+        initial_backoff: float = 15,
+        max_backoff: float = 600,
+        clock: Clock | None = None,
+        audit: AuditLog | None = None,
+    ):
+        self.creator = creator
+        self.path = path
+        # Retries and expiry follow the clock of the bot, e.g. a VirtualClock
+        self.clock = clock or Clock()
+        self.audit = audit
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.entries: dict[str, dict[str, Any]] = self._load()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to read Naco outbox {self.path}: {e}")
+            return {}
+        if entries:
+            logging.info(
+                f"Loaded {len(entries)} pending tournament(s) from Naco outbox"
+            )
+        return entries
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _persist(self) -> None:
+        try:
+            self._save()
+        except OSError as e:
+            # Entries are kept in memory, so they are still delivered by this process
+            logging.error(f"Failed to persist Naco outbox {self.path}: {e}")
+
+    def enqueue(self, intent: CreateTournamentIntent, cycle: int = 0) -> bool:
+        """Persist the intent of bot cycle `cycle` and wake the delivery worker.
+
+        Returns False if the tournament is already created or pending.
+        """
+        if (
+            intent.event_id in self.creator.cache_created_event_ids
+            or intent.event_id in self.entries
+        ):
+            return False
+
+        now = self.clock.current().isoformat()
+        self.entries[intent.event_id] = {
+            "intent": intent_to_record(intent),
+            "cycle": cycle,
+            "queued": now,
+            "attempts": 0,
+            "next_attempt": now,
+        }
+        self._persist()
+        logging.debug(f'Queued tournament creation for "{intent.event_heading}"')
+        self.start()
+        self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _record(self, entry: dict[str, Any], outcome: str) -> None:
+        if self.audit is None:
+            return
+        intent = record_to_intent(entry["intent"])
+        now = self.clock.current()
+        queued = datetime.fromisoformat(entry.get("queued", entry["next_attempt"]))
+        # SQLite writes are slow on a busy disk, keep them off the event loop
+        await asyncio.to_thread(
+            self.audit.record,
+            [
+                Decision(
+                    time=now,
+                    cycle=entry.get("cycle", 0),
+                    kind=TOURNAMENT,
+                    source=intent.action,
+                    event_id=intent.event_id,
+                    player_id=None,
+                    enforced=intent.enforced,
+                    outcome=outcome,
+                    latency=max(0.0, (now - queued).total_seconds()),
+                    detail=intent.event_heading,
+                )
+            ],
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.max_backoff, self.initial_backoff * 2 ** (attempts - 1))
+
+    async def deliver_due(self) -> None:
+        """Attempt delivery of every entry whose next attempt is due."""
+        for event_id, entry in list(self.entries.items()):
+            now = self.clock.current()
+            if datetime.fromisoformat(entry["next_attempt"]) > now:
+                continue
+
+            intent = record_to_intent(entry["intent"])
+            expires_at = intent.end_time or intent.start_time
+            if now > expires_at:
+                logging.error(
+                    f'Giving up creating tournament for "{intent.event_heading}" '
+                    f"after {entry['attempts']} attempt(s): event has ended"
+                )
+                del self.entries[event_id]
+                await self._record(entry, EXPIRED)
+                self._persist()
+                continue
+
+            try:
+                delivered = await self.creator.create_tournament(
+                    event_id=intent.event_id,
+                    event_heading=intent.event_heading,
+                    tournament_type=intent.tournament_type,
+                    created_by_spond_id=intent.created_by_spond_id,
+                    player_spond_ids=intent.player_spond_ids,
+                    start_time=intent.start_time,
+                    end_time=intent.end_time,
+                    points_to_win=intent.points_to_win,
+                    court_names=intent.court_names,
+                )
+            except Exception as e:
+                # Any failure is retried with backoff, not on every wakeup
+                logging.error(
+                    f'Failed to create tournament for "{intent.event_heading}": {e}'
+                )
+                delivered = False
+            if delivered:
+                del self.entries[event_id]
+                await self._record(entry, CREATED)
+            else:
+                entry["attempts"] += 1
+                delay = self._backoff(entry["attempts"])
+                entry["next_attempt"] = (
+                    self.clock.current() + timedelta(seconds=delay)
+                ).isoformat()
+                logging.warning(
+                    f'Retrying tournament creation for "{intent.event_heading}" '
+                    f"in {delay:.0f} seconds (attempt {entry['attempts']})"
+                )
+            self._persist()
+
+    def seconds_until_next_attempt(self) -> float | None:
+        if not self.entries:
+            return None
+        next_attempt = min(
+            datetime.fromisoformat(entry["next_attempt"])
+            for entry in self.entries.values()
+        )
+        return max(0.0, (next_attempt - self.clock.current()).total_seconds())
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.deliver_due()
+                timeout = self.seconds_until_next_attempt()
+            except Exception as e:
+                logging.error(f"Naco outbox delivery failed: {e}")
+                timeout = self.initial_backoff
+            if timeout is None and not self._wakeup.is_set():
+                # Nothing pending; exit and let the next enqueue restart the worker
+                return
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
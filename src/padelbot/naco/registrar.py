@@ -7,6 +7,7 @@ from naco_backend_client.api.users import create_user
 from naco_backend_client.models.user import User
 from naco_backend_client.models.user_create import UserCreate
 
+from ..core.tracing import span
 from ..utils import Event, memberid_to_member
 
 
@@ -74,11 +75,12 @@ class NacoRegistrar:
             )
 
             try:
-                response = await create_user.asyncio_detailed(
-                    client=self.client,
-                    body=user_create,
-                    x_api_key=self.api_key,
-                )
+                with span("naco.create_user", "naco", player=player_id):
+                    response = await create_user.asyncio_detailed(
+                        client=self.client,
+                        body=user_create,
+                        x_api_key=self.api_key,
+                    )
             except Exception as e:
                 logging.error(f"Failed to register user {first_name} {last_name}: {e}")
                 continue
@@ -11,6 +11,8 @@ from naco_backend_client.models.spond_tournament_create_response import (
 )
 from naco_backend_client.types import Unset
 
+from ..core.tracing import span
+
 
 class NacoTournamentCreator:
     def __init__(self, base_url: str, api_key: str):
@@ -56,11 +58,12 @@ class NacoTournamentCreator:
         )
 
         try:
-            response = await create_tournament_from_spond.asyncio_detailed(
-                client=self.client,
-                body=body,
-                x_api_key=self.api_key,
-            )
+            with span("naco.create_tournament_from_spond", "naco", event=event_id):
+                response = await create_tournament_from_spond.asyncio_detailed(
+                    client=self.client,
+                    body=body,
+                    x_api_key=self.api_key,
+                )
         except Exception as e:
             logging.error(f'Failed to create tournament for "{event_heading}": {e}')
             return False
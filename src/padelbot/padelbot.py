@@ -1,38 +1,190 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import re
+import time
+from dataclasses import replace
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
 from spond import spond
 
 from .actions.actionbase import ActionBase, ActionIntent, create_action
-from .actions.naco_create_tournament import CreateTournamentIntent
-from .naco.registrar import NacoRegistrar
-from .naco.tournament import NacoTournamentCreator
-from .rules.rulebase import RuleBase, create_rule
-from .utils import Event, Events, eventid_to_event, memberid_to_member
+from .actions.actionbase import get_required_fields as get_action_fields
+from .audit import (
+    AUDIT_FILE,
+    FAILED,
+    FIRST_RUN,
+    NOT_ENFORCED,
+    QUEUED,
+    REMOVAL,
+    REMOVED,
+    TOURNAMENT,
+    AuditLog,
+    Decision,
+)
+from .core.clock import Clock
+from .core.config import ConfigWatcher, readconfig
+from .core.logger import (
+    OVERFLOW_POLICIES,
+    QUEUE_SIZE,
+    RATE_LIMIT,
+    configure_logging,
+    log_context,
+    set_log_context,
+)
+from .core.loopmonitor import LOOP_MONITOR
+from .core.memory import MEMORY
+from .core.profiler import PROFILER
+from .core.startup import since_start
+from .core.tracing import span, traced
+from .history import HISTORY_FILE, AttendanceHistory
+from .projection import CORE_FIELDS, project_event
+from .roster import RosterStore
+from .rules.rulebase import RuleBase, create_rule, get_lookback
+from .rules.rulebase import get_required_fields as get_rule_fields
+from .timeline import Timeline, end_epoch, to_epoch
+from .utils import (
+    Event,
+    Events,
+    eventid_to_event,
+    events_fingerprint,
+    get_added_signups,
+    get_signups,
+    memberid_to_member,
+)
+
+if TYPE_CHECKING:
+    from .naco.registrar import NacoRegistrar
+    from .naco.tournament import NacoTournamentCreator
+
+# Extra time to keep ended events for, beyond the longest lookback of the rules
+LOOKBACK_MARGIN = timedelta(days=1)
+# Spond truncates time filters to the date and reads them as UTC, so they are
+# widened by this much and the fetched events are classified locally
+SPOND_FILTER_MARGIN = timedelta(days=1)
+# Most events fetched by one request, Spond returns the earliest ones
+MAX_EVENTS = 500
+# Used when no profile is known, so that actions can still be created
+PLACEHOLDER_PROFILE_ID = "00000000-0000-0000-0000-000000000000"
+
+
+def validate_config(cfg: dict) -> None:
+    """Raise ValueError if `cfg` has invalid logging settings, rules or actions.
+
+    Rules and actions are created against an empty snapshot, which catches unknown
+    types and parameters, invalid header regexes and message templates.
+    """
+    level = cfg["logging"]["level"]
+    if not isinstance(level, int) and level not in logging.getLevelNamesMapping():
+        raise ValueError(f'Unknown logging level "{level}"')
+    if cfg["logging"].get("format", "text") not in ("text", "json"):
+        raise ValueError('Logging format must be "text" or "json"')
+    rate_limit = cfg["logging"].get("rate_limit", 0)
+    if not isinstance(rate_limit, int) or rate_limit < 0:
+        raise ValueError("Logging rate_limit must be a non-negative integer")
+    if cfg["logging"].get("overflow", "drop_debug") not in OVERFLOW_POLICIES:
+        raise ValueError(f"Logging overflow must be one of {OVERFLOW_POLICIES}")
+    queue_size = cfg["logging"].get("queue_size", QUEUE_SIZE)
+    if not isinstance(queue_size, int) or queue_size < 1:
+        raise ValueError("Logging queue_size must be a positive integer")
+    if not isinstance(cfg["logging"].get("trace", False), bool):
+        raise ValueError("Logging trace must be true or false")
+    if not isinstance(cfg["general"]["seconds_to_sleep"], int | float):
+        raise ValueError("seconds_to_sleep must be a number")
+
+    events = Events()
+    for rule_name, rule_def in cfg["rules"].items():
+        try:
+            create_rule(rule_name, events, rule_def)
+            re.compile(rule_def.get("header_regex", ""))
+            get_rule_fields({rule_name: rule_def})
+            get_lookback({rule_name: rule_def})
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise ValueError(f"Invalid rule {rule_name}: {e}") from e
+    for action_name, action_def in cfg["actions"].items():
+        try:
+            create_action(
+                action_name,
+                events,
+                {**action_def, "spond_profile_id": PLACEHOLDER_PROFILE_ID},
+            )
+            re.compile(action_def.get("header_regex", ""))
+        except (KeyError, TypeError, ValueError, re.error) as e:
+            raise ValueError(f"Invalid action {action_name}: {e}") from e
 
 
 class PadelBot:
-    def __init__(self, cfg: dict):
+    def __init__(
+        self,
+        cfg: dict,
+        clock: Clock | None = None,
+        spond_client: spond.Spond | None = None,
+        config_watcher: ConfigWatcher | None = None,
+    ):
         self.cfg = cfg
-        try:
-            self.spond = spond.Spond(cfg["auth"]["username"], cfg["auth"]["password"])
-        except Exception as e:
-            logging.error(f"Failed to initialize Spond client: {e}")
-            raise
+        self.clock = clock or Clock()
+        # Reloads the configuration when its file changes, see reload_config()
+        self.config_watcher = config_watcher
+        if spond_client is not None:
+            # E.g. a RecordedSpond replaying snapshots
+            self.spond = spond_client
+        else:
+            try:
+                self.spond = spond.Spond(
+                    cfg["auth"]["username"], cfg["auth"]["password"]
+                )
+            except Exception as e:
+                logging.error(f"Failed to initialize Spond client: {e}")
+                raise
+        self.history = AttendanceHistory(
+            cfg["general"].get("history_file", HISTORY_FILE)
+        )
+        self.audit = AuditLog(cfg["general"].get("audit_file", AUDIT_FILE))
         self.naco_enabled = cfg["naco"].get("enabled", False)
         if self.naco_enabled:
-            self.naco_registrar = NacoRegistrar(
-                base_url=cfg["naco"]["base_url"],
-                api_key=cfg["naco"].get("api_key", ""),
+            # The Naco client is slow to import and only needed when enabled
+            from .naco.outbox import OUTBOX_FILE, NacoOutbox
+
+            self.naco_registrar, self.naco_tournament_creator = (
+                self.create_naco_clients()
             )
-            self.naco_tournament_creator = NacoTournamentCreator(
-                base_url=cfg["naco"]["base_url"],
-                api_key=cfg["naco"].get("api_key", ""),
+            self.naco_outbox = NacoOutbox(
+                self.naco_tournament_creator,
+                path=cfg["naco"].get("outbox_file", OUTBOX_FILE),
+                clock=self.clock,
+                audit=self.audit,
             )
+        # Every Spond call is traced when tracing is configured
+        self.spond = traced(self.spond, "spond")
+        self.roster_store = RosterStore(self.spond, cfg["auth"]["group_id"])
         self.first_run = True
         self.spond_profile_id: str | None = None
         self.events = Events()  # Cache events for webapp access
+        self.last_cycle_key: tuple | None = None
+        self.last_signups: dict | None = None
+        # Number of the current cycle, counting cycles that failed to fetch events
+        self.cycles = 0
+        self.skipped_cycles = 0
+        # Ended events never change, so they are fetched once and then kept here
+        self.ended_events: dict[str, Event] | None = None
+        self.current_events: list[Event] = []
+
+    def create_naco_clients(self) -> tuple["NacoRegistrar", "NacoTournamentCreator"]:
+        """Create the clients registering Spond members and creating tournaments in
+        Naco."""
+        from .naco.registrar import NacoRegistrar
+        from .naco.tournament import NacoTournamentCreator
+
+        return (
+            NacoRegistrar(
+                base_url=self.cfg["naco"]["base_url"],
+                api_key=self.cfg["naco"].get("api_key", ""),
+            ),
+            NacoTournamentCreator(
+                base_url=self.cfg["naco"]["base_url"],
+                api_key=self.cfg["naco"].get("api_key", ""),
+            ),
+        )
 
     async def resolve_spond_profile_id(self) -> None:
         """Fetch the connected user's Spond profile ID on first run."""
@@ -54,33 +206,135 @@ class PadelBot:
                 f"Tournament creation will be disabled until resolved."
             )
 
-    async def get_events(self) -> Events:
-        timestamp_now = datetime.now().astimezone()
-        min_start = timestamp_now - timedelta(days=7)
+    def reload_config(self) -> bool:
+        """Reload the configuration if its file has changed since the last cycle.
+
+        An invalid configuration is logged and the current one is kept. Returns True
+        if the configuration was reloaded.
+        """
+        if self.config_watcher is None or not self.config_watcher.changed():
+            return False
+        path = self.config_watcher.path
         try:
-            events = (
-                await self.spond.get_events(
-                    group_id=self.cfg["auth"]["group_id"],
-                    min_start=min_start,
-                    max_start=None,
+            cfg = readconfig(path)
+            if cfg is None:
+                raise ValueError("username, password or group_id is missing")
+            validate_config(cfg)
+        except Exception as e:
+            logging.error(f"Keeping the current configuration, {path} is invalid: {e}")
+            return False
+        self.apply_config(cfg)
+        logging.info(f"Reloaded configuration from {path}")
+        return True
+
+    def apply_config(self, cfg: dict) -> None:
+        """Switch to `cfg` without restarting.
+
+        Rules and actions are created from the configuration every cycle, so they
+        follow the new configuration from the next evaluation. The event snapshot and
+        the caches are kept, unless the new rules and actions need ended events from
+        further back or event fields that were not kept at ingest.
+        """
+        # The Spond and Naco clients are only set up at startup
+        for section in ("auth", "naco"):
+            if cfg[section] != self.cfg[section]:
+                logging.warning(
+                    f"Changes to [{section}] are ignored until the bot is restarted"
                 )
-                or []
+            cfg = {**cfg, section: self.cfg[section]}
+
+        lookback = self.get_lookback()
+        fields = self.get_fields()
+        self.cfg = cfg
+        configure_logging(cfg["logging"])
+
+        if not self.get_fields() <= fields:
+            # Cached events and members were projected without the new fields
+            logging.info("Configuration reads new event fields, fetching events again")
+            self.ended_events = None
+            self.current_events = []
+            self.roster_store.reset()
+        elif self.get_lookback() > lookback:
+            logging.info("Configuration needs a longer lookback, fetching events again")
+            self.ended_events = None
+
+        # Sign-ups accepted by the old rules must be evaluated by the new ones
+        self.last_cycle_key = None
+        self.last_signups = None
+
+    def get_lookback(self) -> timedelta:
+        """How far back ended events are kept for the configured rules."""
+        return get_lookback(self.cfg["rules"]) + LOOKBACK_MARGIN
+
+    def get_fields(self) -> frozenset[str]:
+        """Event fields kept at ingest: those of the bot and the configured rules
+        and actions."""
+        return (
+            CORE_FIELDS
+            | get_rule_fields(self.cfg["rules"])
+            | get_action_fields(self.cfg["actions"])
+        )
+
+    async def fetch_events(self, **kwargs) -> list[Event]:
+        events = (
+            await self.spond.get_events(
+                group_id=self.cfg["auth"]["group_id"], max_events=MAX_EVENTS, **kwargs
             )
+            or []
+        )
+        if len(events) >= MAX_EVENTS:
+            logging.warning(
+                f"Spond returned {len(events)} events, later events may be missing"
+            )
+        fields = self.get_fields()
+        self.roster_store.fields = fields
+        return [project_event(event, fields) for event in events]
+
+    async def get_events(self) -> Events:
+        timestamp_now = self.clock.now()
+        now_epoch = to_epoch(timestamp_now)
+        min_end = timestamp_now - self.get_lookback()
+        try:
+            # Only upcoming and ongoing events can change between cycles, and the
+            # widened filter also returns some that ended
+            fetched_events = await self.fetch_events(
+                min_end=timestamp_now - SPOND_FILTER_MARGIN
+            )
+            if self.ended_events is None:
+                ended_events = await self.fetch_events(
+                    min_end=min_end - SPOND_FILTER_MARGIN,
+                    max_end=timestamp_now + SPOND_FILTER_MARGIN,
+                )
+                self.ended_events = {event["id"]: event for event in ended_events}
+                logging.debug(f"Fetched {len(self.ended_events)} ended events")
         except Exception as e:
             logging.error(f"Failed to fetch events from Spond: {e}")
             return Events()
 
-        timestamp_now = datetime.now().astimezone()
-        retval = Events()
-        for event in events:
-            startTimestamp = datetime.fromisoformat(event["startTimestamp"])
-            endTimestamp = datetime.fromisoformat(event["endTimestamp"])
-            if startTimestamp > datetime.now().astimezone():
-                retval.upcoming.append(event)
-            elif endTimestamp < datetime.now().astimezone():
-                retval.previous.append(event)
+        # Events that are no longer fetched, e.g. because they ended since the last
+        # cycle, are kept
+        events_by_id = {event["id"]: event for event in fetched_events}
+        for event in self.current_events:
+            events_by_id.setdefault(event["id"], event)
+        current_events = []
+        for event_id, event in events_by_id.items():
+            if end_epoch(event) < now_epoch:
+                self.ended_events[event_id] = event
             else:
-                retval.ongoing.append(event)
+                current_events.append(event)
+        self.current_events = current_events
+
+        current_ids = {event["id"] for event in current_events}
+        min_end_epoch = to_epoch(min_end)
+        self.ended_events = {
+            event_id: event
+            for event_id, event in self.ended_events.items()
+            if end_epoch(event) >= min_end_epoch and event_id not in current_ids
+        }
+
+        events = list(self.ended_events.values()) + current_events
+        await self.roster_store.normalize(events)
+        retval = Timeline(events).split(timestamp_now)
 
         logging.debug(
             f"Found {len(retval.upcoming)} upcoming, {len(retval.previous)} previous and {len(retval.ongoing)} ongoing events"
@@ -91,7 +345,7 @@ class PadelBot:
         rules = []
         for rule_name, rule_def in self.cfg["rules"].items():
             try:
-                rule = create_rule(rule_name, events, rule_def)
+                rule = create_rule(rule_name, events, rule_def, self.clock)
             except ValueError as e:
                 logging.error(f"Skipping rule {rule_name}: {e}")
                 continue
@@ -119,7 +373,7 @@ class PadelBot:
                 continue
             action_def = {**action_def, "spond_profile_id": self.spond_profile_id}
             try:
-                action = create_action(action_name, events, action_def)
+                action = create_action(action_name, events, action_def, self.clock)
             except ValueError as e:
                 logging.error(f"Skipping action {action_name}: {e}")
                 continue
@@ -127,23 +381,17 @@ class PadelBot:
         return actions
 
     async def execute_action(self, intent: ActionIntent) -> bool:
+        from .actions.naco_create_tournament import CreateTournamentIntent
+
         if isinstance(intent, CreateTournamentIntent):
             if not self.naco_enabled:
                 logging.warning(
                     f'Cannot create tournament for "{intent.event_heading}": Naco is disabled'
                 )
                 return False
-            return await self.naco_tournament_creator.create_tournament(
-                event_id=intent.event_id,
-                event_heading=intent.event_heading,
-                tournament_type=intent.tournament_type,
-                created_by_spond_id=intent.created_by_spond_id,
-                player_spond_ids=intent.player_spond_ids,
-                start_time=intent.start_time,
-                end_time=intent.end_time,
-                points_to_win=intent.points_to_win,
-                court_names=intent.court_names,
-            )
+            # Delivery happens in the background so Naco latency never delays the loop.
+            # Tournaments already created or pending are not queued again.
+            return self.naco_outbox.enqueue(intent, cycle=self.cycles)
         logging.error(f"Unknown action intent type: {type(intent).__name__}")
         return False
 
@@ -151,12 +399,14 @@ class PadelBot:
         # Identify next rule/quarantine end time. Must be in the future.
         seconds_to_sleep = default_sleep_time
 
-        all_rule_end_times = [
-            dt for rule in self.get_rules(events) for dt in rule.expirationtimes()
-        ]
-        now = datetime.now().astimezone()
+        now = self.clock.now()
         next_rule_end_time = min(
-            (dt for dt in all_rule_end_times if dt > now), default=None
+            (
+                dt
+                for rule in self.get_rules(events)
+                if (dt := rule.next_expirationtime(now))
+            ),
+            default=None,
         )
         if next_rule_end_time:
             secs_to_quarantine_end = (next_rule_end_time - now).total_seconds()
@@ -182,8 +432,7 @@ class PadelBot:
             (
                 dt
                 for action in self.get_actions(events)
-                for dt in action.expirationtimes()
-                if dt > now
+                if (dt := action.next_expirationtime(now))
             ),
             default=None,
         )
@@ -196,16 +445,38 @@ class PadelBot:
     def update_events_with_removal(
         self, player_id: str, event_id: str, events: Events
     ) -> Events:
-        updated_events = []
-        for event in events.upcoming:
-            if event["id"] == event_id:
-                # Remove player_id from whichever group they are in
-                for key in ("waitinglistIds", "acceptedIds"):
-                    if player_id in event["responses"][key]:
-                        event["responses"][key].remove(player_id)
-                        break  # Player can only be in one group, so stop after removal
-            updated_events.append(event)
-        events.upcoming = updated_events
+        """Return a copy of `events` with the player removed from the event.
+
+        Only the affected event is copied; all other events are shared with `events`,
+        which is left untouched so that readers of a published snapshot never see a
+        partial update.
+        """
+        for index, event in enumerate(events.upcoming):
+            if event["id"] != event_id:
+                continue
+            # Remove player_id from whichever group they are in
+            for key in ("waitinglistIds", "acceptedIds"):
+                if player_id in event["responses"][key]:
+                    player_ids = list(event["responses"][key])
+                    player_ids.remove(player_id)
+                    # copy() keeps the type of projected events
+                    updated_event = event.copy()
+                    updated_event["responses"] = {
+                        **event["responses"],
+                        key: player_ids,
+                    }
+                    upcoming = list(events.upcoming)
+                    upcoming[index] = updated_event
+                    timeline = events.timeline
+                    if timeline is not None:
+                        timeline = timeline.replace_event(updated_event)
+                    # Only the column of the event changes
+                    matrix = events.matrix
+                    if matrix is not None:
+                        matrix = matrix.replace_event(updated_event)
+                    return replace(
+                        events, upcoming=upcoming, timeline=timeline, matrix=matrix
+                    )
         return events
 
     async def remove_player_from_event(
@@ -248,19 +519,44 @@ class PadelBot:
                 return False
         return False
 
-    async def run(self):
-        await self.resolve_spond_profile_id()
-        events = await self.get_events()
-        self.events = events  # Cache events for webapp access
+    def get_cycle_key(
+        self, events: Events, rules: list[RuleBase], actions: list[ActionBase]
+    ) -> tuple:
+        """Return a key identifying everything rule and action evaluation depends on.
 
-        if self.naco_enabled:
-            await self.naco_registrar.register_event_users(
-                events.upcoming, self.spond.get_person
-            )
+        It combines a fingerprint of the event fields declared by the bot, rules and
+        actions with every rule and action deadline and whether that deadline has
+        been crossed.
+        """
+        now = self.clock.now()
+        items: list[RuleBase | ActionBase] = [*rules, *actions]
+        deadlines = frozenset(
+            (dt, dt <= now) for item in items for dt in item.expirationtimes()
+        )
+        return (events_fingerprint(events, self.get_fields()), deadlines)
+
+    async def evaluate_cycle(
+        self,
+        events: Events,
+        rules: list[RuleBase],
+        actions: list[ActionBase],
+        added: dict[str, set[str]] | None = None,
+    ) -> bool:
+        """Evaluate rules and actions and enforce the outcome.
 
+        If `added` is given, rules only evaluate these new sign-ups where they support
+        incremental evaluation. Returns False if any enforced removal failed.
+        """
         all_removals = []
-        for rule in self.get_rules(events):
-            removals = rule.evaluate()
+        for rule in rules:
+            # Evaluate against the latest overlay so that earlier removals are seen
+            rule.events = events
+            removals = None
+            with log_context(rule=rule.name), span(rule.name, "rule"):
+                if added is not None:
+                    removals = rule.evaluate_incremental(added)
+                if removals is None:
+                    removals = rule.evaluate()
             for removal in removals:
                 # Update events so that subsequent rules see the to-be-updated state
                 if removal.enforced:
@@ -269,31 +565,176 @@ class PadelBot:
                     )
             all_removals.extend(removals)
 
+        # Publish the complete snapshot in a single assignment for webapp readers
+        self.events = events
+
+        all_removed = True
+        decisions = []
         for removal in all_removals:
-            await self.remove_player_from_event(
-                player_id=removal.player_id,
-                event_id=removal.event_id,
-                message=removal.message,
-                events=events.upcoming,
-                enforce=removal.enforced and not self.first_run,
+            enforce = removal.enforced and not self.first_run
+            started = time.perf_counter()
+            with (
+                log_context(event=removal.event_id, player=removal.player_id),
+                span(
+                    "remove_player_from_event",
+                    "enforce",
+                    event=removal.event_id,
+                    player=removal.player_id,
+                    enforce=enforce,
+                ),
+            ):
+                removed = await self.remove_player_from_event(
+                    player_id=removal.player_id,
+                    event_id=removal.event_id,
+                    message=removal.message,
+                    events=events.upcoming,
+                    enforce=enforce,
+                )
+            if enforce and not removed:
+                all_removed = False
+            if enforce:
+                outcome = REMOVED if removed else FAILED
+            else:
+                outcome = FIRST_RUN if removal.enforced else NOT_ENFORCED
+            decisions.append(
+                Decision(
+                    time=self.clock.now(),
+                    cycle=self.cycles,
+                    kind=REMOVAL,
+                    source=removal.rule,
+                    event_id=removal.event_id,
+                    player_id=removal.player_id,
+                    enforced=removal.enforced,
+                    outcome=outcome,
+                    latency=time.perf_counter() - started,
+                    detail=removal.message,
+                )
             )
 
         # Evaluate and execute actions
         if not self.first_run:
             all_intents = []
-            for action in self.get_actions(events):
+            for action in actions:
+                # Players removed this cycle must not be in the intents
+                action.events = events
                 intents = action.evaluate()
                 all_intents.extend(intents)
 
             for intent in all_intents:
+                started = time.perf_counter()
                 if intent.enforced:
-                    await self.execute_action(intent)
+                    with span("execute_action", "enforce", event=intent.event_id):
+                        executed = await self.execute_action(intent)
+                    if not executed:
+                        # Already pending or created, or the failure was logged
+                        continue
+                    outcome = QUEUED
+                else:
+                    outcome = NOT_ENFORCED
+                decisions.append(
+                    Decision(
+                        time=self.clock.now(),
+                        cycle=self.cycles,
+                        kind=TOURNAMENT,
+                        source=intent.action,
+                        event_id=intent.event_id,
+                        player_id=None,
+                        enforced=intent.enforced,
+                        outcome=outcome,
+                        latency=time.perf_counter() - started,
+                        detail=getattr(intent, "event_heading", ""),
+                    )
+                )
 
-        self.first_run = False
+        await asyncio.to_thread(self.audit.record, decisions)
+        return all_removed
+
+    async def sync_naco(self, events: Events) -> None:
+        if self.naco_outbox.entries:
+            # Resume delivery of intents persisted by a previous process
+            self.naco_outbox.start()
+        await self.naco_registrar.register_event_users(
+            events.upcoming, self.spond.get_person
+        )
+
+    async def run(self):
+        self.clock.tick()
+        # Counted apart from the snapshot version, which does not change when
+        # fetching events fails, so that rate limits reset every cycle
+        self.cycles += 1
+        set_log_context(cycle=self.cycles)
+        with PROFILER.profile_cycle(), span("cycle", cycle=self.cycles):
+            await self.run_cycle()
+        # Between cycles, when memory is traced
+        MEMORY.inspect(self)
 
         seconds_to_sleep = self.get_sleep_time(
-            self.cfg["general"]["seconds_to_sleep"], events
+            self.cfg["general"]["seconds_to_sleep"], self.events
         )
+        # The schedule is relative to the start of the cycle
+        seconds_to_sleep = max(0.0, seconds_to_sleep - self.clock.elapsed())
 
         logging.info(f"Sleeping for {seconds_to_sleep:.1f} seconds")
-        await asyncio.sleep(seconds_to_sleep)
+        slept_from = self.clock.elapsed()
+        await self.clock.sleep(seconds_to_sleep)
+        # How much later than scheduled the next cycle starts
+        LOOP_MONITOR.wakeup_drift = self.clock.elapsed() - slept_from - seconds_to_sleep
+
+    async def run_cycle(self):
+        """Fetch events, then evaluate and enforce rules and actions."""
+        self.reload_config()
+        await self.resolve_spond_profile_id()
+        with span("get_events"):
+            events = await self.get_events()
+        events = replace(events, version=self.events.version + 1)
+        # SQLite writes are slow on a busy disk, keep them off the event loop
+        await asyncio.to_thread(self.history.ingest, events.previous)
+
+        if self.naco_enabled:
+            await self.sync_naco(events)
+
+        rules = self.get_rules(events)
+        actions = self.get_actions(events)
+        cycle_key = self.get_cycle_key(events, rules, actions)
+        if not self.first_run and cycle_key == self.last_cycle_key:
+            self.skipped_cycles += 1
+            logging.info(
+                "No changes to events or deadlines since last cycle, skipping evaluation"
+            )
+            self.events = events
+        else:
+            added = None
+            if (
+                self.last_cycle_key is not None
+                and self.last_signups is not None
+                and cycle_key[0][:2] == self.last_cycle_key[0][:2]
+                and cycle_key[1] == self.last_cycle_key[1]
+            ):
+                # Only upcoming events changed, so only new sign-ups need evaluation
+                added = get_added_signups(
+                    self.last_signups, get_signups(events, self.get_fields())
+                )
+                logging.debug(
+                    f"Evaluating {sum(len(ids) for ids in added.values())} new sign-up(s)"
+                )
+            all_removed = await self.evaluate_cycle(events, rules, actions, added)
+            # Failed removals must be retried, so only remember fully enforced cycles.
+            # The published snapshot has the enforced removals applied, so a removed
+            # player who signs up again before the next fetch is a new sign-up.
+            remember = all_removed and not self.first_run
+            self.last_cycle_key = (
+                (events_fingerprint(self.events, self.get_fields()), cycle_key[1])
+                if remember
+                else None
+            )
+            self.last_signups = (
+                get_signups(self.events, self.get_fields()) if remember else None
+            )
+
+        if suppressed := RATE_LIMIT.pop_suppressed():
+            logging.info("Suppressed %d repetitive log lines this cycle", suppressed)
+        if self.first_run:
+            logging.info(
+                f"First cycle completed {since_start():.2f} seconds after startup"
+            )
+        self.first_run = False
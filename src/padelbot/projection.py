@@ -0,0 +1,90 @@
+from string import Formatter
+from typing import Any
+
+from .utils import Event
+
+# Fields used by the bot itself: the timeline, sign-up tracking, the roster,
+# the attendance history and the webapp
+CORE_FIELDS = frozenset(
+    {
+        "id",
+        "heading",
+        "startTimestamp",
+        "endTimestamp",
+        "seriesId",
+        "responses",
+        "recipients",
+    }
+)
+MEMBER_FIELDS = frozenset({"id", "firstName", "lastName", "profile"})
+
+
+class UndeclaredFieldError(LookupError):
+    pass
+
+
+class ProjectedEvent(dict):
+    """Event reduced to the fields declared by the configured rules and actions.
+
+    Reading a field that was not declared raises UndeclaredFieldError, so a rule
+    that needs a new field fails loudly instead of seeing it as missing. Declared
+    fields that Spond did not send behave like in a plain dict.
+    """
+
+    __slots__ = ("declared",)
+
+    def __init__(self, declared: frozenset[str], *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.declared = declared
+
+    def _check(self, key: str) -> None:
+        if key not in self.declared:
+            raise UndeclaredFieldError(
+                f'Event field "{key}" is read but not declared in the `fields` of '
+                f"any configured rule or action"
+            )
+
+    def __missing__(self, key: str) -> Any:
+        self._check(key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._check(key)
+        return super().get(key, default)
+
+    def copy(self) -> "ProjectedEvent":
+        return ProjectedEvent(self.declared, self)
+
+
+def template_fields(template: str) -> set[str]:
+    """Names of the fields referenced by a str.format() template."""
+    return {
+        field_name.split(".")[0].split("[")[0]
+        for _, field_name, _, _ in Formatter().parse(template)
+        if field_name
+    }
+
+
+def project_member(member: dict[str, Any], fields: frozenset[str]) -> dict[str, Any]:
+    """Keep the names, profile id and any other declared field of a member."""
+    fields = MEMBER_FIELDS | fields
+    projected = {key: member[key] for key in fields if key in member}
+    if isinstance(profile := projected.get("profile"), dict):
+        projected["profile"] = {"id": profile.get("id")}
+    return projected
+
+
+def project_event(event: Event, fields: frozenset[str]) -> ProjectedEvent:
+    """Keep only the declared fields of a Spond event.
+
+    Of the recipients only the group members are kept. They are projected with
+    project_member when they are added to the shared roster, so members that are
+    already known are not copied for every event.
+    """
+    projected = ProjectedEvent(
+        fields, {key: event[key] for key in fields if key in event}
+    )
+    group = projected.get("recipients", {}).get("group")
+    if group is not None:
+        projected["recipients"] = {"group": {"members": group.get("members", [])}}
+    return projected
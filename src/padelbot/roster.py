@@ -0,0 +1,134 @@
+import logging
+import sys
+from typing import Any
+
+from spond import spond
+
+from .projection import project_member
+from .utils import Event
+
+Member = dict[str, Any]
+
+RESPONSE_ID_KEYS = (
+    "acceptedIds",
+    "waitinglistIds",
+    "unconfirmedIds",
+    "declinedIds",
+    "unansweredIds",
+)
+
+
+def _intern_member(member: Member) -> Member:
+    return {
+        sys.intern(key): sys.intern(value) if isinstance(value, str) else value
+        for key, value in member.items()
+    }
+
+
+def _event_members(event: Event) -> list[Member]:
+    return event.get("recipients", {}).get("group", {}).get("members", [])
+
+
+class Roster(list[Member]):
+    """Group members shared by all events, with an index by member id.
+
+    It is a list so that code reading `event["recipients"]["group"]["members"]`
+    keeps working, while lookups by id use `by_id`. A roster is never changed once
+    events refer to it, since published snapshots share it; with_members() returns
+    an updated copy instead.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.by_id: dict[str, Member] = {}
+
+    def with_members(self, members: list[Member]) -> "Roster":
+        """Return a roster with new members added and changed ones replaced, or this
+        roster if nothing changed. Members are never dropped, since ended events may
+        still refer to them."""
+        changed = {}
+        for member in members:
+            member = _intern_member(member)
+            if self.by_id.get(member["id"]) != member:
+                changed[member["id"]] = member
+        if not changed:
+            return self
+        roster = Roster()
+        for known in self:
+            roster.append(changed.pop(known["id"], known))
+        roster.extend(changed.values())
+        roster.by_id = {member["id"]: member for member in roster}
+        return roster
+
+
+class RosterStore:
+    """Replace the member list embedded in each event by one shared roster.
+
+    Spond embeds the full group roster in every event. Events are normalized at
+    ingest to reference the same `Roster`, which is refreshed from the group when
+    an event refers to a member that is not known yet or differs from the known
+    one, e.g. after a change of name or Spond profile.
+    """
+
+    def __init__(self, spond_client: spond.Spond, group_id: str):
+        self.spond = spond_client
+        self.group_id = group_id
+        self.roster = Roster()
+        # Event fields kept at ingest, used to project the members of the group
+        self.fields: frozenset[str] | None = None
+
+    def reset(self) -> None:
+        """Start a new roster, e.g. after `fields` changed. Events still referring to
+        the old roster keep it."""
+        self.roster = Roster()
+
+    def _project(self, members: list[Member]) -> list[Member]:
+        if self.fields is None:
+            return members
+        return [project_member(member, self.fields) for member in members]
+
+    def _changed(self, members: list[Member]) -> list[Member]:
+        """The members that are unknown or differ from the known ones."""
+        return [
+            member
+            for member in self._project(members)
+            if self.roster.by_id.get(member["id"]) != member
+        ]
+
+    async def refresh(self, fallback: list[Member]) -> None:
+        try:
+            group = await self.spond.get_group(self.group_id)
+            self.roster = self.roster.with_members(
+                self._project(group.get("members", []))
+            )
+            logging.debug(f"Refreshed roster with {len(self.roster)} members")
+        except Exception as e:
+            logging.error(f"Failed to fetch group members from Spond: {e}")
+        # Make sure the members embedded in the events are current, even if the
+        # group could not be fetched or is lagging behind
+        self.roster = self.roster.with_members(self._changed(fallback))
+
+    async def normalize(self, events: list[Event]) -> None:
+        """Point the events at the shared roster and intern their response ids.
+
+        Only events fetched since the last call are changed, events referring to a
+        roster are already normalized.
+        """
+        events = [
+            event for event in events if not isinstance(_event_members(event), Roster)
+        ]
+        # Spond embeds the same roster in every event, compare each member once
+        embedded = {
+            member["id"]: member for event in events for member in _event_members(event)
+        }
+        if changed := self._changed(list(embedded.values())):
+            await self.refresh(changed)
+
+        for event in events:
+            group = event.get("recipients", {}).get("group")
+            if group is not None and "members" in group:
+                group["members"] = self.roster
+            responses = event.get("responses", {})
+            for key in RESPONSE_ID_KEYS:
+                if key in responses:
+                    responses[key] = [sys.intern(id) for id in responses[key]]
@@ -1,3 +1 @@
-# Import to trigger registration
-from .max_events_per_week import RuleMaxEventsPerWeek  # noqa: F401
-from .quarantine_after_event import RuleQuarantineAfterEvent  # noqa: F401
+# Rules are imported when configured, see rulebase.get_rule_class()
@@ -2,11 +2,17 @@ import logging
 import re
 from datetime import datetime, timedelta
 
+from ..core.clock import Clock
+from ..core.logger import SAMPLED, set_log_context
+from ..matrix import attendance_matrix, resolve_engine
+from ..timeline import upcoming_timeline
 from ..utils import Event, Events, get_participating_player_names, memberid_to_member
 from .rulebase import RemovalInfo, RuleBase, register_rule
 
 
 class RuleMaxEventsPerWeek(RuleBase):
+    fields = frozenset({"heading", "startTimestamp", "responses", "recipients"})
+
     def __init__(
         self,
         rule_name: str,
@@ -16,6 +22,8 @@ class RuleMaxEventsPerWeek(RuleBase):
         enforced: bool = False,
         max_events: int = 1,
         grace_hours: int = 24,
+        engine: str = "python",
+        clock: Clock | None = None,
     ) -> None:
         self.name = rule_name
         self.events = events
@@ -24,13 +32,15 @@ class RuleMaxEventsPerWeek(RuleBase):
         self.enforced = enforced
         self.max_events = max(0, max_events)
         self.grace_hours = grace_hours
+        self.engine = resolve_engine(rule_name, engine)
+        self.clock = clock or Clock()
 
     def _include(self, event: Event) -> bool:
         if not re.search(self.header_regex, event["heading"], re.IGNORECASE):
             return False
 
         event_start = datetime.fromisoformat(event["startTimestamp"]).astimezone()
-        now = datetime.now().astimezone()
+        now = self.clock.now()
 
         # Event is not in grace period
         if now > event_start - timedelta(hours=self.grace_hours):
@@ -40,32 +50,69 @@ class RuleMaxEventsPerWeek(RuleBase):
             return False
         return True
 
+    def _included_events(self) -> list[Event]:
+        """Events outside the grace period and within the next week, in start order."""
+        now = self.clock.now()
+        return [
+            event
+            for event in upcoming_timeline(self.events).starting_between(
+                now + timedelta(hours=self.grace_hours), now + timedelta(days=7)
+            )
+            if re.search(self.header_regex, event["heading"], re.IGNORECASE)
+        ]
+
     def expirationtimes(self) -> list[datetime]:
         result: list[datetime] = []
-        for event in self.events.upcoming:
-            if self._include(event):
-                event_start = datetime.fromisoformat(
-                    event["startTimestamp"]
-                ).astimezone()
-                result.append(event_start - timedelta(hours=self.grace_hours))
+        for event in self._included_events():
+            event_start = datetime.fromisoformat(event["startTimestamp"]).astimezone()
+            result.append(event_start - timedelta(hours=self.grace_hours))
         return result
 
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        last_start = self.clock.now() + timedelta(days=7)
+        grace_period = timedelta(hours=self.grace_hours)
+        for event in upcoming_timeline(self.events).starting_after(now + grace_period):
+            event_start = datetime.fromisoformat(event["startTimestamp"]).astimezone()
+            if event_start > last_start:
+                break
+            if re.search(self.header_regex, event["heading"], re.IGNORECASE):
+                return event_start - grace_period
+        return None
+
     def evaluate(self) -> list[RemovalInfo]:
+        return self._evaluate(None)
+
+    def evaluate_incremental(self, added: dict[str, set[str]]) -> list[RemovalInfo]:
+        # Only players with new sign-ups can have exceeded the limit since last time
+        return self._evaluate(set().union(*added.values()))
+
+    def _evaluate(self, players: set[str] | None) -> list[RemovalInfo]:
+        if self.engine == "matrix":
+            return self._evaluate_matrix(players)
+
         player_events: dict[str, list[Event]] = {}
 
-        for event in self.events.upcoming:
-            if not self._include(event):
-                continue
-            logging.info(f'[{self.name}]: Processing "{event["heading"]}"')
+        for event in self._included_events():
+            player_ids: list[str] = (
+                event["responses"]["acceptedIds"] + event["responses"]["waitinglistIds"]
+            )
+            if players is not None:
+                player_ids = [id for id in player_ids if id in players]
+                if not player_ids:
+                    continue
+            set_log_context(event=event["id"])
+            logging.info(
+                '[%s]: Processing "%s"', self.name, event["heading"], extra=SAMPLED
+            )
             if logging.getLogger().isEnabledFor(logging.DEBUG):
                 participating_names = get_participating_player_names(event)
                 logging.debug(
-                    f"[{self.name}]: -> Participating players: {', '.join(participating_names)}"
+                    "[%s]: -> Participating players: %s",
+                    self.name,
+                    ", ".join(participating_names),
                 )
 
-            for player_id in (
-                event["responses"]["acceptedIds"] + event["responses"]["waitinglistIds"]
-            ):
+            for player_id in player_ids:
                 if player_id not in player_events:
                     player_events[player_id] = []
                 player_events[player_id].append(event)
@@ -77,7 +124,12 @@ class RuleMaxEventsPerWeek(RuleBase):
                 )
                 if player:
                     logging.info(
-                        f"[{self.name}]: {player['firstName']} {player['lastName']} is signed up for {len(events)} > {self.max_events} events."
+                        "[%s]: %s %s is signed up for %d > %d events.",
+                        self.name,
+                        player["firstName"],
+                        player["lastName"],
+                        len(events),
+                        self.max_events,
                     )
 
         removals: list[RemovalInfo] = []
@@ -100,5 +152,66 @@ class RuleMaxEventsPerWeek(RuleBase):
                     break
         return removals
 
+    def _evaluate_matrix(self, players: set[str] | None) -> list[RemovalInfo]:
+        """Same as the python engine, with sign-ups counted as matrix operations."""
+        import numpy as np
+
+        included = self._included_events()
+        if not included:
+            return []
+        matrix = attendance_matrix(self.events)
+        columns = matrix.column_indexes(included)
+        accepted = matrix.accepted[:, columns]
+        waitlisted = matrix.waitlisted[:, columns]
+
+        counts = accepted.sum(axis=1) + waitlisted.sum(axis=1)
+        if players is not None:
+            counts[~matrix.row_mask(players)] = 0
+        over = np.flatnonzero(counts > self.max_events)
+        if not len(over):
+            return []
+
+        # Handle players in order of their first sign-up in the included events, by
+        # position on the accepted list and then the waiting list
+        first = (accepted[over] | waitlisted[over]).argmax(axis=1)
+        position = np.where(
+            accepted[over, first],
+            matrix.accepted_rank[over, columns[first]],
+            len(matrix.rows) + matrix.waitlist_rank[over, columns[first]],
+        )
+        newest_first = np.argsort(-matrix.starts[columns], kind="stable")
+
+        removals: list[RemovalInfo] = []
+        for index in np.lexsort((position, first)):
+            row = over[index]
+            player_id = matrix.players[row]
+            num_events = int(counts[row])
+            player = memberid_to_member(
+                player_id, included[first[index]]["recipients"]["group"]["members"]
+            )
+            logging.info(
+                "[%s]: %s %s is signed up for %d > %d events.",
+                self.name,
+                player["firstName"],
+                player["lastName"],
+                num_events,
+                self.max_events,
+            )
+            # Remove from waitinglists first, then accepted, until max_events is reached
+            for signed_up in (waitlisted, accepted):
+                for column in newest_first:
+                    if not signed_up[row, column]:
+                        continue
+                    # A player on both lists of an event counts twice
+                    times = int(accepted[row, column]) + int(waitlisted[row, column])
+                    for _ in range(times):
+                        if num_events <= self.max_events:
+                            break
+                        removals.append(
+                            self.schedule_removal(player_id, included[column])
+                        )
+                        num_events -= 1
+        return removals
+
 
 register_rule("MaxEventsPerWeek", RuleMaxEventsPerWeek)
@@ -2,17 +2,26 @@ import logging
 import re
 from datetime import datetime, timedelta
 
-from ..utils import (
-    Event,
-    Events,
-    get_last_event_from_timestamp_and_title,
-    get_last_event_in_series,
-    get_participating_player_names,
-)
+from ..core.clock import Clock
+from ..core.logger import SAMPLED, set_log_context
+from ..index import previous_index
+from ..matrix import attendance_matrix, resolve_engine
+from ..utils import Event, Events, get_participating_player_names
 from .rulebase import RemovalInfo, RuleBase, register_rule
 
 
 class RuleQuarantineAfterEvent(RuleBase):
+    fields = frozenset(
+        {
+            "heading",
+            "seriesId",
+            "startTimestamp",
+            "endTimestamp",
+            "responses",
+            "recipients",
+        }
+    )
+
     def __init__(
         self,
         rule_name: str,
@@ -21,6 +30,8 @@ class RuleQuarantineAfterEvent(RuleBase):
         message: str,
         enforced: bool = False,
         quarantine_hours: int = 24,
+        engine: str = "python",
+        clock: Clock | None = None,
     ) -> None:
         self.name = rule_name
         self.events = events
@@ -28,6 +39,12 @@ class RuleQuarantineAfterEvent(RuleBase):
         self.message = message
         self.enforced = enforced
         self.quarantine_hours = quarantine_hours
+        self.engine = resolve_engine(rule_name, engine)
+        self.clock = clock or Clock()
+
+    @classmethod
+    def lookback(cls, rule_def: dict) -> timedelta:
+        return timedelta(hours=rule_def.get("quarantine_hours", 24))
 
     def _include(self, event: Event) -> bool:
         if not re.search(self.header_regex, event["heading"], re.IGNORECASE):
@@ -35,12 +52,7 @@ class RuleQuarantineAfterEvent(RuleBase):
         return True
 
     def _get_last_similar_event(self, event: Event) -> Event | None:
-        last_event = get_last_event_in_series(event, self.events.previous)
-        if not last_event:
-            last_event = get_last_event_from_timestamp_and_title(
-                event, self.events.previous
-            )
-        return last_event
+        return previous_index(self.events).last_similar_event(event)
 
     def _get_last_event_endtime(self, event: Event) -> datetime | None:
         last_event = self._get_last_similar_event(event)
@@ -55,9 +67,7 @@ class RuleQuarantineAfterEvent(RuleBase):
         if not last_event_end:
             return False
 
-        if datetime.now().astimezone() > last_event_end + timedelta(
-            hours=self.quarantine_hours
-        ):
+        if self.clock.now() > last_event_end + timedelta(hours=self.quarantine_hours):
             return False
         return True
 
@@ -73,36 +83,56 @@ class RuleQuarantineAfterEvent(RuleBase):
         return result
 
     def evaluate(self) -> list[RemovalInfo]:
+        return self._evaluate(None)
+
+    def evaluate_incremental(self, added: dict[str, set[str]]) -> list[RemovalInfo]:
+        # Players already signed up were evaluated when they signed up
+        return self._evaluate(added)
+
+    def _evaluate(self, added: dict[str, set[str]] | None) -> list[RemovalInfo]:
         removals: list[RemovalInfo] = []
 
         for event in self.events.upcoming:
+            if added is not None and event["id"] not in added:
+                continue
             if not self._include(event):
                 continue
 
-            logging.info(f'[{self.name}]: Processing event "{event["heading"]}"')
+            set_log_context(event=event["id"])
+            logging.info(
+                '[%s]: Processing event "%s"',
+                self.name,
+                event["heading"],
+                extra=SAMPLED,
+            )
 
             if not self._isactive(event):
                 continue
 
             logging.info(
-                f'[{self.name}]: "{event["heading"]}" is in quarantine for players that played last time'
+                '[%s]: "%s" is in quarantine for players that played last time',
+                self.name,
+                event["heading"],
             )
 
             player_ids: list[str] = (
                 event["responses"]["acceptedIds"] + event["responses"]["waitinglistIds"]
             )
+            if added is not None:
+                player_ids = [id for id in player_ids if id in added[event["id"]]]
 
             if logging.getLogger().isEnabledFor(logging.DEBUG):
                 participating_names = get_participating_player_names(event)
                 logging.debug(
-                    f"[{self.name}]: Participating players: {', '.join(participating_names)}"
+                    "[%s]: Participating players: %s",
+                    self.name,
+                    ", ".join(participating_names),
                 )
 
-            last_event = get_last_event_in_series(event, self.events.previous)
+            index = previous_index(self.events)
+            last_event = index.last_event_in_series(event)
             if not last_event:
-                last_event = get_last_event_from_timestamp_and_title(
-                    event, self.events.previous
-                )
+                last_event = index.last_event_from_timestamp_and_title(event)
                 if last_event:
                     logging.warning(
                         f"[{self.name}]: Found last similar event by timestamp and title: {last_event['heading']} at {last_event['startTimestamp']}"
@@ -113,16 +143,46 @@ class RuleQuarantineAfterEvent(RuleBase):
                 )
                 continue
             logging.debug(
-                f"[{self.name}]: Last event in series was {datetime.fromisoformat(last_event['startTimestamp']).astimezone()}"
+                "[%s]: Last event in series was %s",
+                self.name,
+                last_event["startTimestamp"],
             )
 
-            previous_player_ids = last_event["responses"]["acceptedIds"]
+            if self.engine == "matrix":
+                quarantined = self._quarantined_matrix(event, last_event, added)
+            else:
+                previous_player_ids = last_event["responses"]["acceptedIds"]
+                quarantined = [id for id in player_ids if id in previous_player_ids]
 
-            for id in player_ids:
-                if id in previous_player_ids:
-                    removalinfo = self.schedule_removal(id, event)
-                    removals.append(removalinfo)
+            for id in quarantined:
+                removalinfo = self.schedule_removal(id, event)
+                removals.append(removalinfo)
         return removals
 
+    def _quarantined_matrix(
+        self, event: Event, last_event: Event, added: dict[str, set[str]] | None
+    ) -> list[str]:
+        """Players of the event that played the last event, as matrix operations.
+
+        Ordered as on the accepted list and then the waiting list of the event.
+        """
+        import numpy as np
+
+        matrix = attendance_matrix(self.events)
+        column = matrix.columns[event["id"]]
+        played = matrix.accepted[:, matrix.columns[last_event["id"]]]
+        if added is not None:
+            played = played & matrix.row_mask(added[event["id"]])
+
+        quarantined: list[str] = []
+        for signed_up, rank in (
+            (matrix.accepted, matrix.accepted_rank),
+            (matrix.waitlisted, matrix.waitlist_rank),
+        ):
+            rows = np.flatnonzero(signed_up[:, column] & played)
+            rows = rows[np.argsort(rank[rows, column], kind="stable")]
+            quarantined.extend(matrix.players[row] for row in rows)
+        return quarantined
+
 
 register_rule("QuarantineAfterEvent", RuleQuarantineAfterEvent)
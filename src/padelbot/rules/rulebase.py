@@ -1,8 +1,12 @@
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
+from importlib import import_module
 
+from ..core.clock import Clock
+from ..core.logger import log_context
+from ..projection import template_fields
 from ..utils import Events, memberid_to_member
 
 
@@ -12,15 +16,21 @@ class RemovalInfo:
     event_id: str
     message: str
     enforced: bool = False
+    # Name of the rule that scheduled the removal
+    rule: str = ""
 
 
 class RuleBase(ABC):
     name: str = ""
     message: str = ""
     enforced: bool = False
+    events: Events
+    clock: Clock
+    # Event fields read by the rule, in addition to those in the message template
+    fields: frozenset[str] = frozenset()
 
     @abstractmethod
-    def __init__(self, rule_name: str, events: Events, *args) -> None:
+    def __init__(self, rule_name: str, events: Events, *args, **kwargs) -> None:
         pass
 
     @abstractmethod
@@ -31,12 +41,42 @@ class RuleBase(ABC):
     def expirationtimes(self) -> list[datetime]:
         pass
 
+    @classmethod
+    def required_fields(cls, rule_def: dict) -> frozenset[str]:
+        """Event and member fields the rule reads, including its message template."""
+        return cls.fields | template_fields(rule_def.get("message", ""))
+
+    @classmethod
+    def lookback(cls, rule_def: dict) -> timedelta:
+        """How long ago events may have ended and still affect this rule."""
+        return timedelta(0)
+
+    def evaluate_incremental(
+        self, added: dict[str, set[str]]
+    ) -> list[RemovalInfo] | None:
+        """Evaluate only the sign-ups added since the previous evaluation.
+
+        `added` maps event ids to the players newly on the accepted or waiting list.
+        It is only passed when nothing else the rule depends on has changed. Rules
+        that cannot evaluate incrementally return None, and evaluate() is used.
+        """
+        return None
+
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        """Return the earliest expiration time after `now`, if any."""
+        return min((dt for dt in self.expirationtimes() if dt > now), default=None)
+
     def schedule_removal(self, id, event) -> RemovalInfo:
         player = memberid_to_member(id, event["recipients"]["group"]["members"])
 
-        logging.info(
-            f'[{self.name}]: Scheduling {player["firstName"]} {player["lastName"]} for removal from "{event["heading"]}"'
-        )
+        with log_context(player=id):
+            logging.info(
+                '[%s]: Scheduling %s %s for removal from "%s"',
+                self.name,
+                player["firstName"],
+                player["lastName"],
+                event["heading"],
+            )
         # Merge self.event and player, ignoring duplicate keys (player takes precedence)
         merged = {
             **event,
@@ -47,21 +87,59 @@ class RuleBase(ABC):
             event_id=event["id"],
             message=self.message.format(**merged),
             enforced=self.enforced,
+            rule=self.name,
         )
         return removalinfo
 
 
 RULE_REGISTRY: dict[str, type[RuleBase]] = {}
+# Modules of the built-in rules, imported when a rule of their type is configured
+RULE_MODULES = {
+    "MaxEventsPerWeek": "max_events_per_week",
+    "QuarantineAfterEvent": "quarantine_after_event",
+}
 
 
 def register_rule(rule_type: str, rule_class: type[RuleBase]) -> None:
     RULE_REGISTRY[rule_type] = rule_class
 
 
-def create_rule(rule_name: str, events: Events, rule_def) -> RuleBase:
-    rule_cls = RULE_REGISTRY.get(rule_def["type"])
+def get_rule_class(rule_type: str) -> type[RuleBase] | None:
+    """Return the class registered for `rule_type`, importing its module on first use."""
+    if rule_type not in RULE_REGISTRY and rule_type in RULE_MODULES:
+        import_module(f"{__package__}.{RULE_MODULES[rule_type]}")
+    return RULE_REGISTRY.get(rule_type)
+
+
+def get_lookback(rule_defs: dict) -> timedelta:
+    """Return the longest lookback of the configured rules."""
+    return max(
+        (
+            rule_cls.lookback(rule_def)
+            for rule_def in rule_defs.values()
+            if (rule_cls := get_rule_class(rule_def.get("type", "")))
+        ),
+        default=timedelta(0),
+    )
+
+
+def get_required_fields(rule_defs: dict) -> frozenset[str]:
+    """Return the fields read by any of the configured rules."""
+    return frozenset().union(
+        *(
+            rule_cls.required_fields(rule_def)
+            for rule_def in rule_defs.values()
+            if (rule_cls := get_rule_class(rule_def.get("type", "")))
+        )
+    )
+
+
+def create_rule(
+    rule_name: str, events: Events, rule_def, clock: Clock | None = None
+) -> RuleBase:
+    rule_cls = get_rule_class(rule_def["type"])
     if not rule_cls:
         raise ValueError(f'Unknown rule type "{rule_def["type"]}" for {rule_name}')
     # Pass event and any additional rule_def parameters except 'type'
     rule_params = {k: v for k, v in rule_def.items() if k not in ("type",)}
-    return rule_cls(rule_name, events, **rule_params)
+    return rule_cls(rule_name, events, clock=clock, **rule_params)
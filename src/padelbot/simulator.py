@@ -0,0 +1,226 @@
+import copy
+import logging
+import tomllib
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from .actions.actionbase import ActionIntent
+from .core.clock import VirtualClock
+from .naco.registrar import NacoRegistrar
+from .naco.tournament import NacoTournamentCreator
+from .padelbot import PLACEHOLDER_PROFILE_ID, PadelBot
+from .snapshots import RecordedSpond
+from .timeline import to_epoch
+from .utils import Event, memberid_to_member
+
+
+@dataclass
+class SimulatedRemoval:
+    time: datetime
+    event_id: str
+    heading: str
+    player_id: str
+    player_name: str
+    message: str
+    enforced: bool
+
+
+@dataclass
+class SimulatedIntent:
+    time: datetime
+    intent: ActionIntent
+
+
+@dataclass
+class SimulationReport:
+    removals: list[SimulatedRemoval] = field(default_factory=list)
+    intents: list[SimulatedIntent] = field(default_factory=list)
+    wakeups: list[datetime] = field(default_factory=list)
+    cycles: int = 0
+    skipped_cycles: int = 0
+
+
+class SimulationClock(VirtualClock):
+    """Virtual clock that records when the bot schedules a wakeup for a deadline.
+
+    Sleeps shorter than `poll_seconds` are scheduled for a rule or action deadline
+    and are recorded in `wakeups`. Sleeping never passes the next recording, since
+    the bot has to see every recorded change.
+    """
+
+    def __init__(
+        self, start: datetime, recording_times: list[datetime], poll_seconds: float
+    ) -> None:
+        super().__init__(start)
+        self.recording_epochs = [to_epoch(time) for time in recording_times]
+        self.recording_times = recording_times
+        self.poll_seconds = poll_seconds
+        self.wakeups: list[datetime] = []
+
+    async def sleep(self, seconds: float) -> None:
+        now = self.now()
+        wakeup = now + timedelta(seconds=max(seconds, 1))
+        if seconds < self.poll_seconds:
+            self.wakeups.append(wakeup)
+        index = bisect_right(self.recording_epochs, to_epoch(now))
+        if index < len(self.recording_times):
+            wakeup = min(wakeup, self.recording_times[index])
+        self.set(wakeup)
+
+
+class SimulatedNacoRegistrar(NacoRegistrar):
+    """Registrar that never talks to Naco."""
+
+    def __init__(self) -> None:
+        super().__init__(base_url="", api_key="")
+
+    async def register_event_users(self, events: list[Event], get_person: Any) -> None:
+        pass
+
+
+class SimulatedNacoTournamentCreator(NacoTournamentCreator):
+    """Tournament creator that never talks to Naco, every tournament is created."""
+
+    def __init__(self) -> None:
+        super().__init__(base_url="", api_key="")
+
+    async def create_tournament(self, event_id: str, *args: Any, **kwargs: Any) -> bool:
+        self.cache_created_event_ids.add(event_id)
+        return True
+
+
+class SimulatedPadelBot(PadelBot):
+    """PadelBot that records removals and intents instead of acting on them."""
+
+    def __init__(self, cfg: dict, clock: SimulationClock, spond_client: RecordedSpond):
+        cfg = {
+            **cfg,
+            "general": {
+                **cfg["general"],
+                "history_file": ":memory:",
+                "audit_file": ":memory:",
+            },
+            # Actions are evaluated without talking to Naco, see create_naco_clients
+            # and execute_action
+            "naco": {**cfg.get("naco", {}), "enabled": True, "outbox_file": None},
+        }
+        super().__init__(cfg, clock=clock, spond_client=spond_client)
+        self.report = SimulationReport()
+        self.reported: set[tuple[str, str, bool]] = set()
+
+    async def resolve_spond_profile_id(self) -> None:
+        await super().resolve_spond_profile_id()
+        if not self.spond_profile_id:
+            self.spond_profile_id = PLACEHOLDER_PROFILE_ID
+
+    def create_naco_clients(
+        self,
+    ) -> tuple[SimulatedNacoRegistrar, SimulatedNacoTournamentCreator]:
+        return SimulatedNacoRegistrar(), SimulatedNacoTournamentCreator()
+
+    async def execute_action(self, intent: ActionIntent) -> bool:
+        self.report.intents.append(SimulatedIntent(self.clock.now(), intent))
+        return True
+
+    async def remove_player_from_event(
+        self,
+        player_id: str,
+        event_id: str,
+        message: str,
+        events: list[Event],
+        enforce: bool = False,
+    ) -> bool:
+        # Removals that are not enforced are found again every cycle
+        if (event_id, player_id, enforce) not in self.reported:
+            self.reported.add((event_id, player_id, enforce))
+            event = next((e for e in events if e["id"] == event_id), None)
+            player_name = player_id
+            if event is not None:
+                try:
+                    player = memberid_to_member(
+                        player_id, event["recipients"]["group"]["members"]
+                    )
+                    player_name = f"{player['firstName']} {player['lastName']}"
+                except (KeyError, ValueError):
+                    pass
+            self.report.removals.append(
+                SimulatedRemoval(
+                    time=self.clock.now(),
+                    event_id=event_id,
+                    heading=event.get("heading", "") if event else "",
+                    player_id=player_id,
+                    player_name=player_name,
+                    message=message,
+                    enforced=enforce,
+                )
+            )
+        return await super().remove_player_from_event(
+            player_id, event_id, message, events, enforce
+        )
+
+
+def apply_overrides(cfg: dict, overrides: list[str]) -> dict:
+    """Return a copy of `cfg` with `section.key=value` overrides applied.
+
+    Values are parsed as TOML, so `rules.max.max_events=3` sets an integer and
+    `rules.max.header_regex=".*Mix.*"` a string. Unparsable values are strings.
+    """
+    cfg = copy.deepcopy(cfg)
+    for override in overrides:
+        path, _, raw_value = override.partition("=")
+        if not path or not _:
+            raise ValueError(f'Invalid override "{override}", expected key=value')
+        try:
+            value: Any = tomllib.loads(f"value = {raw_value}")["value"]
+        except tomllib.TOMLDecodeError:
+            value = raw_value
+        *sections, key = path.split(".")
+        target = cfg
+        for section in sections:
+            target = target.setdefault(section, {})
+        target[key] = value
+    return cfg
+
+
+async def simulate(
+    cfg: dict,
+    spond_client: RecordedSpond,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> SimulationReport:
+    """Replay recorded Spond responses through the configured rules and actions.
+
+    The bot runs on a virtual clock from `start` to `end`, defaulting to the first
+    and last recording. It starts as if it had already been running, so the first
+    cycle enforces removals and evaluates actions. Since recorded responses only
+    change at recording times, the bot only polls when a new recording is due and
+    otherwise sleeps until its next rule or action deadline.
+    """
+    recording_times = spond_client.recording_times()
+    if not recording_times:
+        raise ValueError("The recording contains no events")
+    start = start or recording_times[0]
+    end = end or recording_times[-1]
+
+    # Polling between recordings would only see the same responses again
+    poll_seconds = max((end - start).total_seconds(), 60.0)
+    clock = SimulationClock(start, recording_times, poll_seconds)
+    spond_client.clock = clock
+    cfg = {**cfg, "general": {**cfg["general"], "seconds_to_sleep": poll_seconds}}
+    bot = SimulatedPadelBot(cfg, clock, spond_client)
+    bot.first_run = False
+
+    # now() returns the time of the last cycle, tick() the time after sleeping
+    while clock.tick() <= end:
+        await bot.run()
+        bot.report.cycles += 1
+
+    bot.report.wakeups = [wakeup for wakeup in clock.wakeups if wakeup <= end]
+    bot.report.skipped_cycles = bot.skipped_cycles
+    logging.info(
+        f"Simulated {bot.report.cycles} cycles from {start} to {end}: "
+        f"{len(bot.report.removals)} removals and {len(bot.report.intents)} intents"
+    )
+    return bot.report
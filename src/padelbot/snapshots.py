@@ -0,0 +1,199 @@
+import gzip
+import json
+import os
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from .core.clock import Clock
+from .timeline import Timeline, to_epoch
+from .utils import Event
+
+
+@dataclass
+class Snapshot:
+    """One recorded Spond API response."""
+
+    time: datetime
+    call: str
+    args: dict[str, Any]
+    response: Any
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class SnapshotWriter:
+    """Append Spond API responses to a gzip compressed JSON-lines file.
+
+    Each record holds the time of the call, the call name, its arguments and the
+    full response. Every open appends a new gzip member, which gzip readers
+    decompress as one stream, so recordings can be resumed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+        self.file = gzip.open(path, "at", encoding="utf-8")
+
+    def write(
+        self, time: datetime, call: str, args: dict[str, Any], response: Any
+    ) -> None:
+        record = {"time": time, "call": call, "args": args, "response": response}
+        self.file.write(json.dumps(record, default=_encode) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_snapshots(path: str) -> Iterator[Snapshot]:
+    """Iterate over the records of a snapshot file in recording order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield Snapshot(
+                time=datetime.fromisoformat(record["time"]),
+                call=record["call"],
+                args=record["args"],
+                response=record["response"],
+            )
+
+
+@dataclass
+class _Responses:
+    times: list[datetime] = field(default_factory=list)
+    epochs: list[int] = field(default_factory=list)
+    responses: list[Any] = field(default_factory=list)
+
+    def add(self, time: datetime, response: Any) -> None:
+        self.times.append(time)
+        self.epochs.append(to_epoch(time))
+        self.responses.append(response)
+
+    def index_at(self, time: datetime) -> int:
+        """Index of the latest response recorded at or before `time`, else 0."""
+        return max(bisect_right(self.epochs, to_epoch(time)) - 1, 0)
+
+    def at(self, time: datetime) -> Any:
+        return self.responses[self.index_at(time)]
+
+
+class RecordedSpond:
+    """Spond client that replays recorded responses instead of calling Spond.
+
+    Calls return the latest response recorded at or before the current time of
+    `clock`, so a bot running on a virtual clock sees Spond as it was at that time.
+    Time filters of get_events are applied to the recorded events with a timeline
+    per recording. Changes to responses and messages are collected in `changes` and
+    `messages`, and players removed with change_response stay removed from later
+    get_events responses.
+    """
+
+    def __init__(self, snapshots: list[Snapshot], clock: Clock) -> None:
+        self.clock = clock
+        self.recorded: dict[tuple[str, str], _Responses] = {}
+        for snapshot in sorted(snapshots, key=lambda s: s.time):
+            key = (snapshot.call, snapshot.args.get("uid", ""))
+            self.recorded.setdefault(key, _Responses()).add(
+                snapshot.time, snapshot.response
+            )
+        self.timelines: dict[int, Timeline] = {}
+        self.changes: list[tuple[str, str, dict]] = []
+        self.messages: list[dict[str, Any]] = []
+        # Players removed by change_response, by event id
+        self.removed: dict[str, set[str]] = {}
+
+    @classmethod
+    def from_file(cls, path: str, clock: Clock) -> "RecordedSpond":
+        return cls(list(load_snapshots(path)), clock)
+
+    def _response(self, call: str, uid: str = "") -> Any:
+        responses = self.recorded.get((call, uid))
+        if responses is None:
+            raise KeyError(f'No recorded response for {call}("{uid}")')
+        return responses.at(self.clock.now())
+
+    def recording_times(self) -> list[datetime]:
+        """Times at which events were recorded, in order."""
+        return list(self.recorded.get(("get_events", ""), _Responses()).times)
+
+    def _timeline(self, index: int) -> Timeline:
+        if (timeline := self.timelines.get(index)) is None:
+            events = self.recorded[("get_events", "")].responses[index]
+            timeline = self.timelines[index] = Timeline(events)
+        return timeline
+
+    def _apply_changes(self, event: Event) -> Event:
+        removed = self.removed.get(event["id"])
+        if not removed:
+            return event
+        responses = event["responses"]
+        return {
+            **event,
+            "responses": {
+                **responses,
+                **{
+                    key: [id for id in responses[key] if id not in removed]
+                    for key in ("acceptedIds", "waitinglistIds")
+                    if key in responses
+                },
+            },
+        }
+
+    async def get_events(
+        self,
+        group_id: str | None = None,
+        min_end: datetime | None = None,
+        max_end: datetime | None = None,
+        min_start: datetime | None = None,
+        max_start: datetime | None = None,
+        **kwargs,
+    ) -> list[Event]:
+        if ("get_events", "") not in self.recorded:
+            raise KeyError("No recorded response for get_events")
+        timeline = self._timeline(
+            self.recorded[("get_events", "")].index_at(self.clock.now())
+        )
+        lo = bisect_left(timeline.ends, to_epoch(min_end)) if min_end else 0
+        hi = bisect_right(timeline.ends, to_epoch(max_end)) if max_end else None
+        lower_start = to_epoch(min_start) if min_start else None
+        upper_start = to_epoch(max_start) if max_start else None
+        return [
+            self._apply_changes(event)
+            for event in timeline.by_end[lo:hi]
+            if (lower_start is None or to_epoch(event["startTimestamp"]) >= lower_start)
+            and (
+                upper_start is None or to_epoch(event["startTimestamp"]) <= upper_start
+            )
+        ]
+
+    async def get_group(self, uid: str) -> dict[str, Any]:
+        return self._response("get_group", uid)
+
+    async def get_person(self, user: str) -> dict[str, Any]:
+        return self._response("get_person", user)
+
+    async def get_profile(self) -> dict[str, Any]:
+        return self._response("get_profile")
+
+    async def change_response(self, uid: str, user: str, payload: dict) -> dict:
+        self.changes.append((uid, user, payload))
+        if str(payload.get("accepted")).lower() == "false":
+            self.removed.setdefault(uid, set()).add(user)
+        return {}
+
+    async def send_message(self, text: str, **kwargs) -> dict:
+        self.messages.append({"text": text, **kwargs})
+        return {}
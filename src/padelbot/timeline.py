@@ -0,0 +1,130 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+
+from .utils import Event, Events
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_epoch(timestamp: datetime | str) -> int:
+    """Convert a timestamp to integer microseconds since the epoch."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch(epoch: int) -> datetime:
+    """Convert integer microseconds since the epoch to a local timestamp."""
+    return (EPOCH + timedelta(microseconds=epoch)).astimezone()
+
+
+def end_epoch(event: Event) -> int:
+    """End time of the event in epoch microseconds.
+
+    Events without an end time are treated as ending when they start.
+    """
+    if event.get("endTimestamp"):
+        return to_epoch(event["endTimestamp"])
+    return to_epoch(event["startTimestamp"])
+
+
+class Timeline:
+    """Events indexed by start and end time.
+
+    Start and end times are kept in sorted arrays of epoch integers, so time window
+    queries are bisect range lookups instead of timestamp comparisons per event.
+    Events with equal start times keep their original relative order. A timeline is
+    never modified after it has been built.
+    """
+
+    def __init__(self, events: list[Event]) -> None:
+        by_start = sorted(
+            ((to_epoch(event["startTimestamp"]), event) for event in events),
+            key=lambda item: item[0],
+        )
+        by_end = sorted(
+            ((end_epoch(event), event) for _, event in by_start),
+            key=lambda item: item[0],
+        )
+        self._set(by_start, by_end)
+
+    def _set(
+        self, by_start: list[tuple[int, Event]], by_end: list[tuple[int, Event]]
+    ) -> None:
+        self.starts: list[int] = [start for start, _ in by_start]
+        self.by_start: list[Event] = [event for _, event in by_start]
+        self.ends: list[int] = [end for end, _ in by_end]
+        self.by_end: list[Event] = [event for _, event in by_end]
+
+    @classmethod
+    def _from_sorted(
+        cls, by_start: list[tuple[int, Event]], by_end: list[tuple[int, Event]]
+    ) -> "Timeline":
+        timeline = cls.__new__(cls)
+        timeline._set(by_start, by_end)
+        return timeline
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def split(self, now: datetime) -> Events:
+        """Classify events as upcoming, ongoing or previous relative to `now`.
+
+        The returned snapshot carries the timeline of its upcoming events.
+        """
+        now_epoch = to_epoch(now)
+        first_upcoming = bisect_right(self.starts, now_epoch)
+        first_not_ended = bisect_left(self.ends, now_epoch)
+
+        upcoming = list(
+            zip(self.starts[first_upcoming:], self.by_start[first_upcoming:])
+        )
+        upcoming_ids = {id(event) for _, event in upcoming}
+        ended = self.by_end[:first_not_ended]
+        not_ended = zip(self.ends[first_not_ended:], self.by_end[first_not_ended:])
+
+        retval = Events(
+            previous=[event for event in ended if id(event) not in upcoming_ids],
+            upcoming=[event for _, event in upcoming],
+        )
+        upcoming_by_end: list[tuple[int, Event]] = []
+        for end, event in not_ended:
+            if id(event) in upcoming_ids:
+                upcoming_by_end.append((end, event))
+            else:
+                retval.ongoing.append(event)
+        retval.timeline = Timeline._from_sorted(upcoming, upcoming_by_end)
+        return retval
+
+    def starting_between(self, earliest: datetime, latest: datetime) -> list[Event]:
+        """Events starting in the closed interval [earliest, latest], in start order."""
+        lo = bisect_left(self.starts, to_epoch(earliest))
+        hi = bisect_right(self.starts, to_epoch(latest))
+        return self.by_start[lo:hi]
+
+    def starting_after(self, time: datetime) -> Iterator[Event]:
+        """Iterate over events starting strictly after `time`, in start order."""
+        for index in range(bisect_right(self.starts, to_epoch(time)), len(self)):
+            yield self.by_start[index]
+
+    def replace_event(self, event: Event) -> "Timeline":
+        """Return a copy where the event with the same id is replaced by `event`.
+
+        The event must keep its start and end time, so the sorted arrays are shared.
+        """
+        timeline = Timeline.__new__(Timeline)
+        timeline.starts = self.starts
+        timeline.ends = self.ends
+        timeline.by_start = [
+            event if e["id"] == event["id"] else e for e in self.by_start
+        ]
+        timeline.by_end = [event if e["id"] == event["id"] else e for e in self.by_end]
+        return timeline
+
+
+def upcoming_timeline(events: Events) -> Timeline:
+    """Return the timeline of the upcoming events, building it on first use."""
+    if events.timeline is None:
+        events.timeline = Timeline(events.upcoming)
+    return events.timeline
@@ -1,18 +1,136 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .index import PreviousEventIndex
+    from .matrix import AttendanceMatrix
+    from .timeline import Timeline
 
 Event = dict[str, Any]
 
 
 @dataclass
 class Events:
+    """Snapshot of the events fetched in one cycle.
+
+    A published snapshot is never mutated. Changes are applied by building a new
+    snapshot that shares all unchanged events with the old one.
+    """
+
     previous: list[Event] = field(default_factory=list)
     ongoing: list[Event] = field(default_factory=list)
     upcoming: list[Event] = field(default_factory=list)
+    version: int = 0
+    # Index of the upcoming events, see timeline.upcoming_timeline()
+    timeline: "Timeline | None" = field(default=None, repr=False, compare=False)
+    # Index of the previous events, see index.previous_index()
+    previous_index: "PreviousEventIndex | None" = field(
+        default=None, repr=False, compare=False
+    )
+    # Responses as players × events matrices, see matrix.attendance_matrix()
+    matrix: "AttendanceMatrix | None" = field(default=None, repr=False, compare=False)
+
+
+# Event fields that the fingerprints and sign-ups cover by default, the bot
+# passes the fields declared by the configured rules and actions
+FINGERPRINT_FIELDS = frozenset(
+    {"id", "heading", "startTimestamp", "endTimestamp", "responses"}
+)
+SIGNUP_FIELDS = frozenset({"heading", "startTimestamp", "endTimestamp"})
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable copy of a JSON value."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _field_values(event: Event, fields: list[str], frozen: dict[int, Any]) -> tuple:
+    values = []
+    for name in fields:
+        value = event.get(name)
+        if isinstance(value, (dict, list)):
+            # Events share the roster, so it is frozen once
+            if id(value) not in frozen:
+                frozen[id(value)] = _freeze(value)
+            value = frozen[id(value)]
+        values.append(value)
+    return tuple(values)
+
+
+def _fingerprint(events: list[Event], fields: list[str], frozen: dict[int, Any]) -> int:
+    return hash(tuple(_field_values(event, fields, frozen) for event in events))
+
+
+def events_fingerprint(
+    events: Events, fields: frozenset[str] = FINGERPRINT_FIELDS
+) -> tuple[int, int, int]:
+    """Return cheap fingerprints of the previous, ongoing and upcoming events.
+
+    Each covers the ids and the given `fields` of the events.
+    """
+    names = sorted(fields | {"id"})
+    frozen: dict[int, Any] = {}
+    return (
+        _fingerprint(events.previous, names, frozen),
+        _fingerprint(events.ongoing, names, frozen),
+        _fingerprint(events.upcoming, names, frozen),
+    )
+
+
+def get_signups(
+    events: Events, fields: frozenset[str] = SIGNUP_FIELDS
+) -> dict[str, tuple[tuple, frozenset[str], frozenset[str]]]:
+    """Map each upcoming event id to the values of its `fields` other than the
+    responses, and its accepted and waiting-list players."""
+    names = sorted(fields - {"id", "responses"})
+    frozen: dict[int, Any] = {}
+    return {
+        event["id"]: (
+            _field_values(event, names, frozen),
+            frozenset(event["responses"]["acceptedIds"]),
+            frozenset(event["responses"]["waitinglistIds"]),
+        )
+        for event in events.upcoming
+    }
+
+
+def get_added_signups(
+    previous: dict[str, tuple[tuple, frozenset[str], frozenset[str]]],
+    current: dict[str, tuple[tuple, frozenset[str], frozenset[str]]],
+) -> dict[str, set[str]]:
+    """Return the players added to each event between two results of get_signups().
+
+    Players new to the accepted or the waiting list count as added, including those
+    moved from the waiting list to accepted. All players of new events, and of events
+    whose other fields changed, count as added.
+    """
+    added: dict[str, set[str]] = {}
+    for event_id, (identity, accepted, waiting) in current.items():
+        previous_identity, previous_accepted, previous_waiting = previous.get(
+            event_id, (None, frozenset(), frozenset())
+        )
+        if identity != previous_identity:
+            new_player_ids = set(accepted | waiting)
+        else:
+            new_player_ids = set(
+                (accepted - previous_accepted) | (waiting - previous_waiting)
+            )
+        if new_player_ids:
+            added[event_id] = new_player_ids
+    return added
 
 
 def memberid_to_member(member_id: str, members: list[dict[str, Any]]) -> dict[str, Any]:
+    # The shared roster is indexed by member id
+    if (by_id := getattr(members, "by_id", None)) is not None:
+        if member_id in by_id:
+            return by_id[member_id]
+        raise ValueError(f"Member ID {member_id} not found in members list")
     for member in members:
         if member["id"] == member_id:
             return member
@@ -1,28 +1,175 @@
+# First, so that the startup time includes the other imports
+from padelbot.core.startup import get_version, since_start
+
 import asyncio
 import logging
-import tomllib
 from contextlib import asynccontextmanager
+from datetime import datetime, time, timedelta
 
 from starlette.applications import Starlette
-from starlette.responses import HTMLResponse, PlainTextResponse
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from starlette.routing import Route
 
-from padelbot.core.config import readconfig
-from padelbot.core.logger import LOG_FILE, start_logger
+from padelbot.core.config import ConfigWatcher, readconfig
+from padelbot.core.logarchive import LogQuery, search_logs
+from padelbot.core.logger import (
+    LOG_FILE,
+    configure_logging,
+    logging_stats,
+    start_logger,
+)
+from padelbot.core.loopmonitor import LOOP_MONITOR, start_loop_monitor
+from padelbot.core.memory import MEMORY
+from padelbot.core.profiler import PROFILER
+
+
+def read_file(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
 
 
 async def get_logs(request):
     try:
-        with open(LOG_FILE, "r") as f:
-            return PlainTextResponse(f.read())
+        # In a thread, so that a large file never blocks the bot's event loop
+        return PlainTextResponse(await asyncio.to_thread(read_file, LOG_FILE))
     except Exception as e:
         return PlainTextResponse(f"Error: {e}", status_code=500)
 
 
+async def get_log_stats(request):
+    """Return the state of the log queue and the number of dropped log records."""
+    return JSONResponse(logging_stats())
+
+
+async def get_log_search(request):
+    """Return logged records of the current log file and its compressed archives.
+
+    Query parameters, all optional: player and event ids, the lowest level, since
+    and until as ISO 8601 times, text to find in the record, and the limit of the
+    number of records, the last of which are returned.
+    """
+    params = request.query_params
+    try:
+        level = params.get("level", "NOTSET").upper()
+        if not isinstance(levelno := logging.getLevelName(level), int):
+            raise ValueError(f"Unknown level {level}")
+        query = LogQuery(
+            player=params.get("player"),
+            event=params.get("event"),
+            level=levelno,
+            since=parse_time(params.get("since")),
+            until=parse_time(params.get("until")),
+            text=params.get("text"),
+        )
+        limit = parse_limit(params.get("limit"))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    records = await asyncio.to_thread(search_logs, query, LOG_FILE, limit)
+    return JSONResponse({"records": records})
+
+
+def parse_time(value: str | None) -> float | None:
+    return None if value is None else datetime.fromisoformat(value).timestamp()
+
+
+def parse_limit(value: str | None, default: int = 100, maximum: int = 1000) -> int:
+    limit = default if value is None else int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+async def get_audit(request):
+    """Return the latest removals and action intents recorded by the bot.
+
+    They are filtered by the player, event, rule (or action) and date in the path,
+    see the /audit routes, and by the same query parameters: player, event, rule,
+    kind ("removal" or "tournament"), since and until as ISO 8601 times, and limit.
+    """
+    padelbot = getattr(request.app.state, "padelbot", None)
+    if padelbot is None:
+        return JSONResponse({"error": "PadelBot is not initialized."}, status_code=500)
+    params = {**request.query_params, **request.path_params}
+    try:
+        since = until = None
+        if date := params.get("date"):
+            # The whole local day, which is not 24 hours long when DST changes
+            day = datetime.fromisoformat(date).date()
+            since = datetime.combine(day, time()).astimezone()
+            until = datetime.combine(day + timedelta(days=1), time()).astimezone()
+        else:
+            # Times without an offset are local
+            if value := params.get("since"):
+                since = datetime.fromisoformat(value).astimezone()
+            if value := params.get("until"):
+                until = datetime.fromisoformat(value).astimezone()
+        decisions = padelbot.audit.query(
+            player_id=params.get("player"),
+            event_id=params.get("event"),
+            source=params.get("rule"),
+            kind=params.get("kind"),
+            since=since,
+            until=until,
+            limit=parse_limit(params.get("limit")),
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"decisions": decisions})
+
+
+async def profile(request):
+    """Arm the profiler with POST, for the number of cycles in the `cycles` query
+    parameter (default 1), and return its state and the report of the last
+    profile with GET."""
+    if request.method == "POST":
+        try:
+            PROFILER.arm(int(request.query_params.get("cycles", 1)))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(PROFILER.status())
+
+
+async def memory(request):
+    """Start tracing memory with POST, keeping the number of stack frames in the
+    `frames` query parameter (default 1), and stop with DELETE. GET returns the
+    reports taken after each cycle while tracing, oldest first."""
+    if request.method == "POST":
+        try:
+            MEMORY.start(int(request.query_params.get("frames", 1)))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+    elif request.method == "DELETE":
+        MEMORY.stop()
+    return JSONResponse(MEMORY.status())
+
+
+async def metrics(request):
+    """Return event loop lag and dropped log records in the Prometheus text format."""
+    stats = logging_stats()
+    lines = [
+        "# HELP padelbot_log_dropped_total Log records dropped from the full queue.",
+        "# TYPE padelbot_log_dropped_total counter",
+        *(
+            f'padelbot_log_dropped_total{{level="{level}"}} {count}'
+            for level, count in sorted(stats["dropped"].items())
+        ),
+        "# HELP padelbot_log_queued Log records waiting to be written.",
+        "# TYPE padelbot_log_queued gauge",
+        f"padelbot_log_queued {stats['queued']}",
+    ]
+    return PlainTextResponse(
+        LOOP_MONITOR.metrics() + "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+async def get_loop(request):
+    """Return event loop lag, and the stacks that blocked the loop most recently."""
+    return JSONResponse(LOOP_MONITOR.status())
+
+
 async def get_events(request):
     """Return upcoming events with participant information."""
-    from starlette.responses import JSONResponse
-
     padelbot = (
         request.app.state.padelbot if hasattr(request.app.state, "padelbot") else None
     )
@@ -30,7 +177,8 @@ async def get_events(request):
         return JSONResponse({"error": "PadelBot is not initialized."}, status_code=500)
 
     try:
-        # Use cached events from padelbot instead of fetching again
+        # Use the published snapshot from padelbot instead of fetching again. The
+        # snapshot is never mutated, so no locking or copying is needed.
         events = padelbot.events
         events_data = []
 
@@ -39,11 +187,19 @@ async def get_events(request):
             events.upcoming, key=lambda e: e.get("startTimestamp", "")
         )
 
-        for event in sorted_events:
-            members = event.get("recipients", {}).get("group", {}).get("members", [])
-            member_map = {m["id"]: f"{m['firstName']} {m['lastName']}" for m in members}
+        # Names come from the roster each event was published with. Events of a
+        # snapshot share one roster, so its names are looked up once per member.
+        member_maps: dict[int, dict[str, str]] = {}
 
+        for event in sorted_events:
             responses = event.get("responses", {})
+            members = event.get("recipients", {}).get("group", {}).get("members", [])
+            member_map = member_maps.get(id(members))
+            if member_map is None:
+                member_map = {
+                    m["id"]: f"{m['firstName']} {m['lastName']}" for m in members
+                }
+                member_maps[id(members)] = member_map
 
             events_data.append(
                 {
@@ -73,7 +229,7 @@ async def get_events(request):
                 }
             )
 
-        return JSONResponse({"events": events_data})
+        return JSONResponse({"version": events.version, "events": events_data})
     except Exception as e:
         logging.error(f"Error fetching events: {e}")
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -85,9 +241,7 @@ async def log_viewer(request):
     template_path = os.path.join(
         os.path.dirname(__file__), "templates", "log_viewer.html"
     )
-    with open(template_path, "r") as f:
-        html = f.read()
-    return HTMLResponse(content=html)
+    return HTMLResponse(content=await asyncio.to_thread(read_file, template_path))
 
 
 async def show_logs(request):
@@ -105,18 +259,19 @@ async def show_logs(request):
 @asynccontextmanager
 async def lifespan(app):
     await start_logger()
-    with open("pyproject.toml", "rb") as f:
-        data = tomllib.load(f)
-    version = data["project"]["version"]
-    logging.info(f"Starting padelbot v{version}")
-    cfg = readconfig()
+    await start_loop_monitor()
+    logging.info(f"Starting padelbot v{get_version()}")
+    # Watch from before reading, so that no change to the file is missed
+    config_watcher = ConfigWatcher()
+    cfg = readconfig(config_watcher.path)
     if cfg is None:
         logging.error("Missing configuration")
     else:
-        logging.getLogger().setLevel(cfg["logging"]["level"])
+        configure_logging(cfg["logging"])
         from padelbot.padelbot import PadelBot
 
-        app.state.padelbot = PadelBot(cfg)
+        logging.info(f"Imported padelbot {since_start():.2f} seconds after startup")
+        app.state.padelbot = PadelBot(cfg, config_watcher=config_watcher)
         # Run padelbot.run() in the background
         asyncio.create_task(run_padelbot(app))
     yield
@@ -127,7 +282,18 @@ app = Starlette(
     routes=[
         Route("/", log_viewer),
         Route("/logs", get_logs),
+        Route("/logs/stats", get_log_stats),
+        Route("/logs/search", get_log_search),
         Route("/events", get_events),
+        Route("/metrics", metrics),
+        Route("/loop", get_loop),
+        Route("/profile", profile, methods=["GET", "POST"]),
+        Route("/memory", memory, methods=["GET", "POST", "DELETE"]),
+        Route("/audit", get_audit),
+        Route("/audit/players/{player}", get_audit),
+        Route("/audit/events/{event}", get_audit),
+        Route("/audit/rules/{rule}", get_audit),
+        Route("/audit/dates/{date}", get_audit),
     ],
     lifespan=lifespan,
 )
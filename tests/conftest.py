@@ -0,0 +1,41 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+START = datetime(2026, 5, 4, 18, 0, tzinfo=UTC)
+
+
+def build_event(
+    id,
+    start=START,
+    accepted=(),
+    waiting=(),
+    heading="Americano",
+    series_id=None,
+    hours=2,
+    members=None,
+):
+    """Return a Spond event of `hours` from `start`, with the `accepted` and
+    `waiting` players and, if given, the `members` of its group."""
+    event = {
+        "id": id,
+        "heading": heading,
+        "startTimestamp": start.isoformat(),
+        "endTimestamp": (start + timedelta(hours=hours)).isoformat(),
+        "responses": {
+            "acceptedIds": list(accepted),
+            "waitinglistIds": list(waiting),
+            "declinedIds": [],
+        },
+    }
+    if series_id is not None:
+        event["seriesId"] = series_id
+    if members is not None:
+        event["recipients"] = {"group": {"members": members}}
+    return event
+
+
+@pytest.fixture
+def make_event():
+    """Factory of Spond events, see build_event()."""
+    return build_event
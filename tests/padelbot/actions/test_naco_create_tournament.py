@@ -183,6 +183,23 @@ def test_expirationtimes_excludes_non_matching(sample_events):
     assert len(times) == 1  # Only e3 matches
 
 
+def test_next_expirationtime_skips_passed_triggers(sample_events):
+    action = ActionNacoCreateTournament(
+        action_name="create_tournament",
+        events=sample_events,
+        header_regex=".*Americano.*",
+        spond_profile_id=CREATOR_SPOND_ID,
+        enforced=True,
+        minutes_before_start=5,
+    )
+    now = datetime.now().astimezone()
+    # The trigger for the event starting in 3 minutes has already passed
+    expected = datetime.fromisoformat(
+        sample_events.upcoming[1]["startTimestamp"]
+    ) - timedelta(minutes=5)
+    assert action.next_expirationtime(now) == expected
+
+
 def test_evaluate_not_enforced(sample_events):
     action = ActionNacoCreateTournament(
         action_name="create_tournament",
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.padelbot.core.clock import Clock, VirtualClock
+
+START = datetime(2026, 5, 1, 18, 0).astimezone()
+
+
+def test_clock_is_frozen_between_ticks():
+    clock = Clock()
+    now = clock.tick()
+    assert clock.now() == now
+    assert clock.now() == now
+    assert clock.tick() >= now
+
+
+def test_clock_without_tick_follows_wall_clock():
+    clock = Clock()
+    before = datetime.now().astimezone()
+    assert before <= clock.now() <= datetime.now().astimezone()
+    assert clock.elapsed() == 0.0
+
+
+def test_virtual_clock_only_moves_when_told():
+    clock = VirtualClock(START)
+    assert clock.tick() == START
+    clock.advance(timedelta(hours=1))
+    assert clock.now() == START
+    assert clock.current() == START + timedelta(hours=1)
+    assert clock.elapsed() == 3600
+    assert clock.tick() == START + timedelta(hours=1)
+    clock.set(START)
+    assert clock.tick() == START
+
+
+@pytest.mark.asyncio
+async def test_virtual_clock_sleep_advances_time():
+    clock = VirtualClock(START)
+    await clock.sleep(7 * 24 * 60 * 60)
+    assert clock.tick() == START + timedelta(days=7)
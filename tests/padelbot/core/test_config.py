@@ -0,0 +1,53 @@
+import os
+
+from src.padelbot.core.config import ConfigWatcher, readconfig
+
+CONFIG = """
+[auth]
+username = "user"
+password = "pass"
+group_id = "group-id"
+
+[rules.quarantine]
+type = "QuarantineAfterEvent"
+header_regex = "Americano"
+message = "Hi"
+"""
+
+
+def touch(path, seconds):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def test_readconfig_from_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("SPOND_USERNAME", raising=False)
+    path = tmp_path / "config.toml"
+    path.write_text(CONFIG)
+    cfg = readconfig(str(path))
+    assert cfg is not None
+    assert cfg["auth"]["username"] == "user"
+    assert cfg["rules"]["quarantine"]["type"] == "QuarantineAfterEvent"
+    assert cfg["general"]["seconds_to_sleep"] == 600
+
+
+def test_watcher_reports_each_change_once(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text(CONFIG)
+    watcher = ConfigWatcher(str(path))
+    assert not watcher.changed()
+
+    touch(path, 1)
+    assert watcher.changed()
+    assert not watcher.changed()
+
+
+def test_watcher_reports_recreated_file(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text(CONFIG)
+    watcher = ConfigWatcher(str(path))
+
+    path.unlink()
+    assert not watcher.changed()
+    path.write_text(CONFIG)
+    assert watcher.changed()
@@ -0,0 +1,159 @@
+import gzip
+import json
+import logging
+import os
+
+import pytest
+
+from src.padelbot.core import logarchive
+from src.padelbot.core.logarchive import (
+    INDEX_SUFFIX,
+    ArchivingFileHandler,
+    LogQuery,
+    list_archives,
+    search_logs,
+)
+from src.padelbot.core.logger import ContextFilter, log_context
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(logarchive, "BLOCK_BYTES", 1024)
+    return str(tmp_path / "padelbot.log")
+
+
+@pytest.fixture
+def handler(log_file):
+    handler = ArchivingFileHandler(log_file, maxBytes=8 * 1024, backupCount=3)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler.addFilter(ContextFilter())
+    yield handler
+    handler.close()
+
+
+def log(handler, msg, level=logging.INFO, created=None, **context):
+    record = logging.LogRecord("root", level, __file__, 1, msg, None, None)
+    if created is not None:
+        record.created = created
+    with log_context(**context):
+        handler.handle(record)
+
+
+def write_cycles(handler, cycles, created=1_000_000.0):
+    for cycle in range(cycles):
+        for player in range(10):
+            log(handler, f"Processing player{player} in cycle {cycle}", created=created)
+            created += 1
+        log(
+            handler,
+            f"Removing player3 from event{cycle % 4}",
+            created=created,
+            event=f"event{cycle % 4}",
+            player="player3",
+        )
+        created += 1
+    return created
+
+
+def read_index(archive):
+    with open(f"{archive}{INDEX_SUFFIX}") as f:
+        return json.load(f)
+
+
+def test_rollover_compresses_and_indexes(handler, log_file):
+    log(handler, "first")
+    handler.doRollover()
+    log(handler, "second")
+
+    [archive] = list_archives(log_file)
+    assert archive.endswith(".gz")
+    with gzip.open(archive, "rt") as f:
+        assert f.read() == "INFO first\n"
+    assert os.path.exists(f"{archive}{INDEX_SUFFIX}")
+    with open(log_file) as f:
+        assert f.read() == "INFO second\n"
+
+
+def test_archives_of_the_same_second_are_listed_in_order(log_file):
+    stamps = ["T120000-10", "T120000-2", "T115959", "T120000", "T120000-1"]
+    for stamp in stamps:
+        with open(f"{log_file}.20260501{stamp}.gz{INDEX_SUFFIX}", "w"):
+            pass
+    assert list_archives(log_file) == [
+        f"{log_file}.20260501{stamp}.gz"
+        for stamp in ["T115959", "T120000", "T120000-1", "T120000-2", "T120000-10"]
+    ]
+
+
+def test_oldest_archives_are_removed(handler, log_file):
+    write_cycles(handler, 200)
+    archives = list_archives(log_file)
+    assert len(archives) == 3
+    with gzip.open(archives[-1], "rt") as f:
+        assert "Processing player0" in f.read()
+
+
+def test_search_finds_removals_across_archives(handler, log_file, monkeypatch):
+    write_cycles(handler, 100)
+    assert len(list_archives(log_file)) == 3
+
+    decompressed = []
+    decompress = gzip.decompress
+    monkeypatch.setattr(
+        gzip, "decompress", lambda data: decompressed.append(data) or decompress(data)
+    )
+    query = LogQuery(player="player3", event="event2", text="Removing")
+    records = search_logs(query, log_file, limit=1000)
+
+    assert records
+    assert all(
+        record["record"] == "INFO Removing player3 from event2" for record in records
+    )
+    assert [record["event"] for record in records] == ["event2"] * len(records)
+    times = [record["time"] for record in records]
+    assert times == sorted(times)
+    assert {record["file"] for record in records} >= {os.path.basename(log_file)}
+    # Only blocks with removals from event2 were decompressed
+    blocks = sum(
+        len(read_index(archive)["blocks"]) for archive in list_archives(log_file)
+    )
+    assert 0 < len(decompressed) < blocks
+
+
+def test_search_limit_returns_the_latest(handler, log_file):
+    write_cycles(handler, 60)
+    everything = search_logs(LogQuery(player="player3"), log_file, limit=1000)
+    latest = search_logs(LogQuery(player="player3"), log_file, limit=5)
+    assert latest == everything[-5:]
+
+
+def test_search_by_time_and_level(handler, log_file):
+    created = write_cycles(handler, 30)
+    log(handler, "Failed to remove", level=logging.ERROR, created=created)
+    write_cycles(handler, 30, created=created + 1)
+
+    errors = search_logs(LogQuery(level=logging.WARNING), log_file)
+    assert [record["record"] for record in errors] == ["ERROR Failed to remove"]
+
+    window = LogQuery(since=1_000_000.0 + 10, until=1_000_000.0 + 20)
+    records = search_logs(window, log_file)
+    assert [record["record"] for record in records][0] == (
+        "INFO Removing player3 from event0"
+    )
+    assert len(records) == 11
+
+
+def test_unindexed_lines_are_archived(log_file):
+    with open(log_file, "w") as f:
+        f.write("INFO written before\n")
+    handler = ArchivingFileHandler(log_file)
+    handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    log(handler, "written after")
+    handler.doRollover()
+    handler.close()
+
+    [archive] = list_archives(log_file)
+    with gzip.open(archive, "rt") as f:
+        assert f.read() == "INFO written before\nINFO written after\n"
+    records = search_logs(LogQuery(text="before"), log_file)
+    assert [record["record"] for record in records] == ["INFO written before"]
@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+
+import pytest
+
+from src.padelbot.core import logger
+from src.padelbot.core.logger import (
+    SAMPLED,
+    BoundedQueueHandler,
+    ContextFilter,
+    JsonFormatter,
+    LevelQueue,
+    RateLimitFilter,
+    configure_logging,
+    log_context,
+    report_dropped,
+    set_log_context,
+)
+
+
+def make_record(msg, *args, sampled=False, level=logging.INFO):
+    record = logging.LogRecord("root", level, __file__, 1, msg, args, None)
+    if sampled:
+        record.__dict__.update(SAMPLED)
+    return record
+
+
+def test_log_context_is_restored():
+    record = make_record("message")
+    with log_context(cycle=1, rule="quarantine"):
+        set_log_context(event="event1")
+        ContextFilter().filter(record)
+        assert (record.cycle, record.rule, record.event) == (1, "quarantine", "event1")
+    ContextFilter().filter(record)
+    assert (record.cycle, record.rule, record.event) == (None, None, None)
+
+
+def test_rate_limit_per_rule_and_cycle():
+    rate_limit = RateLimitFilter(limit=2)
+    processing = 'Processing event "%s"'
+
+    def passed(rule, cycle):
+        with log_context(cycle=cycle, rule=rule):
+            return [
+                rate_limit.filter(make_record(processing, i, sampled=True))
+                for i in range(3)
+            ]
+
+    assert passed("max", 1) == [True, True, False]
+    assert passed("quarantine", 1) == [True, True, False]
+    assert rate_limit.pop_suppressed() == 2
+    assert rate_limit.pop_suppressed() == 0
+    # The limit starts over every cycle
+    assert passed("max", 2) == [True, True, False]
+    # Records that are not sampled are never suppressed
+    with log_context(cycle=2, rule="max"):
+        assert rate_limit.filter(make_record(processing, "x"))
+
+
+def test_rate_limit_disabled():
+    rate_limit = RateLimitFilter()
+    assert all(rate_limit.filter(make_record("m", sampled=True)) for _ in range(100))
+
+
+def test_json_formatter_includes_context():
+    record = make_record('Processing "%s"', "Americano")
+    with log_context(cycle=3, rule="max", event="event1"):
+        ContextFilter().filter(record)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == 'Processing "Americano"'
+    assert entry["level"] == "INFO"
+    assert (entry["cycle"], entry["rule"], entry["event"]) == (3, "max", "event1")
+
+
+@pytest.fixture
+def handler():
+    handler = logging.StreamHandler()
+    root_level = logging.getLogger().level
+    logger.HANDLERS.append(handler)
+    yield handler
+    logger.HANDLERS.remove(handler)
+    logger.RATE_LIMIT.limit = 0
+    logger.QUEUE_HANDLER.set_size(logger.QUEUE_SIZE)
+    logger.QUEUE_HANDLER.overflow = "drop_debug"
+    logging.getLogger().setLevel(root_level)
+
+
+def test_configure_logging(handler):
+    configure_logging(
+        {
+            "level": "WARNING",
+            "format": "json",
+            "rate_limit": 5,
+            "queue_size": 100,
+            "overflow": "coalesce",
+        }
+    )
+    assert logging.getLogger().level == logging.WARNING
+    assert isinstance(handler.formatter, JsonFormatter)
+    assert logger.RATE_LIMIT.limit == 5
+    assert logger.logging_stats()["queue_size"] == 100
+    assert logger.QUEUE_HANDLER.overflow == "coalesce"
+
+    configure_logging({"level": "INFO"})
+    assert not isinstance(handler.formatter, JsonFormatter)
+    assert logger.RATE_LIMIT.limit == 0
+
+
+def queued(handler):
+    return [(record.levelname, record.msg) for record in handler.queue.records()]
+
+
+def fill(handler, *records):
+    for level, msg in records:
+        handler.handle(make_record(msg, level=level))
+
+
+def test_level_queue_keeps_order_and_counts_messages():
+    queue = LevelQueue()
+    records = [
+        make_record(msg, level=level)
+        for level, msg in [
+            (logging.INFO, "a"),
+            (logging.DEBUG, "a"),
+            (logging.INFO, "b"),
+        ]
+    ]
+    for record in [*records, None]:
+        queue.put(record)
+    assert queue.is_queued(make_record("a", level=logging.DEBUG))
+    assert not queue.is_queued(make_record("b", level=logging.DEBUG))
+    with queue.mutex:
+        assert queue.pop_lowest(logging.WARNING) is records[1]
+    assert [queue.get() for _ in range(3)] == [records[0], records[2], None]
+    assert queue.qsize() == 0
+    assert not queue.messages
+
+
+def test_drop_debug_makes_room_for_higher_levels():
+    handler = BoundedQueueHandler(LevelQueue(3))
+    fill(handler, (logging.INFO, "a"), (logging.DEBUG, "b"), (logging.INFO, "c"))
+
+    fill(handler, (logging.WARNING, "d"))
+    assert queued(handler) == [("INFO", "a"), ("INFO", "c"), ("WARNING", "d")]
+    fill(handler, (logging.DEBUG, "e"), (logging.ERROR, "f"), (logging.INFO, "g"))
+    assert queued(handler) == [("INFO", "c"), ("WARNING", "d"), ("ERROR", "f")]
+    assert handler.dropped == {"DEBUG": 2, "INFO": 2}
+
+
+def test_coalesce_drops_repeated_messages():
+    handler = BoundedQueueHandler(LevelQueue(2), overflow="coalesce")
+    fill(handler, (logging.INFO, "a"), (logging.INFO, "b"))
+    fill(handler, (logging.INFO, "a"), (logging.INFO, "b"), (logging.INFO, "c"))
+    assert queued(handler) == [("INFO", "a"), ("INFO", "b")]
+    assert handler.coalesced == 2
+    assert handler.dropped == {"INFO": 1}
+
+
+def test_block_waits_for_room(monkeypatch):
+    monkeypatch.setattr(logger, "BLOCK_SECONDS", 5)
+    handler = BoundedQueueHandler(LevelQueue(1), overflow="block")
+    fill(handler, (logging.INFO, "a"))
+    threading.Timer(0.05, handler.queue.get).start()
+    fill(handler, (logging.INFO, "b"))
+    assert queued(handler) == [("INFO", "b")]
+    assert handler.dropped == {}
+
+
+def test_block_stops_waiting_until_queue_drains(monkeypatch):
+    monkeypatch.setattr(logger, "BLOCK_SECONDS", 0.01)
+    handler = BoundedQueueHandler(LevelQueue(2), overflow="block")
+    fill(handler, (logging.DEBUG, "a"), (logging.INFO, "b"), (logging.INFO, "c"))
+    # After waiting in vain, c took the place of a, as with "drop_debug"
+    assert queued(handler) == [("INFO", "b"), ("INFO", "c")]
+    assert handler.stalled
+
+    # No more waiting while the queue is stalled
+    monkeypatch.setattr(logger, "BLOCK_SECONDS", 5)
+    fill(handler, (logging.INFO, "d"))
+    assert handler.dropped == {"DEBUG": 1, "INFO": 1}
+
+    # Waiting resumes once the queue has drained to half its size
+    handler.queue.get()
+    fill(handler, (logging.INFO, "e"))
+    threading.Timer(0.05, handler.queue.get).start()
+    fill(handler, (logging.INFO, "f"))
+    assert not handler.stalled
+    assert queued(handler) == [("INFO", "e"), ("INFO", "f")]
+
+
+def test_set_size_and_report_dropped(monkeypatch, caplog):
+    handler = BoundedQueueHandler(LevelQueue(1))
+    monkeypatch.setattr(logger, "QUEUE_HANDLER", handler)
+    fill(handler, (logging.INFO, "a"), (logging.INFO, "b"))
+    handler.set_size(2)
+    fill(handler, (logging.INFO, "c"))
+    assert handler.stats() == {
+        "queued": 2,
+        "queue_size": 2,
+        "overflow": "drop_debug",
+        "stalled": False,
+        "dropped": {"INFO": 1},
+        "coalesced": 0,
+    }
+
+    with caplog.at_level(logging.WARNING):
+        assert report_dropped(0) == 1
+        assert report_dropped(1) == 1
+    assert len(caplog.records) == 1
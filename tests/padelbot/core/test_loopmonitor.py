@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from src.padelbot.core.loopmonitor import BUCKETS, LoopMonitor
+
+
+def test_record_fills_histogram():
+    monitor = LoopMonitor(threshold=1.0)
+    for lag in (0.001, 0.02, 0.3):
+        monitor.record(lag)
+    assert monitor.count == 3
+    assert monitor.max == 0.3
+    assert monitor.blocked == 0
+    # Buckets are cumulative
+    assert monitor.buckets[BUCKETS.index(0.005)] == 1
+    assert monitor.buckets[BUCKETS.index(0.025)] == 2
+    assert monitor.buckets[-1] == 3
+
+    metrics = monitor.metrics()
+    assert 'padelbot_loop_lag_seconds_bucket{le="0.025"} 2\n' in metrics
+    assert "padelbot_loop_lag_seconds_count 3\n" in metrics
+    assert "padelbot_wakeup_drift_seconds" not in metrics
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_caught_with_its_stack(caplog):
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    task = asyncio.create_task(monitor.run())
+    try:
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert monitor.blocked == 1
+    [stall] = monitor.stalls
+    assert stall["seconds"] >= 0.25
+    assert "block_the_loop" in stall["stack"]
+    assert "Event loop was blocked" in caplog.text
+    assert monitor.status()["blocked"] == 1
+    assert not monitor.running
@@ -0,0 +1,67 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.padelbot.core.memory import MemoryInspector, deep_size
+from src.padelbot.roster import Roster
+from src.padelbot.utils import Events
+
+
+def test_deep_size_counts_shared_objects_once():
+    member = {"id": "alice-id", "firstName": "Alice"}
+    one = deep_size([member])
+    assert one > sys.getsizeof([member]) + sys.getsizeof(member)
+    assert deep_size([member, member]) == one + 8
+    assert deep_size(Events(upcoming=[member])) > one
+
+
+@pytest.fixture
+def inspector():
+    inspector = MemoryInspector()
+    yield inspector
+    inspector.stop()
+
+
+@pytest.fixture
+def bot():
+    roster = Roster().with_members([{"id": "alice-id", "firstName": "Alice"}])
+    return SimpleNamespace(
+        events=Events(upcoming=[{"id": "event1-id"}], version=3),
+        cycles=3,
+        roster_store=SimpleNamespace(roster=roster),
+        naco_registrar=SimpleNamespace(cache_registered_spond_member_ids={"alice-id"}),
+    )
+
+
+def test_not_enabled(inspector, bot):
+    assert inspector.inspect(bot) is None
+    assert inspector.status() == {"enabled": False, "reports": []}
+
+
+def test_reports_sizes_and_growth(inspector, bot):
+    inspector.start()
+    first = inspector.inspect(bot)
+    assert first["cycle"] == 3
+    assert "growth" not in first
+    sizes = first["sizes"]
+    assert sizes["events"]["count"] == 1
+    assert sizes["roster"]["count"] == 1
+    assert sizes["registered_members"]["count"] == 1
+    assert "created_events" not in sizes
+
+    bot.leak = [bytearray(1024) for _ in range(1000)]
+    second = inspector.inspect(bot)
+    assert any(__file__ in site["where"] for site in second["growth"])
+    assert second["growth"][0]["bytes_diff"] > 1_000_000
+    assert second["top"][0] == {
+        "where": second["growth"][0]["where"],
+        "bytes": second["growth"][0]["bytes"],
+        "count": second["growth"][0]["count"],
+    }
+    assert second["growth_since_start"]
+    assert [report["cycle"] for report in inspector.status()["reports"]] == [3, 3]
+
+    inspector.toggle()
+    assert not inspector.enabled
+    assert inspector.previous is None
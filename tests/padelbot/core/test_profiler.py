@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from src.padelbot.core.profiler import CycleProfiler
+
+
+def busy_cycle():
+    return sum(i * i for i in range(10_000))
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return CycleProfiler(str(tmp_path))
+
+
+def test_not_armed(profiler, tmp_path):
+    with profiler.profile_cycle():
+        busy_cycle()
+    assert profiler.profile is None
+    assert profiler.status() == {"remaining": 0, "last": None}
+    assert os.listdir(tmp_path) == []
+
+
+def test_profiles_the_armed_cycles(profiler, tmp_path):
+    profiler.arm(2)
+    with profiler.profile_cycle():
+        busy_cycle()
+    assert profiler.status()["remaining"] == 1
+    assert profiler.last is None
+    with profiler.profile_cycle():
+        busy_cycle()
+
+    last = profiler.status()["last"]
+    assert last["cycles"] == 2
+    assert "busy_cycle" in last["report"]
+    assert os.listdir(tmp_path) == [os.path.basename(last["file"])]
+    # Disarmed again
+    with profiler.profile_cycle():
+        busy_cycle()
+    assert profiler.profile is None
+
+
+def test_cycle_raising_is_profiled(profiler):
+    profiler.arm()
+    with pytest.raises(RuntimeError), profiler.profile_cycle():
+        raise RuntimeError
+    assert profiler.last["cycles"] == 1
+
+
+def test_arm_needs_cycles(profiler):
+    with pytest.raises(ValueError):
+        profiler.arm(0)
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+from src.padelbot.core.startup import get_version
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+# Generous, the headless worker imports in about 0.3 seconds
+IMPORT_BUDGET_SECONDS = 1.5
+
+HEADLESS_STARTUP = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import main
+from padelbot.padelbot import PadelBot
+from padelbot.utils import Events
+imported = time.perf_counter() - started
+
+cfg = {
+    "auth": {"username": "user", "password": "pass", "group_id": "group-id"},
+    "general": {
+        "seconds_to_sleep": 600,
+        "history_file": ":memory:",
+        "audit_file": ":memory:",
+    },
+    "naco": {"enabled": False},
+    "logging": {"level": "INFO"},
+    "rules": {
+        "quarantine": {
+            "type": "QuarantineAfterEvent",
+            "header_regex": "Americano",
+            "message": "Hi {firstName}",
+        }
+    },
+    "actions": {},
+}
+
+
+async def start():
+    bot = PadelBot(cfg)
+    bot.get_fields()
+    rules = bot.get_rules(Events())
+    await bot.spond.clientsession.close()
+    return [type(rule).__name__ for rule in rules]
+
+
+rules = asyncio.run(start())
+print(json.dumps({"imported": imported, "rules": rules, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_get_version():
+    with open(REPO_ROOT / "pyproject.toml", "rb") as f:
+        assert get_version() == tomllib.load(f)["project"]["version"]
+
+
+def test_headless_startup_imports_only_what_is_configured():
+    # Run like the Docker image, with src on the path, in a fresh interpreter
+    result = subprocess.run(
+        [sys.executable, "-c", HEADLESS_STARTUP],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT / "src")},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    startup = json.loads(result.stdout.splitlines()[-1])
+    assert startup["rules"] == ["RuleQuarantineAfterEvent"]
+
+    modules = startup["modules"]
+    for unwanted in (
+        "starlette",
+        "uvicorn",
+        "naco_backend_client",
+        "numpy",
+        "padelbot.naco.tournament",
+        "padelbot.rules.max_events_per_week",
+        "padelbot.actions.naco_create_tournament",
+    ):
+        assert unwanted not in modules, f"{unwanted} was imported"
+    assert startup["imported"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+from src.padelbot.core import tracing
+from src.padelbot.core.tracing import Tracer, TracedClient
+
+
+def read_trace(path):
+    with open(path) as f:
+        content = f.read()
+    # The array is left open for appending
+    events = json.loads(content.rstrip().rstrip(",") + "]")
+    return [event for event in events if event["ph"] == "X"]
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    tracer = Tracer()
+    monkeypatch.setattr(tracing, "TRACER", tracer)
+    tracer.configure(str(tmp_path / "trace.json"))
+    yield tracer
+    tracer.configure(None)
+
+
+def test_not_configured(tmp_path):
+    tracer = Tracer()
+    with tracer.span("cycle"):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_spans_record_their_parent(tracer):
+    async def deliver():
+        with tracer.span("naco.create_tournament_from_spond", "naco"):
+            await asyncio.sleep(0)
+
+    with tracer.span("cycle", cycle=1):
+        with tracer.span("get_events"):
+            await asyncio.sleep(0)
+        # Tasks started in a span are its children
+        await asyncio.create_task(deliver(), name="outbox")
+        with pytest.raises(ValueError), tracer.span("rule", "rule"):
+            raise ValueError("bad")
+
+    spans = {event["name"]: event for event in read_trace(tracer.path)}
+    cycle = spans["cycle"]
+    assert cycle["args"] == {"span": 1, "parent": None, "cycle": 1}
+    for name in ("get_events", "naco.create_tournament_from_spond", "rule"):
+        assert spans[name]["args"]["parent"] == 1
+        assert cycle["ts"] <= spans[name]["ts"]
+        assert spans[name]["ts"] + spans[name]["dur"] <= cycle["ts"] + cycle["dur"]
+    assert spans["rule"]["args"]["error"] == "ValueError('bad')"
+    # The task has a track of its own
+    assert spans["naco.create_tournament_from_spond"]["tid"] != cycle["tid"]
+
+
+@pytest.mark.asyncio
+async def test_traced_client(tracer):
+    class Client:
+        name = "spond"
+
+        async def get_group(self, group_id):
+            return {"id": group_id}
+
+    client = TracedClient(Client(), "spond")
+    assert client.name == "spond"
+    assert await client.get_group("group-id") == {"id": "group-id"}
+    [span] = read_trace(tracer.path)
+    assert (span["name"], span["cat"]) == ("spond.get_group", "spond")
+
+
+def test_trace_file_is_rotated(tracer, monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_BYTES", 1000)
+    for _ in range(10):
+        with tracer.span("cycle"):
+            pass
+    assert read_trace(f"{tracer.path}.1")
+    assert len(read_trace(tracer.path)) < 10
@@ -0,0 +1,212 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from uuid import UUID
+
+import pytest
+
+from src.padelbot.actions.naco_create_tournament import CreateTournamentIntent
+from src.padelbot.audit import AuditLog
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.naco.outbox import NacoOutbox, intent_to_record, record_to_intent
+from src.padelbot.naco.tournament import NacoTournamentCreator
+
+EVENT_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+
+@pytest.fixture
+def intent():
+    start_time = datetime.now().astimezone() + timedelta(minutes=5)
+    return CreateTournamentIntent(
+        event_id=EVENT_ID,
+        enforced=True,
+        event_heading="Tuesday Americano",
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+        created_by_spond_id=UUID("11111111-1111-1111-1111-111111111111"),
+        points_to_win=24,
+        player_spond_ids=[UUID("22222222-2222-2222-2222-222222222222")],
+        court_names=["Court 1"],
+    )
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    creator = NacoTournamentCreator(
+        base_url="http://localhost:8000", api_key="test-key"
+    )
+    return NacoOutbox(creator, path=str(tmp_path / "outbox.json"))
+
+
+def test_record_roundtrip(intent):
+    assert record_to_intent(intent_to_record(intent)) == intent
+
+
+@pytest.mark.asyncio
+async def test_enqueue_persists_intent(outbox, intent):
+    with patch.object(outbox, "start"):
+        assert outbox.enqueue(intent) is True
+
+    with open(outbox.path) as f:
+        stored = json.load(f)
+    assert stored[EVENT_ID]["intent"] == intent_to_record(intent)
+
+    reloaded = NacoOutbox(outbox.creator, path=outbox.path)
+    assert list(reloaded.entries) == [EVENT_ID]
+
+
+@pytest.mark.asyncio
+async def test_enqueue_ignores_duplicates(outbox, intent):
+    with patch.object(outbox, "start"):
+        assert outbox.enqueue(intent) is True
+        assert outbox.enqueue(intent) is False
+        outbox.entries.clear()
+        outbox.creator.cache_created_event_ids.add(EVENT_ID)
+        assert outbox.enqueue(intent) is False
+
+
+@pytest.mark.asyncio
+async def test_delivered_entry_is_removed(outbox, intent):
+    with patch.object(
+        outbox.creator, "create_tournament", new_callable=AsyncMock, return_value=True
+    ) as mock_create:
+        outbox.enqueue(intent)
+        await outbox._task
+    mock_create.assert_awaited_once()
+    assert outbox.entries == {}
+    with open(outbox.path) as f:
+        assert json.load(f) == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_is_retried_with_backoff(outbox, intent):
+    with patch.object(outbox, "start"):
+        outbox.enqueue(intent)
+    with patch.object(
+        outbox.creator, "create_tournament", new_callable=AsyncMock, return_value=False
+    ) as mock_create:
+        await outbox.deliver_due()
+        entry = outbox.entries[EVENT_ID]
+        assert entry["attempts"] == 1
+        assert outbox.seconds_until_next_attempt() == pytest.approx(
+            outbox.initial_backoff, abs=1
+        )
+
+        # Not due yet, so no new attempt is made
+        await outbox.deliver_due()
+        assert mock_create.await_count == 1
+
+        entry["next_attempt"] = datetime.now().astimezone().isoformat()
+        await outbox.deliver_due()
+        assert entry["attempts"] == 2
+        assert outbox.seconds_until_next_attempt() == pytest.approx(
+            2 * outbox.initial_backoff, abs=1
+        )
+
+
+@pytest.mark.asyncio
+async def test_delivery_backs_off_when_saving_or_creating_raises(outbox, intent):
+    with patch.object(outbox, "start"):
+        outbox.enqueue(intent)
+    with (
+        patch.object(outbox, "_save", side_effect=OSError("Disk full")),
+        patch.object(
+            outbox.creator,
+            "create_tournament",
+            new_callable=AsyncMock,
+            side_effect=[False, Exception("Naco is down")],
+        ) as mock_create,
+    ):
+        await outbox.deliver_due()
+        entry = outbox.entries[EVENT_ID]
+        assert entry["attempts"] == 1
+        await outbox.deliver_due()
+        assert mock_create.await_count == 1
+
+        entry["next_attempt"] = datetime.now().astimezone().isoformat()
+        await outbox.deliver_due()
+        assert entry["attempts"] == 2
+        assert outbox.seconds_until_next_attempt() == pytest.approx(
+            2 * outbox.initial_backoff, abs=1
+        )
+
+
+def test_backoff_is_capped(outbox):
+    assert outbox._backoff(1) == outbox.initial_backoff
+    assert outbox._backoff(100) == outbox.max_backoff
+
+
+@pytest.mark.asyncio
+async def test_entry_dropped_when_event_has_ended(outbox, intent):
+    intent.start_time -= timedelta(hours=3)
+    intent.end_time = intent.start_time + timedelta(hours=1)
+    with patch.object(outbox, "start"):
+        outbox.enqueue(intent)
+    with patch.object(
+        outbox.creator, "create_tournament", new_callable=AsyncMock
+    ) as mock_create:
+        await outbox.deliver_due()
+    mock_create.assert_not_awaited()
+    assert outbox.entries == {}
+
+
+@pytest.mark.asyncio
+async def test_retries_and_expiry_follow_the_clock(tmp_path, intent):
+    clock = VirtualClock(intent.start_time - timedelta(minutes=5))
+    creator = NacoTournamentCreator(
+        base_url="http://localhost:8000", api_key="test-key"
+    )
+    outbox = NacoOutbox(creator, path=str(tmp_path / "outbox.json"), clock=clock)
+    with patch.object(outbox, "start"):
+        outbox.enqueue(intent)
+    with patch.object(
+        creator, "create_tournament", new_callable=AsyncMock, return_value=False
+    ) as mock_create:
+        await outbox.deliver_due()
+        assert outbox.seconds_until_next_attempt() == outbox.initial_backoff
+        # Not due yet on the virtual clock
+        await outbox.deliver_due()
+        assert mock_create.await_count == 1
+
+        clock.advance(timedelta(seconds=outbox.initial_backoff))
+        await outbox.deliver_due()
+        assert mock_create.await_count == 2
+
+        clock.set(intent.end_time + timedelta(seconds=1))
+        await outbox.deliver_due()
+        assert mock_create.await_count == 2
+    assert outbox.entries == {}
+
+
+@pytest.mark.asyncio
+async def test_final_outcomes_are_audited(tmp_path, intent):
+    clock = VirtualClock(intent.start_time - timedelta(minutes=5))
+    audit = AuditLog(":memory:")
+    creator = NacoTournamentCreator(
+        base_url="http://localhost:8000", api_key="test-key"
+    )
+    outbox = NacoOutbox(
+        creator, path=str(tmp_path / "outbox.json"), clock=clock, audit=audit
+    )
+    intent.action = "naco"
+    expired = record_to_intent(
+        {**intent_to_record(intent), "event_id": "other-event-id"}
+    )
+    expired.start_time = intent.start_time - timedelta(hours=1)
+    expired.end_time = intent.start_time - timedelta(minutes=10)
+    with patch.object(outbox, "start"):
+        outbox.enqueue(intent, cycle=7)
+        outbox.enqueue(expired, cycle=7)
+    with patch.object(
+        creator, "create_tournament", new_callable=AsyncMock, side_effect=[False, True]
+    ):
+        await outbox.deliver_due()
+        clock.advance(timedelta(seconds=outbox.initial_backoff))
+        await outbox.deliver_due()
+
+    outcomes = {d["eventId"]: d for d in audit.query(kind="tournament")}
+    assert outcomes[EVENT_ID]["outcome"] == "created"
+    assert outcomes[EVENT_ID]["latency"] == outbox.initial_backoff
+    assert outcomes[EVENT_ID]["cycle"] == 7
+    assert outcomes[EVENT_ID]["source"] == "naco"
+    assert outcomes["other-event-id"]["outcome"] == "expired"
@@ -147,3 +147,35 @@ def test_include(sample_events):
 
     sample_events.upcoming[1]["heading"] = "Tennis"
     assert rule._include(sample_events.upcoming[1]) is False
+
+
+def test_next_expirationtime(sample_events):
+    rule = RuleMaxEventsPerWeek(
+        rule_name="max1grace24",
+        events=sample_events,
+        header_regex="Padel",
+        message="msg",
+        enforced=True,
+        max_events=1,
+        grace_hours=24,
+    )
+    now = datetime.now().astimezone()
+    assert rule.next_expirationtime(now) == min(rule.expirationtimes())
+    rule.header_regex = "Match 3"
+    assert [rule.next_expirationtime(now)] == rule.expirationtimes()
+
+
+def test_evaluate_incremental_only_considers_added_players(sample_events):
+    rule = RuleMaxEventsPerWeek(
+        rule_name="max1",
+        events=sample_events,
+        header_regex="Padel",
+        message="msg",
+        enforced=True,
+        max_events=1,
+        grace_hours=0,
+    )
+    full = rule.evaluate()
+    incremental = rule.evaluate_incremental({"e3": {"carol-id"}})
+    assert incremental == [r for r in full if r.player_id == "carol-id"]
+    assert incremental
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 import pytest
 
+from src.padelbot.core.clock import VirtualClock
 from src.padelbot.rules.quarantine_after_event import RuleQuarantineAfterEvent
 from src.padelbot.utils import Events
 
@@ -180,3 +181,36 @@ def test_include(sample_events):
     rule.header_regex = "Americano|Mexicano"
     assert rule._include(sample_events.upcoming[0]) is True
     assert rule._include(sample_events.upcoming[1]) is True
+
+
+def test_quarantine_lifts_when_clock_advances(sample_events):
+    clock = VirtualClock(datetime.now().astimezone())
+    clock.tick()
+    rule = RuleQuarantineAfterEvent(
+        rule_name="quarantine1",
+        events=sample_events,
+        header_regex="Americano",
+        message="msg",
+        enforced=True,
+        quarantine_hours=24,
+        clock=clock,
+    )
+    assert len(rule.evaluate()) == 2
+
+    clock.advance(timedelta(hours=13))
+    clock.tick()
+    assert rule.evaluate() == []
+
+
+def test_evaluate_incremental_only_considers_added_players(sample_events):
+    rule = RuleQuarantineAfterEvent(
+        rule_name="quarantine1",
+        events=sample_events,
+        header_regex="Americano",
+        message="msg",
+        enforced=True,
+        quarantine_hours=24,
+    )
+    removals = rule.evaluate_incremental({"eu2": {"bob-id", "carol-id"}})
+    assert [r.player_id for r in removals] == ["bob-id"]
+    assert rule.evaluate_incremental({"eu1": {"alice-id"}}) == []
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from src.padelbot.audit import (
+    FAILED,
+    REMOVAL,
+    REMOVED,
+    TOURNAMENT,
+    AuditLog,
+    Decision,
+)
+
+START = datetime(2026, 5, 4, 18, 0, tzinfo=UTC)
+
+
+def make_decision(minutes, player_id="p1", event_id="e1", source="quarantine", **kw):
+    return Decision(
+        time=START + timedelta(minutes=minutes),
+        cycle=minutes,
+        kind=kw.get("kind", REMOVAL),
+        source=source,
+        event_id=event_id,
+        player_id=player_id,
+        enforced=True,
+        outcome=kw.get("outcome", REMOVED),
+        latency=0.25,
+        detail="Hi",
+    )
+
+
+@pytest.fixture
+def audit(tmp_path):
+    audit = AuditLog(str(tmp_path / "audit.sqlite3"))
+    audit.record(
+        [
+            make_decision(0),
+            make_decision(10, player_id="p2", outcome=FAILED),
+            make_decision(20, event_id="e2", source="max"),
+            make_decision(30, player_id=None, kind=TOURNAMENT, source="naco"),
+        ]
+    )
+    yield audit
+    audit.close()
+
+
+def cycles(decisions):
+    return [decision["cycle"] for decision in decisions]
+
+
+def test_query_is_newest_first(audit):
+    assert cycles(audit.query()) == [30, 20, 10, 0]
+    assert cycles(audit.query(limit=2)) == [30, 20]
+
+
+def test_query_by_player_event_rule_and_kind(audit):
+    assert cycles(audit.query(player_id="p1")) == [20, 0]
+    assert cycles(audit.query(event_id="e1")) == [30, 10, 0]
+    assert cycles(audit.query(source="max")) == [20]
+    assert cycles(audit.query(kind=TOURNAMENT)) == [30]
+    assert cycles(audit.query(player_id="p1", event_id="e1")) == [0]
+
+
+def test_query_by_time(audit):
+    decisions = audit.query(
+        since=START + timedelta(minutes=10), until=START + timedelta(minutes=30)
+    )
+    assert cycles(decisions) == [20, 10]
+
+
+def test_decisions_survive_reopening(audit):
+    reopened = AuditLog(audit.path)
+    [decision] = reopened.query(player_id="p2")
+    reopened.close()
+    assert decision == {
+        "time": START.replace(minute=10).astimezone().isoformat(),
+        "cycle": 10,
+        "kind": REMOVAL,
+        "source": "quarantine",
+        "eventId": "e1",
+        "playerId": "p2",
+        "enforced": True,
+        "outcome": FAILED,
+        "latency": 0.25,
+        "detail": "Hi",
+    }
+
+
+@pytest.mark.asyncio
+async def test_record_in_worker_thread(audit):
+    assert await asyncio.to_thread(audit.record, [make_decision(40)]) == 1
+    assert cycles(audit.query(since=START + timedelta(minutes=40))) == [40]
@@ -0,0 +1,402 @@
+"""Differential tests of the optimized rules and actions against reference versions.
+
+The reference classes evaluate with the straightforward linear scans the rules and
+actions were first written with. Random snapshots are generated with events on the
+grace, quarantine and action window boundaries, series and title fallbacks to last
+week's event, and waiting lists, and every fast path must return exactly the same
+removals and intents as the reference.
+"""
+
+import logging
+import random
+import re
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
+
+from src.padelbot.actions.actionbase import ActionIntent
+from src.padelbot.actions.naco_create_tournament import (
+    ActionNacoCreateTournament,
+    CreateTournamentIntent,
+)
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.matrix import HAVE_NUMPY
+from src.padelbot.rules.max_events_per_week import RuleMaxEventsPerWeek
+from src.padelbot.rules.quarantine_after_event import RuleQuarantineAfterEvent
+from src.padelbot.rules.rulebase import RemovalInfo, RuleBase
+from src.padelbot.timeline import Timeline
+from src.padelbot.utils import (
+    Event,
+    Events,
+    get_last_event_from_timestamp_and_title,
+    get_last_event_in_series,
+    memberid_to_member,
+)
+
+NOW = datetime(2026, 5, 6, 12, 0, tzinfo=UTC)
+SEEDS = range(200)
+ENGINES = ["python", "matrix"] if HAVE_NUMPY else ["python"]
+HEADER_REGEX = "americano|mexicano"
+# Variants differ in case and whitespace, which the previous event index normalizes
+HEADINGS = ["Americano", "americano", "Americano  ", "Mexicano", "Social"]
+SERIES = [None, None, "series1", "series2", "series3"]
+TIMEZONES = [UTC, timezone(timedelta(hours=2)), timezone(timedelta(hours=-5))]
+PLAYERS = [f"player{i}" for i in range(60)]
+CREATOR_SPOND_ID = "11111111-1111-1111-1111-111111111111"
+
+GRACE_HOURS = [0, 24, 48]
+QUARANTINE_HOURS = [24, 72, 24 * 7]
+MINUTES_BEFORE_START = [5, 30]
+
+
+class ReferenceMaxEventsPerWeek(RuleMaxEventsPerWeek):
+    def expirationtimes(self) -> list[datetime]:
+        result: list[datetime] = []
+        for event in self.events.upcoming:
+            if self._include(event):
+                event_start = datetime.fromisoformat(
+                    event["startTimestamp"]
+                ).astimezone()
+                result.append(event_start - timedelta(hours=self.grace_hours))
+        return result
+
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        return RuleBase.next_expirationtime(self, now)
+
+    def evaluate(self) -> list[RemovalInfo]:
+        player_events: dict[str, list[Event]] = {}
+        for event in self.events.upcoming:
+            if not self._include(event):
+                continue
+            for player_id in (
+                event["responses"]["acceptedIds"] + event["responses"]["waitinglistIds"]
+            ):
+                if player_id not in player_events:
+                    player_events[player_id] = []
+                player_events[player_id].append(event)
+
+        removals: list[RemovalInfo] = []
+        for player_id, events in player_events.items():
+            events.sort(
+                key=lambda e: datetime.fromisoformat(e["startTimestamp"]).astimezone(),
+                reverse=True,
+            )
+            num_events = len(events)
+            for key in ("waitinglistIds", "acceptedIds"):
+                for event in events:
+                    if num_events <= self.max_events:
+                        break
+                    if player_id in event["responses"][key]:
+                        removals.append(self.schedule_removal(player_id, event))
+                        num_events -= 1
+                if num_events <= self.max_events:
+                    break
+        return removals
+
+
+class ReferenceQuarantineAfterEvent(RuleQuarantineAfterEvent):
+    def _get_last_similar_event(self, event: Event) -> Event | None:
+        last_event = get_last_event_in_series(event, self.events.previous)
+        if not last_event:
+            last_event = get_last_event_from_timestamp_and_title(
+                event, self.events.previous
+            )
+        return last_event
+
+    def evaluate(self) -> list[RemovalInfo]:
+        removals: list[RemovalInfo] = []
+        for event in self.events.upcoming:
+            if not self._include(event) or not self._isactive(event):
+                continue
+            last_event = self._get_last_similar_event(event)
+            if not last_event:
+                continue
+            previous_player_ids = last_event["responses"]["acceptedIds"]
+            for id in (
+                event["responses"]["acceptedIds"] + event["responses"]["waitinglistIds"]
+            ):
+                if id in previous_player_ids:
+                    removals.append(self.schedule_removal(id, event))
+        return removals
+
+
+class ReferenceNacoCreateTournament(ActionNacoCreateTournament):
+    def next_expirationtime(self, now: datetime) -> datetime | None:
+        return min((dt for dt in self.expirationtimes() if dt > now), default=None)
+
+    def evaluate(self) -> list[ActionIntent]:
+        intents: list[ActionIntent] = []
+        for event in self.events.upcoming:
+            if not self._include(event) or not self._is_within_window(event):
+                continue
+            try:
+                UUID(event["id"])
+            except ValueError:
+                continue
+
+            members = event["recipients"]["group"]["members"]
+            player_spond_ids: list[UUID] = []
+            for player_id in event["responses"]["acceptedIds"]:
+                try:
+                    member = memberid_to_member(player_id, members)
+                    if profile_id := member.get("profile", {}).get("id"):
+                        player_spond_ids.append(UUID(profile_id))
+                except (ValueError, KeyError):
+                    pass
+
+            end_timestamp = event.get("endTimestamp")
+            intents.append(
+                CreateTournamentIntent(
+                    event_id=event["id"],
+                    enforced=self.enforced,
+                    action=self.name,
+                    event_heading=event["heading"],
+                    start_time=datetime.fromisoformat(event["startTimestamp"]),
+                    end_time=datetime.fromisoformat(end_timestamp)
+                    if end_timestamp
+                    else None,
+                    tournament_type=self.tournament_type,
+                    points_to_win=self.points_to_win,
+                    created_by_spond_id=self.spond_profile_id,
+                    player_spond_ids=player_spond_ids,
+                    court_names=self._extract_court_names(event),
+                )
+            )
+        return intents
+
+
+def timestamp(rng: random.Random, time: datetime) -> str:
+    """Format like Spond, with a random UTC offset and sometimes a Z suffix."""
+    formatted = time.astimezone(rng.choice(TIMEZONES)).isoformat()
+    return formatted.replace("+00:00", "Z")
+
+
+def random_members(rng: random.Random) -> list[dict]:
+    members = []
+    for i, player_id in enumerate(PLAYERS):
+        member = {"id": player_id, "firstName": f"First{i}", "lastName": f"Last{i}"}
+        # Actions skip members without a profile
+        if rng.random() < 0.8:
+            member["profile"] = {"id": str(UUID(int=rng.getrandbits(128)))}
+        members.append(member)
+    return members
+
+
+def random_event(
+    rng: random.Random, index: int, start: datetime, members: list[dict]
+) -> Event:
+    signed_up = rng.sample(PLAYERS, rng.randint(0, 20))
+    split = rng.randint(0, len(signed_up))
+    accepted, waitlisted = signed_up[:split], signed_up[split:]
+    # Spond keeps the lists disjoint, but nothing here relies on it
+    if accepted and rng.random() < 0.05:
+        waitlisted.append(rng.choice(accepted))
+    event_id = (
+        str(UUID(int=rng.getrandbits(128))) if rng.random() < 0.9 else f"event{index}"
+    )
+    duration = timedelta(minutes=rng.choice([60, 90, 120]))
+    return {
+        "id": event_id,
+        "heading": rng.choice(HEADINGS),
+        "seriesId": rng.choice(SERIES),
+        "description": rng.choice(["", "Court: 3", "Court: Centre court\nBring balls"]),
+        "startTimestamp": timestamp(rng, start),
+        "endTimestamp": timestamp(rng, start + duration),
+        "responses": {"acceptedIds": accepted, "waitinglistIds": waitlisted},
+        "recipients": {"group": {"members": members}},
+    }
+
+
+def random_snapshot(
+    rng: random.Random, grace_hours: int, quarantine_hours: int, minutes: int
+) -> Events:
+    """Random events around NOW, with many on the boundaries the rules care about."""
+    second = timedelta(seconds=1)
+    boundaries = [
+        NOW + timedelta(hours=grace_hours),
+        NOW + timedelta(days=7),
+        NOW + timedelta(minutes=minutes),
+        NOW,
+    ]
+    members = random_members(rng)
+    events: list[Event] = []
+    for _ in range(rng.randint(10, 60)):
+        if rng.random() < 0.3:
+            start = rng.choice(boundaries) + rng.choice([-second, 0 * second, second])
+        else:
+            start = NOW + timedelta(
+                minutes=rng.randrange(-9 * 24 * 60, 9 * 24 * 60, 30)
+            )
+        events.append(random_event(rng, len(events), start, members))
+
+    # Last week's events of upcoming events, found by series or by start time and title
+    for event in list(events):
+        start = datetime.fromisoformat(event["startTimestamp"])
+        if start <= NOW or rng.random() < 0.5:
+            continue
+        offset = timedelta(minutes=rng.choice([0, -90, 90, -91, 91, 45]))
+        previous = random_event(
+            rng, len(events), start - timedelta(days=7) + offset, members
+        )
+        previous["heading"] = rng.choice([event["heading"], rng.choice(HEADINGS)])
+        previous["seriesId"] = rng.choice([event["seriesId"], None])
+        # Quarantine ends at exactly NOW, or just before or after
+        if rng.random() < 0.3:
+            end = (
+                NOW
+                - timedelta(hours=quarantine_hours)
+                + rng.choice([-second, 0 * second, second])
+            )
+            if end > datetime.fromisoformat(previous["startTimestamp"]):
+                previous["endTimestamp"] = timestamp(rng, end)
+        events.append(previous)
+
+    rng.shuffle(events)
+    return Timeline(events).split(NOW)
+
+
+def random_added(rng: random.Random, events: Events) -> dict[str, set[str]]:
+    return {
+        event["id"]: set(rng.sample(PLAYERS, rng.randint(1, 15)))
+        for event in events.upcoming
+        if rng.random() < 0.7
+    }
+
+
+def make(cls, events: Events, **kwargs):
+    if issubclass(cls, ActionNacoCreateTournament):
+        return cls(
+            "action",
+            events,
+            header_regex=HEADER_REGEX,
+            spond_profile_id=CREATOR_SPOND_ID,
+            enforced=True,
+            clock=VirtualClock(NOW),
+            **kwargs,
+        )
+    return cls(
+        "rule",
+        events,
+        header_regex=HEADER_REGEX,
+        message="{firstName} {lastName}: {heading}",
+        enforced=True,
+        clock=VirtualClock(NOW),
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging(caplog):
+    caplog.set_level(logging.ERROR)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_max_events_per_week_matches_reference(seed, engine):
+    rng = random.Random(seed)
+    grace_hours = rng.choice(GRACE_HOURS)
+    events = random_snapshot(rng, grace_hours, 24, 5)
+    kwargs = {"max_events": rng.randint(0, 3), "grace_hours": grace_hours}
+    reference = make(ReferenceMaxEventsPerWeek, events, **kwargs)
+    rule = make(RuleMaxEventsPerWeek, events, engine=engine, **kwargs)
+
+    expected = reference.evaluate()
+    assert rule.evaluate() == expected
+    assert rule.expirationtimes() == reference.expirationtimes()
+    for hours in (0, 1, grace_hours, 50):
+        now = NOW + timedelta(hours=hours)
+        assert rule.next_expirationtime(now) == reference.next_expirationtime(now)
+
+    # Incremental evaluation finds exactly the removals of players with new sign-ups
+    added = random_added(rng, events)
+    players = set().union(*added.values())
+    assert rule.evaluate_incremental(added) == [
+        removal for removal in expected if removal.player_id in players
+    ]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_quarantine_after_event_matches_reference(seed, engine):
+    rng = random.Random(seed)
+    quarantine_hours = rng.choice(QUARANTINE_HOURS)
+    events = random_snapshot(rng, 24, quarantine_hours, 5)
+    kwargs = {"quarantine_hours": quarantine_hours}
+    reference = make(ReferenceQuarantineAfterEvent, events, **kwargs)
+    rule = make(RuleQuarantineAfterEvent, events, engine=engine, **kwargs)
+
+    expected = reference.evaluate()
+    assert rule.evaluate() == expected
+    assert rule.expirationtimes() == reference.expirationtimes()
+
+    added = random_added(rng, events)
+    assert rule.evaluate_incremental(added) == [
+        removal
+        for removal in expected
+        if removal.player_id in added.get(removal.event_id, set())
+    ]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_naco_create_tournament_matches_reference(seed):
+    rng = random.Random(seed)
+    minutes = rng.choice(MINUTES_BEFORE_START)
+    events = random_snapshot(rng, 24, 24, minutes)
+    kwargs = {"minutes_before_start": minutes, "points_to_win": rng.choice([None, 21])}
+    reference = make(ReferenceNacoCreateTournament, events, **kwargs)
+    action = make(ActionNacoCreateTournament, events, **kwargs)
+
+    assert action.evaluate() == reference.evaluate()
+    for offset in (0, 1, minutes, 24 * 60):
+        now = NOW + timedelta(minutes=offset)
+        assert action.next_expirationtime(now) == reference.next_expirationtime(now)
+
+
+def test_snapshots_cover_edge_cases():
+    """The generated snapshots exercise the cases the fast paths could get wrong."""
+    found = {
+        "max_events": 0,
+        "grace_boundary": 0,
+        "series": 0,
+        "title_fallback": 0,
+        "quarantine_boundary": 0,
+        "waitlist": 0,
+        "intents": 0,
+    }
+    for seed in SEEDS:
+        rng = random.Random(seed)
+        grace_hours = rng.choice(GRACE_HOURS)
+        events = random_snapshot(rng, grace_hours, 24, 5)
+        rule = make(ReferenceMaxEventsPerWeek, events, grace_hours=grace_hours)
+        removals = rule.evaluate()
+        found["max_events"] += len(removals)
+        found["waitlist"] += sum(
+            removal.player_id
+            in next(e for e in events.upcoming if e["id"] == removal.event_id)[
+                "responses"
+            ]["waitinglistIds"]
+            for removal in removals
+        )
+        grace_start = NOW + timedelta(hours=grace_hours)
+        found["grace_boundary"] += sum(
+            datetime.fromisoformat(event["startTimestamp"]) == grace_start
+            and bool(re.search(HEADER_REGEX, event["heading"], re.IGNORECASE))
+            for event in events.upcoming
+        )
+
+        quarantine = make(ReferenceQuarantineAfterEvent, events, quarantine_hours=24)
+        for event in events.upcoming:
+            if not quarantine._isactive(event):
+                continue
+            if get_last_event_in_series(event, events.previous):
+                found["series"] += 1
+            else:
+                found["title_fallback"] += 1
+            last_end = quarantine._get_last_event_endtime(event)
+            if last_end == NOW - timedelta(hours=24):
+                found["quarantine_boundary"] += 1
+
+        action = make(ReferenceNacoCreateTournament, events, minutes_before_start=5)
+        found["intents"] += len(action.evaluate())
+    assert all(found.values()), found
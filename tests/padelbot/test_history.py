@@ -0,0 +1,83 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from src.padelbot.history import AttendanceHistory
+
+START = datetime(2026, 5, 4, 18, 0, tzinfo=UTC)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = AttendanceHistory(str(tmp_path / "history.sqlite3"))
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def events(make_event):
+    return [
+        make_event(
+            "e1", START - timedelta(days=40), ["p1", "p2"], ["w1"], series_id="s1"
+        ),
+        make_event("e2", START - timedelta(days=20), ["p1"], ["w1"], series_id="s1"),
+        make_event(
+            "e3", START - timedelta(days=3), ["p1", "p3"], ["w1"], series_id="s2"
+        ),
+    ]
+
+
+def test_ingest_stores_each_event_once(history, events, make_event):
+    assert history.ingest(events) == 3
+    assert history.ingest(events) == 0
+    assert history.ingest(events + [make_event("e4", START, ["p2"])]) == 1
+    assert history.count_attended("p2", START - timedelta(days=60), START) == 1
+
+
+@pytest.mark.asyncio
+async def test_ingest_in_worker_thread(history, events):
+    assert await asyncio.to_thread(history.ingest, events) == 3
+    assert history.count_attended("p1", START - timedelta(days=60), START) == 3
+
+
+def test_ingested_events_survive_reopening(tmp_path, history, events):
+    history.ingest(events)
+    reopened = AttendanceHistory(history.path)
+    assert reopened.ingested_event_ids == {"e1", "e2", "e3"}
+    assert reopened.ingest(events) == 0
+    reopened.close()
+
+
+def test_attendance_over_window(history, events):
+    history.ingest(events)
+    since = START - timedelta(days=30)
+    attended = history.attended_events("p1", since, START)
+    assert [event["id"] for event in attended] == ["e2", "e3"]
+    assert datetime.fromisoformat(attended[0]["startTimestamp"]) == START - timedelta(
+        days=20
+    )
+    assert history.count_attended("p1", since, START) == 2
+    assert history.count_attended("p1", START - timedelta(days=60), START) == 3
+    # Waiting list players did not attend
+    assert history.count_attended("w1", START - timedelta(days=60), START) == 0
+
+
+def test_attendance_counts(history, events):
+    history.ingest(events)
+    assert history.attendance_counts(START - timedelta(days=60), START) == {
+        "p1": 3,
+        "p2": 1,
+        "p3": 1,
+    }
+    assert history.attendance_counts(START - timedelta(days=10), START) == {
+        "p1": 1,
+        "p3": 1,
+    }
+
+
+def test_last_event_in_series(history, events):
+    history.ingest(events)
+    assert history.last_event_in_series("s1", START)["id"] == "e2"
+    assert history.last_event_in_series("s1", START - timedelta(days=30))["id"] == "e1"
+    assert history.last_event_in_series("s3", START) is None
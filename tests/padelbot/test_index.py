@@ -0,0 +1,77 @@
+import random
+from datetime import UTC, datetime, timedelta
+
+from src.padelbot.index import PreviousEventIndex, normalize_heading, previous_index
+from src.padelbot.utils import (
+    Events,
+    get_last_event_from_timestamp_and_title,
+    get_last_event_in_series,
+)
+
+# Monday 00:30 UTC, so that "last week" lookups wrap around the end of the week
+MONDAY = datetime(2026, 5, 4, 0, 30, tzinfo=UTC)
+
+
+def test_normalize_heading():
+    assert normalize_heading("  Tuesday   AMERICANO ") == "tuesday americano"
+
+
+def test_last_event_in_series(make_event):
+    previous = [
+        make_event("p1", MONDAY - timedelta(days=7), series_id="s1"),
+        make_event("p2", MONDAY - timedelta(days=3), series_id="s1"),
+        make_event("p3", MONDAY - timedelta(days=1), series_id="s2"),
+    ]
+    index = PreviousEventIndex(previous)
+    assert index.last_event_in_series({"seriesId": "s1"})["id"] == "p2"
+    assert index.last_event_in_series({"seriesId": "s3"}) is None
+    assert index.last_event_in_series({}) is None
+
+
+def test_last_event_from_timestamp_and_title_across_week_boundary(make_event):
+    previous = [
+        # Sunday 23:30 UTC the week before, one hour earlier than a week ago
+        make_event("p1", MONDAY - timedelta(days=7, hours=1)),
+        make_event("p2", MONDAY - timedelta(days=7, hours=-2)),
+        make_event("p3", MONDAY - timedelta(days=7), heading="Mexicano"),
+    ]
+    index = PreviousEventIndex(previous)
+    event = make_event("u1", MONDAY)
+    assert index.last_event_from_timestamp_and_title(event)["id"] == "p1"
+
+
+def test_heading_must_match_exactly(make_event):
+    previous = [make_event("p1", MONDAY - timedelta(days=7), heading="americano ")]
+    index = PreviousEventIndex(previous)
+    assert index.last_event_from_timestamp_and_title(make_event("u1", MONDAY)) is None
+
+
+def test_matches_linear_scan(make_event):
+    rng = random.Random(30)
+    headings = ["Americano", "Mexicano", "americano"]
+    previous = [
+        make_event(
+            f"p{i}",
+            MONDAY - timedelta(minutes=rng.randrange(0, 14 * 24 * 60, 15)),
+            heading=rng.choice(headings),
+            series_id=rng.choice([None, "s1", "s2"]),
+        )
+        for i in range(300)
+    ]
+    upcoming = [
+        make_event(
+            f"u{i}",
+            MONDAY + timedelta(minutes=rng.randrange(0, 7 * 24 * 60, 15)),
+            heading=rng.choice(headings),
+            series_id=rng.choice([None, "s1", "s2", "s3"]),
+        )
+        for i in range(100)
+    ]
+    index = previous_index(Events(previous=previous))
+    for event in upcoming:
+        assert index.last_event_in_series(event) is get_last_event_in_series(
+            event, previous
+        )
+        assert index.last_event_from_timestamp_and_title(
+            event
+        ) is get_last_event_from_timestamp_and_title(event, previous)
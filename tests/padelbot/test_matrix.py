@@ -0,0 +1,157 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.rules.max_events_per_week import RuleMaxEventsPerWeek
+from src.padelbot.rules.quarantine_after_event import RuleQuarantineAfterEvent
+from src.padelbot.timeline import Timeline
+
+np = pytest.importorskip("numpy")
+
+from src.padelbot.matrix import AttendanceMatrix, resolve_engine  # noqa: E402
+
+NOW = datetime(2026, 5, 6, 12, 0).astimezone()
+HEADINGS = ["Americano", "Mexicano", "Social"]
+PLAYERS = [f"player{i}" for i in range(40)]
+MEMBERS = [{"id": id, "firstName": id, "lastName": "Test"} for id in PLAYERS]
+
+
+def random_events(rng):
+    events = []
+    for i in range(rng.randint(1, 30)):
+        start = NOW + timedelta(minutes=rng.randrange(-14 * 24 * 60, 9 * 24 * 60, 30))
+        signed_up = rng.sample(PLAYERS, rng.randint(0, 16))
+        split = rng.randint(0, len(signed_up))
+        events.append(
+            {
+                "id": f"event{i}",
+                "heading": rng.choice(HEADINGS),
+                "seriesId": rng.choice([None, "series1", "series2"]),
+                "startTimestamp": start.isoformat(),
+                "endTimestamp": (start + timedelta(hours=2)).isoformat(),
+                "responses": {
+                    "acceptedIds": signed_up[:split],
+                    "waitinglistIds": signed_up[split:],
+                },
+                "recipients": {"group": {"members": MEMBERS}},
+            }
+        )
+    return Timeline(events).split(NOW)
+
+
+def make_rules(rule_cls, events, engine, **kwargs):
+    return rule_cls(
+        "rule",
+        events,
+        header_regex="Americano|Mexicano",
+        message="Hi {firstName}",
+        enforced=True,
+        engine=engine,
+        clock=VirtualClock(NOW),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("seed", range(200))
+@pytest.mark.parametrize(
+    "rule_cls,kwargs",
+    [
+        (RuleMaxEventsPerWeek, {"max_events": 1}),
+        (RuleMaxEventsPerWeek, {"max_events": 2, "grace_hours": 0}),
+        (RuleQuarantineAfterEvent, {"quarantine_hours": 24 * 7}),
+    ],
+)
+def test_matrix_engine_matches_python_engine(seed, rule_cls, kwargs):
+    rng = random.Random(seed)
+    events = random_events(rng)
+    python = make_rules(rule_cls, events, "python", **kwargs)
+    matrix = make_rules(rule_cls, events, "matrix", **kwargs)
+    assert matrix.evaluate() == python.evaluate()
+
+    added = {event["id"]: set(rng.sample(PLAYERS, 8)) for event in events.upcoming}
+    assert matrix.evaluate_incremental(added) == python.evaluate_incremental(added)
+
+
+def test_matrix_contents():
+    events = [
+        {
+            "id": "e1",
+            "startTimestamp": NOW.isoformat(),
+            "responses": {"acceptedIds": ["a", "b"], "waitinglistIds": ["c"]},
+        },
+        {
+            "id": "e2",
+            "startTimestamp": (NOW + timedelta(days=1)).isoformat(),
+            "responses": {"acceptedIds": ["c"], "waitinglistIds": []},
+        },
+    ]
+    matrix = AttendanceMatrix(events)
+    assert matrix.players == ["a", "b", "c"]
+    assert matrix.columns == {"e1": 0, "e2": 1}
+    assert matrix.accepted.tolist() == [[True, False], [True, False], [False, True]]
+    assert matrix.waitlisted.tolist() == [[False, False], [False, False], [True, False]]
+    assert matrix.accepted_rank[1, 0] == 1
+    assert matrix.row_mask({"c", "unknown"}).tolist() == [False, False, True]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_replace_event_matches_rebuilt_matrix(seed):
+    rng = random.Random(seed)
+    events = random_events(rng).upcoming
+    matrix = AttendanceMatrix(events)
+    accepted = matrix.accepted.copy()
+
+    index = rng.randrange(len(events))
+    responses = events[index]["responses"]
+    updated = {
+        **events[index],
+        "responses": {
+            "acceptedIds": responses["acceptedIds"][1:],
+            "waitinglistIds": responses["waitinglistIds"][:-1],
+        },
+    }
+    replaced = matrix.replace_event(updated)
+    rebuilt = AttendanceMatrix([*events[:index], updated, *events[index + 1 :]])
+    assert replaced.events == rebuilt.events
+    assert replaced.rows == matrix.rows
+    for name in ("accepted_rank", "waitlist_rank"):
+        actual, expected = getattr(replaced, name), getattr(rebuilt, name)
+        for player, row in replaced.rows.items():
+            if player in rebuilt.rows:
+                assert actual[row].tolist() == expected[rebuilt.rows[player]].tolist()
+            else:
+                # No longer signed up for any event
+                assert (actual[row] == -1).all()
+    assert (replaced.accepted == (replaced.accepted_rank != -1)).all()
+    assert (replaced.waitlisted == (replaced.waitlist_rank != -1)).all()
+    # The matrix of the published snapshot is left untouched
+    assert (matrix.accepted == accepted).all()
+
+
+def test_replace_event_copies_arrays_once():
+    events = random_events(random.Random(0)).upcoming
+    matrix = AttendanceMatrix(events)
+    accepted = matrix.accepted.copy()
+
+    first = matrix.replace_event({**events[0], "responses": {}})
+    second = first.replace_event({**events[1], "responses": {}})
+    assert first.accepted is not matrix.accepted
+    assert second.accepted is first.accepted
+    assert not second.accepted[:, :2].any()
+    assert (second.accepted[:, 2:] == accepted[:, 2:]).all()
+    assert (matrix.accepted == accepted).all()
+
+
+def test_replace_event_with_new_player_rebuilds():
+    events = [{"id": "e1", "startTimestamp": NOW.isoformat(), "responses": {}}]
+    matrix = AttendanceMatrix(events)
+    updated = {**events[0], "responses": {"acceptedIds": ["a"]}}
+    assert matrix.replace_event(updated).players == ["a"]
+
+
+def test_resolve_engine():
+    assert resolve_engine("rule", "matrix") == "matrix"
+    with pytest.raises(ValueError):
+        resolve_engine("rule", "gpu")
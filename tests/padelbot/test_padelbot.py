@@ -1,6 +1,11 @@
-from datetime import datetime, timedelta
+import json
+import logging
+import os
+import tomllib
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import UUID
 
 import pytest
@@ -9,15 +14,27 @@ from naco_backend_client.models.user import User
 from naco_backend_client.types import Response
 
 from src.padelbot.actions.actionbase import ActionIntent
-from src.padelbot.actions.naco_create_tournament import CreateTournamentIntent
+from src.padelbot.actions.naco_create_tournament import (
+    ActionNacoCreateTournament,
+    CreateTournamentIntent,
+)
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.core.config import ConfigWatcher
+from src.padelbot.core.logger import ContextFilter
+from src.padelbot.core.tracing import TRACER
 from src.padelbot.naco.registrar import NacoRegistrar
-from src.padelbot.padelbot import PadelBot
-from src.padelbot.rules.rulebase import RuleBase
+from src.padelbot.padelbot import (
+    LOOKBACK_MARGIN,
+    MAX_EVENTS,
+    SPOND_FILTER_MARGIN,
+    PadelBot,
+)
+from src.padelbot.rules.rulebase import RemovalInfo, RuleBase
 from src.padelbot.utils import Events
 
 
 @pytest.fixture
-def cfg():
+def cfg(tmp_path):
     return {
         "auth": {"username": "user", "password": "pass", "group_id": "group-id"},
         "rules": {
@@ -25,11 +42,16 @@ def cfg():
             "rule2": {"rule": "DummyRule2"},
         },
         "actions": {},
-        "general": {"seconds_to_sleep": 10},
+        "general": {
+            "seconds_to_sleep": 10,
+            "history_file": str(tmp_path / "history.sqlite3"),
+            "audit_file": str(tmp_path / "audit.sqlite3"),
+        },
         "naco": {
             "enabled": True,
             "base_url": "http://localhost:8000",
             "api_key": "test-key",
+            "outbox_file": str(tmp_path / "naco_outbox.json"),
         },
     }
 
@@ -87,10 +109,88 @@ async def mockbot(cfg):
         patch.object(bot.spond, "send_message", new_callable=AsyncMock),
         patch.object(bot.spond, "get_events", new_callable=AsyncMock),
         patch.object(bot.spond, "get_person", new_callable=AsyncMock),
+        patch.object(bot.spond, "get_group", new_callable=AsyncMock),
     ):
         yield bot
 
 
+def removal_rule(name="quarantine", event_id="event1-id"):
+    """A rule removing Alice from `event_id` every cycle."""
+
+    class RemovalRule(RuleBase):
+        def __init__(self):
+            self.name = name
+
+        def evaluate(self):
+            return [
+                RemovalInfo(
+                    player_id="alice-id",
+                    event_id=event_id,
+                    message="bye",
+                    enforced=True,
+                    rule=self.name,
+                )
+            ]
+
+        def expirationtimes(self):
+            return []
+
+    return RemovalRule()
+
+
+def spond_get_events(events):
+    """Return a fake of Spond.get_events() over `events`, which like Spond truncates
+    the end filters to their date and reads them as midnight UTC."""
+
+    def truncate(dt):
+        return datetime.fromisoformat(dt.strftime("%Y-%m-%dT00:00:00.000Z"))
+
+    async def get_events(group_id, min_end=None, max_end=None, max_events=100):
+        return [
+            e
+            for e in events
+            if (
+                min_end is None
+                or datetime.fromisoformat(e["endTimestamp"]) >= truncate(min_end)
+            )
+            and (
+                max_end is None
+                or datetime.fromisoformat(e["endTimestamp"]) <= truncate(max_end)
+            )
+        ][:max_events]
+
+    return get_events
+
+
+async def run_cycle(bot, rules, actions=(), events=None, get_events=None):
+    """Run a cycle of `bot` with `rules` and `actions`, without sleeping after it or
+    registering players in Naco. get_events() returns `events`, or the result of
+    the `get_events` side effect, and fetches from the Spond client if neither is
+    given."""
+    with ExitStack() as stack:
+        if events is not None or get_events is not None:
+            stack.enter_context(
+                patch.object(
+                    bot,
+                    "get_events",
+                    new_callable=AsyncMock,
+                    return_value=events,
+                    side_effect=get_events,
+                )
+            )
+        stack.enter_context(
+            patch.object(
+                bot.naco_registrar, "register_event_users", new_callable=AsyncMock
+            )
+        )
+        stack.enter_context(patch.object(bot, "get_rules", return_value=list(rules)))
+        stack.enter_context(
+            patch.object(bot, "get_actions", return_value=list(actions))
+        )
+        stack.enter_context(patch("asyncio.sleep", new_callable=AsyncMock))
+        await bot.run()
+
+
 class TestGetEvents:
     @pytest.mark.asyncio
     async def test_get_events_categorizes_events(self, mockbot):
@@ -101,10 +201,10 @@ class TestGetEvents:
                 "startTimestamp": (now + timedelta(days=1)).isoformat(),
                 "endTimestamp": (now + timedelta(days=1, hours=2)).isoformat(),
             },
-            {  # Previous
+            {  # Previous, within the lookback
                 "id": "previous1",
-                "startTimestamp": (now - timedelta(days=2)).isoformat(),
-                "endTimestamp": (now - timedelta(days=2, hours=-2)).isoformat(),
+                "startTimestamp": (now - timedelta(hours=6)).isoformat(),
+                "endTimestamp": (now - timedelta(hours=4)).isoformat(),
             },
             {  # Upcoming
                 "id": "upcoming2",
@@ -124,6 +224,122 @@ class TestGetEvents:
         assert {e["id"] for e in events.previous} == {"previous1"}
         assert {e["id"] for e in events.ongoing} == {"ongoing1"}
 
+    @pytest.mark.asyncio
+    async def test_get_events_uses_cycle_clock(self, mockbot):
+        start = datetime(2026, 5, 1, 18, 0).astimezone()
+        events_data = [
+            {
+                "id": "event1",
+                "startTimestamp": start.isoformat(),
+                "endTimestamp": (start + timedelta(hours=2)).isoformat(),
+            },
+        ]
+        mockbot.spond.get_events.return_value = events_data
+
+        mockbot.clock = VirtualClock(start - timedelta(hours=1))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).upcoming] == ["event1"]
+
+        mockbot.clock.advance(timedelta(hours=2))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).ongoing] == ["event1"]
+
+        mockbot.clock.advance(timedelta(hours=2))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).previous] == ["event1"]
+
+    @pytest.mark.asyncio
+    async def test_ended_events_are_fetched_once(self, mockbot):
+        start = datetime(2026, 5, 1, 18, 0).astimezone()
+
+        def make_event(id, start):
+            return {
+                "id": id,
+                "startTimestamp": start.isoformat(),
+                "endTimestamp": (start + timedelta(hours=2)).isoformat(),
+            }
+
+        ended = make_event("ended", start - timedelta(hours=12))
+        ongoing = make_event("ongoing", start - timedelta(hours=1))
+        upcoming = make_event("upcoming", start + timedelta(days=1))
+
+        mockbot.spond.get_events.side_effect = spond_get_events(
+            [ended, ongoing, upcoming]
+        )
+        mockbot.clock = VirtualClock(start)
+        mockbot.clock.tick()
+        events = await mockbot.get_events()
+        assert [e["id"] for e in events.previous] == ["ended"]
+        assert [e["id"] for e in events.ongoing] == ["ongoing"]
+        assert mockbot.spond.get_events.await_count == 2
+
+        # The ongoing event ends and is kept without fetching ended events again
+        mockbot.clock.advance(timedelta(hours=2))
+        mockbot.clock.tick()
+        events = await mockbot.get_events()
+        assert [e["id"] for e in events.previous] == ["ended", "ongoing"]
+        assert [e["id"] for e in events.upcoming] == ["upcoming"]
+        assert mockbot.spond.get_events.await_count == 3
+        assert mockbot.spond.get_events.await_args.kwargs["min_end"] == (
+            mockbot.clock.now() - SPOND_FILTER_MARGIN
+        )
+
+        # Ended events are dropped once they are older than the lookback
+        mockbot.clock.set(start + mockbot.get_lookback())
+        mockbot.clock.tick()
+        events = await mockbot.get_events()
+        assert [e["id"] for e in events.previous] == ["ongoing"]
+
+    @pytest.mark.asyncio
+    async def test_ongoing_events_are_kept_after_local_midnight(self, mockbot):
+        # 00:30 in Oslo is still the previous day in UTC, but Spond reads the
+        # filters as midnight UTC of the local date
+        oslo = timezone(timedelta(hours=2))
+        start = datetime(2026, 5, 1, 23, 0, tzinfo=oslo)
+        late = {
+            "id": "late",
+            "startTimestamp": start.isoformat(),
+            "endTimestamp": (start + timedelta(hours=2)).isoformat(),
+        }
+        mockbot.spond.get_events.side_effect = spond_get_events([late])
+        mockbot.clock = VirtualClock(start - timedelta(hours=1))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).upcoming] == ["late"]
+
+        mockbot.clock.set(start + timedelta(minutes=90))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).ongoing] == ["late"]
+        assert mockbot.spond.get_events.await_args.kwargs["max_events"] == MAX_EVENTS
+
+        mockbot.clock.set(start + timedelta(hours=3))
+        mockbot.clock.tick()
+        assert [e["id"] for e in (await mockbot.get_events()).previous] == ["late"]
+
+    def test_lookback_follows_quarantine_rules(self, mockbot):
+        mockbot.cfg["rules"] = {
+            "short": {"type": "QuarantineAfterEvent", "quarantine_hours": 12},
+            "long": {"type": "QuarantineAfterEvent", "quarantine_hours": 72},
+            "other": {"type": "MaxEventsPerWeek"},
+        }
+        assert mockbot.get_lookback() == timedelta(hours=72) + LOOKBACK_MARGIN
+        mockbot.cfg["rules"] = {}
+        assert mockbot.get_lookback() == LOOKBACK_MARGIN
+
+    @pytest.mark.asyncio
+    async def test_get_events_projects_fields(self, mockbot):
+        now = datetime.now().astimezone()
+        mockbot.cfg["actions"] = {"naco": {"type": "NacoCreateTournament"}}
+        mockbot.spond.get_events.return_value = [
+            {
+                "id": "upcoming1",
+                "startTimestamp": (now + timedelta(days=1)).isoformat(),
+                "description": "Court: 1",
+                "attachments": [],
+            }
+        ]
+        events = await mockbot.get_events()
+        assert set(events.upcoming[0]) == {"id", "startTimestamp", "description"}
+
     @pytest.mark.asyncio
     async def test_get_events_empty(self, mockbot):
         mockbot.spond.get_events.return_value = []
@@ -134,7 +350,7 @@ class TestGetEvents:
 
 
 class TestGetRules:
-    def dummy_create_rule(self, name, events, rule_def):
+    def dummy_create_rule(self, name, events, rule_def, clock=None):
         class DummyRule:
             def expirationtimes(self):
                 return []
@@ -273,6 +489,19 @@ class TestUpdateEventsWithRemoval:
             "david-id",
         ]
 
+    @pytest.mark.asyncio
+    async def test_does_not_mutate_original(self, cfg, events):
+        bot = PadelBot(cfg)
+        updated = bot.update_events_with_removal("alice-id", "event1-id", events)
+        assert events.upcoming[0]["responses"]["acceptedIds"] == ["alice-id", "bob-id"]
+        assert updated.upcoming[0] is not events.upcoming[0]
+        # Unaffected events are shared with the original snapshot
+        assert updated.upcoming[1] is events.upcoming[1]
+        assert (
+            updated.upcoming[0]["responses"]["waitinglistIds"]
+            is events.upcoming[0]["responses"]["waitinglistIds"]
+        )
+
 
 class TestRemovePlayerFromEvent:
     @pytest.mark.asyncio
@@ -521,9 +750,7 @@ class TestExecuteAction:
             event_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
             enforced=True,
             event_heading="Tuesday Americano",
-            start_time=datetime(
-                2026, 5, 1, 18, 0, tzinfo=datetime.now().astimezone().tzinfo
-            ),
+            start_time=datetime.now().astimezone() + timedelta(minutes=5),
             tournament_type="americano",
             created_by_spond_id=UUID("11111111-1111-1111-1111-111111111111"),
             player_spond_ids=[UUID("22222222-2222-2222-2222-222222222222")],
@@ -535,7 +762,13 @@ class TestExecuteAction:
             return_value=True,
         ) as mock_create:
             result = await mockbot.execute_action(intent)
-        assert result is True
+            assert result is True
+            assert intent.event_id in mockbot.naco_outbox.entries
+            # The tournament is already pending
+            assert await mockbot.execute_action(intent) is False
+            # Delivery happens in the background worker
+            await mockbot.naco_outbox._task
+        assert mockbot.naco_outbox.entries == {}
         mock_create.assert_awaited_once_with(
             event_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
             event_heading="Tuesday Americano",
@@ -590,6 +823,7 @@ class TestRunActions:
             {
                 "evaluate": lambda self: [intent],
                 "expirationtimes": lambda self: [],
+                "next_expirationtime": lambda self, now: None,
             },
         )()
         with (
@@ -627,6 +861,7 @@ class TestRunActions:
             {
                 "evaluate": lambda self: [intent],
                 "expirationtimes": lambda self: [],
+                "next_expirationtime": lambda self, now: None,
             },
         )()
         with (
@@ -664,6 +899,7 @@ class TestRunActions:
             {
                 "evaluate": lambda self: [intent],
                 "expirationtimes": lambda self: [],
+                "next_expirationtime": lambda self, now: None,
             },
         )()
         with (
@@ -682,3 +918,416 @@ class TestRunActions:
         ):
             await mockbot.run()
         mock_exec.assert_not_awaited()
+
+
+class TestRunPublishesSnapshot:
+    @pytest.mark.asyncio
+    async def test_published_snapshot_contains_removals(self, mockbot, events):
+        mockbot.first_run = True
+
+        class DummyRule(RuleBase):
+            def __init__(self):
+                pass
+
+            def evaluate(self):
+                return [
+                    RemovalInfo(
+                        player_id="alice-id",
+                        event_id="event1-id",
+                        message="bye",
+                        enforced=True,
+                    )
+                ]
+
+            def expirationtimes(self):
+                return []
+
+        with (
+            patch.object(
+                mockbot, "get_events", new_callable=AsyncMock, return_value=events
+            ),
+            patch.object(
+                mockbot.naco_registrar, "register_event_users", new_callable=AsyncMock
+            ),
+            patch.object(mockbot, "get_rules", return_value=[DummyRule()]),
+            patch.object(mockbot, "get_actions", return_value=[]),
+            patch("asyncio.sleep", new_callable=AsyncMock),
+        ):
+            await mockbot.run()
+
+        assert mockbot.events.version == 1
+        assert mockbot.events.upcoming[0]["responses"]["acceptedIds"] == ["bob-id"]
+        # The fetched snapshot itself is never mutated
+        assert events.upcoming[0]["responses"]["acceptedIds"] == ["alice-id", "bob-id"]
+
+
+class TestAudit:
+    async def run(self, bot, events, actions=()):
+        with patch.object(bot, "execute_action", new_callable=AsyncMock):
+            await run_cycle(bot, [removal_rule()], actions, events=events)
+
+    @pytest.mark.asyncio
+    async def test_removals_are_recorded_with_outcome(self, mockbot, events):
+        await self.run(mockbot, events)
+        mockbot.spond.change_response.side_effect = Exception("Spond is down")
+        await self.run(mockbot, events)
+        mockbot.spond.change_response.side_effect = None
+        await self.run(mockbot, events)
+
+        decisions = mockbot.audit.query(player_id="alice-id")
+        assert [d["outcome"] for d in decisions] == ["removed", "failed", "first_run"]
+        assert [d["cycle"] for d in decisions] == [3, 2, 1]
+        assert {d["source"] for d in decisions} == {"quarantine"}
+        assert decisions[0]["detail"] == "bye"
+
+    @pytest.mark.asyncio
+    async def test_intents_are_recorded(self, mockbot, events):
+        mockbot.first_run = False
+        intent = CreateTournamentIntent(
+            event_id="event2-id",
+            enforced=True,
+            action="naco",
+            event_heading="Tuesday Americano",
+            created_by_spond_id=UUID("11111111-1111-1111-1111-111111111111"),
+            start_time=datetime(2026, 5, 1, 18, 0).astimezone(),
+        )
+        action = MagicMock()
+        action.evaluate.return_value = [intent]
+        action.expirationtimes.return_value = []
+        action.next_expirationtime.return_value = None
+        await self.run(mockbot, events, [action])
+
+        [decision] = mockbot.audit.query(kind="tournament")
+        assert decision["source"] == "naco"
+        assert decision["eventId"] == "event2-id"
+        assert decision["outcome"] == "queued"
+        assert decision["detail"] == "Tuesday Americano"
+
+    @pytest.mark.asyncio
+    async def test_intents_exclude_players_removed_in_the_cycle(self, mockbot, events):
+        mockbot.first_run = False
+        start = datetime.now().astimezone() + timedelta(minutes=3)
+        event = events.upcoming[0]
+        event["id"] = "11111111-1111-1111-1111-111111111111"
+        event["startTimestamp"] = start.isoformat()
+        for index, member in enumerate(event["recipients"]["group"]["members"]):
+            member["profile"] = {"id": f"{index}0000000-0000-0000-0000-000000000000"}
+        action = ActionNacoCreateTournament(
+            "naco",
+            events,
+            header_regex="Padel",
+            spond_profile_id="22222222-2222-2222-2222-222222222222",
+            enforced=True,
+        )
+        rule = removal_rule(event_id=event["id"])
+        with patch.object(mockbot, "execute_action", new_callable=AsyncMock) as execute:
+            await run_cycle(mockbot, [rule], [action], events=events)
+
+        [[intent], _] = execute.await_args
+        assert intent.event_id == event["id"]
+        assert intent.player_spond_ids == [UUID("10000000-0000-0000-0000-000000000000")]
+
+
+class TestTracing:
+    @pytest.mark.asyncio
+    async def test_cycle_is_traced(self, cfg, events, tmp_path):
+        start = datetime.now().astimezone() + timedelta(days=1)
+        for event in events.upcoming:
+            event["startTimestamp"] = start.isoformat()
+            event["endTimestamp"] = (start + timedelta(hours=2)).isoformat()
+        spond_client = MagicMock()
+        for method in ("get_events", "get_group", "change_response", "send_message"):
+            setattr(spond_client, method, AsyncMock())
+        spond_client.get_profile = AsyncMock(return_value={"id": "profile-id"})
+        spond_client.get_events.return_value = events.upcoming
+        spond_client.get_group.return_value = {"members": []}
+        bot = PadelBot(cfg, spond_client=spond_client)
+        bot.first_run = False
+
+        path = tmp_path / "trace.json"
+        TRACER.configure(str(path))
+        try:
+            await run_cycle(bot, [removal_rule()])
+        finally:
+            TRACER.configure(None)
+        with open(path) as f:
+            spans = json.loads(f.read().rstrip().rstrip(",") + "]")
+        ids = {
+            span["name"]: span["args"]["span"] for span in spans if span["ph"] == "X"
+        }
+        parents = {
+            span["name"]: span["args"]["parent"] for span in spans if span["ph"] == "X"
+        }
+        assert parents["cycle"] is None
+        for name in ("get_events", "quarantine", "remove_player_from_event"):
+            assert parents[name] == ids["cycle"]
+        # Spond calls are traced where they are made
+        for name in ("spond.get_events", "spond.get_group"):
+            assert parents[name] == ids["get_events"]
+        assert parents["spond.change_response"] == ids["remove_player_from_event"]
+
+
+class TestCycleMemo:
+    def make_rule(self, removals):
+        class CountingRule(RuleBase):
+            evaluations = 0
+
+            def __init__(self):
+                pass
+
+            def evaluate(self):
+                CountingRule.evaluations += 1
+                return removals
+
+            def expirationtimes(self):
+                return []
+
+        return CountingRule()
+
+    async def run(self, bot, events, rule, get_events=None):
+        await run_cycle(bot, [rule], events=events, get_events=get_events)
+
+    @pytest.mark.asyncio
+    async def test_unchanged_cycle_is_skipped(self, mockbot, events):
+        mockbot.first_run = False
+        rule = self.make_rule([])
+        await self.run(mockbot, events, rule)
+        await self.run(mockbot, events, rule)
+        assert type(rule).evaluations == 1
+        assert mockbot.skipped_cycles == 1
+        assert mockbot.events.version == 2
+
+    @pytest.mark.asyncio
+    async def test_cycle_with_changed_action_field_is_evaluated(self, mockbot, events):
+        mockbot.first_run = False
+        mockbot.cfg["actions"] = {"naco": {"type": "NacoCreateTournament"}}
+        rule = self.make_rule([])
+        await self.run(mockbot, events, rule)
+        # Only the description, from which the action reads the court, changes
+        changed = Events(
+            upcoming=[{**events.upcoming[0], "description": "Court: 2"}]
+            + events.upcoming[1:]
+        )
+        await self.run(mockbot, changed, rule)
+        assert type(rule).evaluations == 2
+        assert mockbot.skipped_cycles == 0
+
+    @pytest.mark.asyncio
+    async def test_changed_responses_are_evaluated(self, mockbot, events):
+        mockbot.first_run = False
+        rule = self.make_rule([])
+        await self.run(mockbot, events, rule)
+        events.upcoming[1] = {
+            **events.upcoming[1],
+            "responses": {
+                **events.upcoming[1]["responses"],
+                "acceptedIds": ["alice-id"],
+            },
+        }
+        await self.run(mockbot, events, rule)
+        assert type(rule).evaluations == 2
+        assert mockbot.skipped_cycles == 0
+
+    @pytest.mark.asyncio
+    async def test_first_run_is_never_remembered(self, mockbot, events):
+        rule = self.make_rule([])
+        await self.run(mockbot, events, rule)
+        await self.run(mockbot, events, rule)
+        assert type(rule).evaluations == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_removal_is_retried(self, mockbot, events):
+        mockbot.first_run = False
+        mockbot.spond.change_response.side_effect = Exception("spond error")
+        removal = RemovalInfo(
+            player_id="alice-id", event_id="event1-id", message="bye", enforced=True
+        )
+        rule = self.make_rule([removal])
+        await self.run(mockbot, events, rule)
+        await self.run(mockbot, events, rule)
+        assert type(rule).evaluations == 2
+
+    @pytest.mark.asyncio
+    async def test_cycles_are_counted_when_fetching_fails(self, mockbot, events):
+        cycles = []
+
+        def fetch():
+            record = logging.makeLogRecord({})
+            ContextFilter().filter(record)
+            cycles.append(record.cycle)
+            if len(cycles) == 1:
+                raise RuntimeError("Spond is down")
+            return events
+
+        rule = self.make_rule([])
+        with pytest.raises(RuntimeError):
+            await self.run(mockbot, events, rule, get_events=fetch)
+        await self.run(mockbot, events, rule, get_events=fetch)
+        # The failed cycle published no snapshot, but has an id of its own
+        assert mockbot.events.version == 1
+        assert cycles == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_signup_after_removal_is_evaluated(self, mockbot, events):
+        mockbot.first_run = False
+        removal = RemovalInfo(
+            player_id="alice-id", event_id="event1-id", message="bye", enforced=True
+        )
+        rule = self.make_rule([removal])
+        await self.run(mockbot, events, rule)
+        # Alice signed up again, so Spond returns the same events as last time
+        await self.run(mockbot, events, rule)
+        assert type(rule).evaluations == 2
+        assert mockbot.skipped_cycles == 0
+        assert mockbot.spond.change_response.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_signup_after_removal_is_evaluated_incrementally(
+        self, mockbot, events
+    ):
+        mockbot.first_run = False
+        removal = RemovalInfo(
+            player_id="alice-id", event_id="event1-id", message="bye", enforced=True
+        )
+        rule = self.make_rule([removal])
+        rule.evaluate_incremental = MagicMock(return_value=[])
+        await self.run(mockbot, events, rule)
+        await self.run(mockbot, events, rule)
+        rule.evaluate_incremental.assert_called_once_with({"event1-id": {"alice-id"}})
+
+    @pytest.mark.asyncio
+    async def test_new_signups_are_evaluated_incrementally(self, mockbot, events):
+        mockbot.first_run = False
+        rule = self.make_rule([])
+        rule.evaluate_incremental = MagicMock(return_value=[])
+        await self.run(mockbot, events, rule)
+        rule.evaluate_incremental.assert_not_called()
+
+        events.upcoming[1] = {
+            **events.upcoming[1],
+            "responses": {
+                **events.upcoming[1]["responses"],
+                "waitinglistIds": ["carol-id", "david-id", "erin-id"],
+            },
+        }
+        await self.run(mockbot, events, rule)
+        rule.evaluate_incremental.assert_called_once_with({"event2-id": {"erin-id"}})
+        assert type(rule).evaluations == 1
+
+
+class TestReloadConfig:
+    RULE = """
+[rules.max_per_week]
+type = "MaxEventsPerWeek"
+header_regex = "Americano"
+message = "Hi {firstName}"
+max_events = %d
+"""
+
+    @pytest.fixture
+    def config_file(self, cfg, tmp_path, monkeypatch):
+        for key in ("USERNAME", "PASSWORD", "GROUP_ID"):
+            monkeypatch.delenv(f"SPOND_{key}", raising=False)
+        for key in ("BASE_URL", "API_KEY", "ENABLED"):
+            monkeypatch.delenv(f"NACO_{key}", raising=False)
+        path = tmp_path / "config.toml"
+        self.header = f"""
+[auth]
+username = "user"
+password = "pass"
+group_id = "group-id"
+
+[general]
+seconds_to_sleep = 10
+history_file = "{cfg["general"]["history_file"]}"
+
+[naco]
+enabled = true
+base_url = "http://localhost:8000"
+api_key = "test-key"
+outbox_file = "{cfg["naco"]["outbox_file"]}"
+
+[logging]
+level = "INFO"
+"""
+        return path
+
+    def write(self, path, text):
+        path.write_text(self.header + text)
+        # Make sure the modification time changes within the test
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    @pytest_asyncio.fixture
+    async def bot(self, cfg, config_file):
+        self.write(config_file, self.RULE % 1)
+        cfg["rules"] = tomllib.loads(self.RULE % 1)["rules"]
+        cfg["logging"] = {"level": "INFO"}
+        bot = PadelBot(cfg, config_watcher=ConfigWatcher(str(config_file)))
+        bot.ended_events = {}
+        bot.last_cycle_key = ("events", "deadlines")
+        bot.last_signups = {}
+        return bot
+
+    @pytest.mark.asyncio
+    async def test_unchanged_file_is_not_reloaded(self, bot):
+        assert not bot.reload_config()
+        assert bot.cfg["rules"]["max_per_week"]["max_events"] == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_rules_are_applied_in_place(self, bot, config_file):
+        self.write(config_file, self.RULE % 2)
+        roster = bot.roster_store.roster
+        assert bot.reload_config()
+        assert bot.cfg["rules"]["max_per_week"]["max_events"] == 2
+        assert bot.get_rules(bot.events)[0].max_events == 2
+        # The next cycle evaluates all sign-ups, with the caches kept
+        assert bot.last_cycle_key is None
+        assert bot.last_signups is None
+        assert bot.ended_events == {}
+        assert bot.roster_store.roster is roster
+
+    @pytest.mark.asyncio
+    async def test_invalid_config_is_rejected(self, bot, config_file):
+        self.write(config_file, self.RULE.replace("MaxEventsPerWeek", "Unknown") % 2)
+        assert not bot.reload_config()
+        assert bot.cfg["rules"]["max_per_week"]["max_events"] == 1
+        assert bot.last_cycle_key == ("events", "deadlines")
+
+        self.write(config_file, self.RULE % 2 + 'unknown_parameter = "x"')
+        assert not bot.reload_config()
+        self.write(config_file, "[rules")
+        assert not bot.reload_config()
+        assert bot.cfg["rules"]["max_per_week"]["max_events"] == 1
+
+    @pytest.mark.asyncio
+    async def test_auth_changes_need_a_restart(self, bot, config_file):
+        self.write(config_file, self.RULE % 2)
+        config_file.write_text(
+            config_file.read_text().replace("group-id", "other-group")
+        )
+        assert bot.reload_config()
+        assert bot.cfg["auth"]["group_id"] == "group-id"
+
+    @pytest.mark.asyncio
+    async def test_new_fields_refetch_ended_events(self, bot, config_file):
+        self.write(config_file, (self.RULE % 2).replace("{firstName}", "{email}"))
+        roster = bot.roster_store.roster
+        assert bot.reload_config()
+        assert bot.ended_events is None
+        assert bot.roster_store.roster is not roster
+
+    @pytest.mark.asyncio
+    async def test_longer_lookback_refetches_ended_events(self, bot, config_file):
+        self.write(
+            config_file,
+            """
+[rules.quarantine]
+type = "QuarantineAfterEvent"
+header_regex = "Americano"
+message = "Hi {firstName}"
+quarantine_hours = 72
+""",
+        )
+        assert bot.reload_config()
+        assert bot.ended_events is None
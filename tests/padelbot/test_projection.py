@@ -0,0 +1,112 @@
+import pytest
+
+from src.padelbot.projection import (
+    CORE_FIELDS,
+    ProjectedEvent,
+    UndeclaredFieldError,
+    project_event,
+    project_member,
+    template_fields,
+)
+from src.padelbot.rules.rulebase import get_required_fields
+
+
+@pytest.fixture
+def spond_event():
+    return {
+        "id": "event1-id",
+        "heading": "Americano",
+        "description": "Court: 3",
+        "location": {"feature": "Padel Center", "address": "Street 1"},
+        "attachments": [{"url": "https://example.com/image.png"}],
+        "startTimestamp": "2026-05-04T18:00:00+00:00",
+        "responses": {"acceptedIds": ["alice-id"], "waitinglistIds": []},
+        "recipients": {
+            "guardians": [],
+            "group": {
+                "id": "group-id",
+                "subGroups": [{"id": "subgroup-id"}],
+                "members": [
+                    {
+                        "id": "alice-id",
+                        "firstName": "Alice",
+                        "lastName": "Alison",
+                        "email": "alice@example.com",
+                        "profile": {"id": "profile-id", "imageUrl": "x"},
+                    }
+                ],
+            },
+        },
+    }
+
+
+def test_project_event_keeps_declared_fields(spond_event):
+    event = project_event(spond_event, CORE_FIELDS | {"description"})
+    assert set(event) == {
+        "id",
+        "heading",
+        "description",
+        "startTimestamp",
+        "responses",
+        "recipients",
+    }
+    assert event["recipients"] == {
+        "group": {"members": spond_event["recipients"]["group"]["members"]}
+    }
+
+
+def test_project_member(spond_event):
+    member = spond_event["recipients"]["group"]["members"][0]
+    assert project_member(member, CORE_FIELDS) == {
+        "id": "alice-id",
+        "firstName": "Alice",
+        "lastName": "Alison",
+        "profile": {"id": "profile-id"},
+    }
+    assert project_member(member, CORE_FIELDS | {"email"})["email"] == (
+        "alice@example.com"
+    )
+
+
+def test_reading_undeclared_field_raises(spond_event):
+    event = project_event(spond_event, CORE_FIELDS)
+    with pytest.raises(UndeclaredFieldError):
+        event["description"]
+    with pytest.raises(UndeclaredFieldError):
+        event.get("description", "")
+
+
+def test_declared_missing_field_behaves_like_dict(spond_event):
+    event = project_event(spond_event, CORE_FIELDS)
+    assert event.get("seriesId") is None
+    assert event.get("endTimestamp", "") == ""
+    with pytest.raises(KeyError):
+        event["endTimestamp"]
+
+
+def test_copy_keeps_projection(spond_event):
+    event = project_event(spond_event, CORE_FIELDS)
+    copied = event.copy()
+    assert isinstance(copied, ProjectedEvent)
+    assert copied == event
+    with pytest.raises(UndeclaredFieldError):
+        copied["description"]
+
+
+def test_template_fields():
+    assert template_fields("Hi {firstName}, {heading} {location.feature}!") == {
+        "firstName",
+        "heading",
+        "location",
+    }
+    assert template_fields("No fields") == set()
+
+
+def test_rules_declare_fields_and_message_fields():
+    fields = get_required_fields(
+        {
+            "max": {"type": "MaxEventsPerWeek", "message": "See {location}"},
+            "unknown": {"type": "Unknown"},
+        }
+    )
+    assert {"heading", "startTimestamp", "location"} <= fields
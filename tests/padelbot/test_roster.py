@@ -0,0 +1,137 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.padelbot.roster import Roster, RosterStore
+from src.padelbot.utils import memberid_to_member
+
+
+def make_member(id, first_name="Alice"):
+    return {"id": id, "firstName": first_name, "lastName": "Alison"}
+
+
+@pytest.fixture
+def signed_up(make_event):
+    """Factory of events that copies of the given members accepted."""
+
+    def signed_up(id, members):
+        return make_event(
+            id, accepted=[m["id"] for m in members], members=[dict(m) for m in members]
+        )
+
+    return signed_up
+
+
+@pytest.fixture
+def store():
+    spond = MagicMock()
+    spond.get_group = AsyncMock(
+        return_value={"members": [make_member("alice-id"), make_member("bob-id")]}
+    )
+    return RosterStore(spond, "group-id")
+
+
+@pytest.mark.asyncio
+async def test_events_share_one_roster(store, signed_up):
+    events = [
+        signed_up("e1", [make_member("alice-id")]),
+        signed_up("e2", [make_member("alice-id"), make_member("bob-id")]),
+    ]
+    await store.normalize(events)
+
+    store.spond.get_group.assert_awaited_once_with("group-id")
+    assert all(e["recipients"]["group"]["members"] is store.roster for e in events)
+    assert [m["id"] for m in store.roster] == ["alice-id", "bob-id"]
+
+
+@pytest.mark.asyncio
+async def test_roster_refreshed_only_for_unknown_members(store, signed_up):
+    await store.normalize([signed_up("e1", [make_member("alice-id")])])
+    await store.normalize([signed_up("e2", [make_member("bob-id")])])
+    assert store.spond.get_group.await_count == 1
+
+    await store.normalize([signed_up("e3", [make_member("carol-id")])])
+    assert store.spond.get_group.await_count == 2
+    # Carol is missing from the group response, so the embedded copy is used
+    assert "carol-id" in store.roster.by_id
+
+
+@pytest.mark.asyncio
+async def test_embedded_members_used_when_group_fetch_fails(store, signed_up):
+    store.spond.get_group.side_effect = Exception("Network down")
+    await store.normalize([signed_up("e1", [make_member("carol-id", "Carol")])])
+    assert store.roster.by_id["carol-id"]["firstName"] == "Carol"
+
+
+@pytest.mark.asyncio
+async def test_strings_are_interned(store, signed_up):
+    events = [
+        signed_up("e1", [make_member("".join(["alice", "-id"]))]),
+        signed_up("e2", [make_member("".join(["alice", "-id"]))]),
+    ]
+    await store.normalize(events)
+    first, second = (e["responses"]["acceptedIds"][0] for e in events)
+    assert first is second is store.roster[0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_members_are_projected_when_added(store, signed_up):
+    store.fields = frozenset({"id"})
+    member = {**make_member("carol-id"), "email": "carol@example.com"}
+    await store.normalize([signed_up("e1", [member])])
+    assert "email" not in store.roster.by_id["carol-id"]
+    assert "email" not in store.roster.by_id["alice-id"]
+
+
+@pytest.mark.asyncio
+async def test_roster_refreshed_for_changed_members(store, signed_up):
+    await store.normalize([signed_up("e1", [make_member("alice-id")])])
+    roster = store.roster
+    alice = roster.by_id["alice-id"]
+
+    store.spond.get_group.return_value = {
+        "members": [make_member("alice-id", "Alicia"), make_member("bob-id")]
+    }
+    events = [signed_up("e2", [make_member("alice-id", "Alicia")])]
+    await store.normalize(events)
+    assert store.spond.get_group.await_count == 2
+    assert events[0]["recipients"]["group"]["members"] is store.roster
+    assert store.roster.by_id["alice-id"]["firstName"] == "Alicia"
+    # Events normalized before keep the roster and members they were published with
+    assert store.roster is not roster
+    assert roster.by_id["alice-id"] is alice
+    assert alice["firstName"] == "Alice"
+
+    await store.normalize([signed_up("e3", [make_member("alice-id", "Alicia")])])
+    assert store.spond.get_group.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_member_kept_when_group_lags_behind(store, signed_up):
+    await store.normalize([signed_up("e1", [make_member("alice-id")])])
+    await store.normalize([signed_up("e2", [make_member("alice-id", "Alicia")])])
+    assert store.roster.by_id["alice-id"]["firstName"] == "Alicia"
+    await store.normalize([signed_up("e3", [make_member("alice-id", "Alicia")])])
+    assert store.spond.get_group.await_count == 2
+
+
+def test_roster_with_members_keeps_members_and_copies_on_change():
+    roster = Roster().with_members([make_member("alice-id")])
+    alice = roster.by_id["alice-id"]
+    assert roster.with_members([make_member("alice-id")]) is roster
+
+    updated = roster.with_members(
+        [make_member("alice-id", "Alicia"), make_member("bob-id")]
+    )
+    assert [m["firstName"] for m in updated] == ["Alicia", "Alice"]
+    assert set(updated.by_id) == {"alice-id", "bob-id"}
+    assert roster.by_id["alice-id"] is alice
+    assert alice["firstName"] == "Alice"
+    assert len(roster) == 1
+
+
+def test_memberid_to_member_uses_roster_index():
+    roster = Roster().with_members([make_member("alice-id")])
+    assert memberid_to_member("alice-id", roster)["firstName"] == "Alice"
+    with pytest.raises(ValueError):
+        memberid_to_member("bob-id", roster)
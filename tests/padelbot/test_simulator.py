@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.simulator import (
+    SimulatedNacoRegistrar,
+    SimulatedNacoTournamentCreator,
+    SimulatedPadelBot,
+    SimulationClock,
+    apply_overrides,
+    simulate,
+)
+from src.padelbot.snapshots import RecordedSpond, Snapshot
+
+MONDAY = datetime(2026, 5, 4, 18, 0).astimezone()
+MEMBERS = [
+    {"id": "alice", "firstName": "Alice", "lastName": "Alison"},
+    {"id": "bob", "firstName": "Bob", "lastName": "Bobson"},
+]
+
+
+def event_id(week):
+    return f"{week:08d}-0000-0000-0000-000000000000"
+
+
+@pytest.fixture
+def recording(make_event):
+    """Hourly recordings over two weeks. Bob plays the first week, and signs up for
+    the second week one hour after the first event ended."""
+    snapshots = []
+    time = MONDAY - timedelta(days=1)
+    while time < MONDAY + timedelta(weeks=2):
+        events = []
+        for week in range(3):
+            accepted = ["alice"]
+            if week == 0 or time >= MONDAY + timedelta(hours=3):
+                accepted.append("bob")
+            events.append(
+                make_event(
+                    event_id(week),
+                    MONDAY + timedelta(weeks=week),
+                    accepted,
+                    series_id="series",
+                    members=MEMBERS,
+                )
+            )
+        snapshots.append(Snapshot(time, "get_events", {}, events))
+        time += timedelta(hours=1)
+    snapshots.append(Snapshot(MONDAY, "get_group", {"uid": "group-id"}, {}))
+    return snapshots
+
+
+@pytest.fixture
+def cfg():
+    return {
+        "auth": {"group_id": "group-id"},
+        "general": {"seconds_to_sleep": 600},
+        "naco": {},
+        "rules": {
+            "quarantine": {
+                "type": "QuarantineAfterEvent",
+                "header_regex": "Americano",
+                "message": "Hi {firstName}",
+                "quarantine_hours": 24,
+                "enforced": True,
+            }
+        },
+        "actions": {
+            "naco": {
+                "type": "NacoCreateTournament",
+                "header_regex": "Americano",
+                "minutes_before_start": 5,
+                "enforced": True,
+            }
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_simulate_reports_removals_intents_and_wakeups(cfg, recording):
+    recorded = RecordedSpond(recording, VirtualClock(MONDAY))
+    report = await simulate(cfg, recorded)
+
+    removals = [(r.event_id, r.player_name, r.enforced) for r in report.removals]
+    # Both played the first week and are signed up for the later events of the
+    # series when the quarantine starts. Nobody played the second week, so there
+    # are no removals when it ends.
+    assert removals == [
+        (event_id(1), "Alice Alison", True),
+        (event_id(1), "Bob Bobson", True),
+        (event_id(2), "Alice Alison", True),
+        (event_id(2), "Bob Bobson", True),
+    ]
+    assert {r.time for r in report.removals} == {MONDAY + timedelta(hours=3)}
+    # Removed players stay removed in later recordings, so they are removed once
+    assert len(recorded.changes) == 4
+    assert [i.intent.event_id for i in report.intents] == [event_id(0), event_id(1)]
+    assert all(i.time < MONDAY + timedelta(weeks=2) for i in report.intents)
+    # Wakeups are scheduled up to the quarantine and action deadlines
+    quarantine_end = MONDAY + timedelta(hours=2 + 24)
+    assert any(
+        quarantine_end - timedelta(minutes=1) < wakeup <= quarantine_end
+        for wakeup in report.wakeups
+    )
+    assert report.skipped_cycles > 0
+
+
+@pytest.mark.asyncio
+async def test_simulate_with_overrides(cfg, recording):
+    cfg = apply_overrides(
+        cfg, ["rules.quarantine.quarantine_hours=0", "rules.quarantine.enforced=false"]
+    )
+    assert cfg["rules"]["quarantine"]["quarantine_hours"] == 0
+    report = await simulate(cfg, RecordedSpond(recording, VirtualClock(MONDAY)))
+    assert report.removals == []
+
+
+def test_simulated_bot_has_naco_stubs(cfg, recording):
+    clock = SimulationClock(MONDAY, [MONDAY], 600)
+    bot = SimulatedPadelBot(cfg, clock, RecordedSpond(recording, clock))
+    assert bot.naco_enabled
+    assert isinstance(bot.naco_registrar, SimulatedNacoRegistrar)
+    assert isinstance(bot.naco_tournament_creator, SimulatedNacoTournamentCreator)
+    assert bot.naco_outbox.creator is bot.naco_tournament_creator
+    assert bot.naco_outbox.path is None
+
+
+def test_apply_overrides_parses_values():
+    cfg = apply_overrides(
+        {"rules": {"max": {"max_events": 1}}},
+        ["rules.max.max_events=3", 'rules.max.header_regex=".*Mix.*"', "x.y=plain"],
+    )
+    assert cfg == {
+        "rules": {"max": {"max_events": 3, "header_regex": ".*Mix.*"}},
+        "x": {"y": "plain"},
+    }
+    with pytest.raises(ValueError):
+        apply_overrides({}, ["missing"])
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.padelbot.core.clock import VirtualClock
+from src.padelbot.padelbot import PadelBot
+from src.padelbot.snapshots import RecordedSpond, SnapshotWriter, load_snapshots
+
+START = datetime(2026, 5, 4, 12, 0).astimezone()
+
+
+MEMBERS = [
+    {"id": id, "firstName": id.title(), "lastName": "Test"} for id in ("alice", "bob")
+]
+
+
+@pytest.fixture
+def snapshot_file(tmp_path, make_event):
+    path = str(tmp_path / "snapshots.jsonl.gz")
+    ended = make_event("ended", START - timedelta(days=1), ["alice"], members=MEMBERS)
+    with SnapshotWriter(path) as writer:
+        writer.write(
+            START,
+            "get_events",
+            {"min_end": START - timedelta(days=7)},
+            [
+                ended,
+                make_event(
+                    "upcoming", START + timedelta(days=2), ["alice"], members=MEMBERS
+                ),
+            ],
+        )
+        writer.write(START, "get_group", {"uid": "group-id"}, {"members": []})
+    # Recordings can be resumed by appending to the file
+    with SnapshotWriter(path) as writer:
+        writer.write(
+            START + timedelta(hours=1),
+            "get_events",
+            {},
+            [
+                ended,
+                make_event(
+                    "upcoming",
+                    START + timedelta(days=2),
+                    ["alice", "bob"],
+                    members=MEMBERS,
+                ),
+            ],
+        )
+    return path
+
+
+def test_load_snapshots(snapshot_file):
+    snapshots = list(load_snapshots(snapshot_file))
+    assert [s.call for s in snapshots] == ["get_events", "get_group", "get_events"]
+    assert snapshots[0].time == START
+    assert snapshots[0].args == {"min_end": (START - timedelta(days=7)).isoformat()}
+    assert snapshots[2].response[1]["responses"]["acceptedIds"] == ["alice", "bob"]
+
+
+@pytest.mark.asyncio
+async def test_recorded_spond_replays_by_clock(snapshot_file):
+    clock = VirtualClock(START)
+    recorded = RecordedSpond.from_file(snapshot_file, clock)
+    assert recorded.recording_times() == [START, START + timedelta(hours=1)]
+
+    events = await recorded.get_events(min_end=START)
+    assert [e["id"] for e in events] == ["upcoming"]
+    assert events[0]["responses"]["acceptedIds"] == ["alice"]
+
+    clock.advance(timedelta(hours=1, minutes=30))
+    events = await recorded.get_events(max_end=START)
+    assert [e["id"] for e in events] == ["ended"]
+    events = await recorded.get_events(min_end=START)
+    assert events[0]["responses"]["acceptedIds"] == ["alice", "bob"]
+
+    assert await recorded.get_group("group-id") == {"members": []}
+    with pytest.raises(KeyError):
+        await recorded.get_person("carol")
+
+
+@pytest.mark.asyncio
+async def test_padelbot_runs_on_recorded_spond(snapshot_file):
+    clock = VirtualClock(START + timedelta(hours=1))
+    cfg = {
+        "auth": {"group_id": "group-id"},
+        "general": {
+            "seconds_to_sleep": 600,
+            "history_file": ":memory:",
+            "audit_file": ":memory:",
+        },
+        "naco": {},
+        "rules": {
+            "max": {
+                "type": "MaxEventsPerWeek",
+                "header_regex": "Americano",
+                "message": "Hi {firstName}",
+                "max_events": 0,
+                "enforced": True,
+            }
+        },
+        "actions": {},
+    }
+    recorded = RecordedSpond.from_file(snapshot_file, clock)
+    bot = PadelBot(cfg, clock=clock, spond_client=recorded)
+    bot.first_run = False
+    clock.tick()
+    events = await bot.get_events()
+    assert [e["id"] for e in events.previous] == ["ended"]
+
+    await bot.evaluate_cycle(events, bot.get_rules(events), [])
+    assert sorted(user for _, user, _ in recorded.changes) == ["alice", "bob"]
+    assert [m["text"] for m in recorded.messages] == ["Hi Alice", "Hi Bob"]
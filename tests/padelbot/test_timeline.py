@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.padelbot.timeline import Timeline, to_epoch, upcoming_timeline
+from src.padelbot.utils import Events
+
+NOW = datetime(2026, 5, 1, 18, 0).astimezone()
+
+
+@pytest.fixture
+def events(make_event):
+    return [
+        make_event("upcoming2", NOW + timedelta(hours=48), hours=1),
+        make_event("previous1", NOW - timedelta(hours=50), hours=1),
+        make_event("ongoing1", NOW - timedelta(hours=1)),
+        make_event("upcoming1", NOW + timedelta(hours=24), hours=1),
+        make_event("previous2", NOW - timedelta(hours=3), hours=1),
+        make_event("upcoming3", NOW + timedelta(hours=48), hours=1),
+    ]
+
+
+def ids(events):
+    return [event["id"] for event in events]
+
+
+def test_to_epoch_is_timezone_independent():
+    assert to_epoch(NOW) == to_epoch(NOW.astimezone(datetime.now().astimezone().tzinfo))
+    assert to_epoch(NOW + timedelta(microseconds=1)) - to_epoch(NOW) == 1
+    assert to_epoch(NOW.isoformat()) == to_epoch(NOW)
+
+
+def test_split(events):
+    split = Timeline(events).split(NOW)
+    assert ids(split.upcoming) == ["upcoming1", "upcoming2", "upcoming3"]
+    assert ids(split.ongoing) == ["ongoing1"]
+    assert ids(split.previous) == ["previous1", "previous2"]
+    assert split.timeline is not None
+    assert ids(split.timeline.by_start) == ids(split.upcoming)
+
+
+def test_split_matches_timestamp_comparison(events):
+    for hours in range(-60, 60, 7):
+        now = NOW + timedelta(hours=hours)
+        split = Timeline(events).split(now)
+        for event in events:
+            start = datetime.fromisoformat(event["startTimestamp"])
+            end = datetime.fromisoformat(event["endTimestamp"])
+            if start > now:
+                assert event in split.upcoming
+            elif end < now:
+                assert event in split.previous
+            else:
+                assert event in split.ongoing
+
+
+def test_starting_between_is_inclusive(events):
+    timeline = Timeline(events)
+    window = timeline.starting_between(
+        NOW + timedelta(hours=24), NOW + timedelta(hours=48)
+    )
+    # Events with equal start times keep their original order
+    assert ids(window) == ["upcoming1", "upcoming2", "upcoming3"]
+    assert timeline.starting_between(NOW, NOW + timedelta(hours=23)) == []
+
+
+def test_starting_after_is_exclusive(events):
+    timeline = Timeline(events)
+    assert ids(timeline.starting_after(NOW + timedelta(hours=24))) == [
+        "upcoming2",
+        "upcoming3",
+    ]
+
+
+def test_replace_event_shares_arrays(events):
+    timeline = Timeline(events)
+    replacement = {**events[3], "heading": "Replaced"}
+    replaced = timeline.replace_event(replacement)
+    assert replaced.starts is timeline.starts
+    assert replacement in replaced.by_start
+    assert replacement in replaced.by_end
+    assert events[3] in timeline.by_start
+
+
+def test_upcoming_timeline_is_built_once(events):
+    snapshot = Events(upcoming=events[:1])
+    timeline = upcoming_timeline(snapshot)
+    assert upcoming_timeline(snapshot) is timeline
+    assert ids(timeline.by_start) == ["upcoming2"]
@@ -1,9 +1,13 @@
 import pytest
 
 from src.padelbot.utils import (
+    Events,
     eventid_to_event,
+    events_fingerprint,
+    get_added_signups,
     get_last_event_in_series,
     get_participating_player_names,
+    get_signups,
     memberid_to_member,
 )
 
@@ -111,3 +115,72 @@ class TestMemberIdToMember:
         with pytest.raises(ValueError) as exc:
             memberid_to_member("999", members)
         assert "Member ID 999 not found" in str(exc.value)
+
+
+class TestSignups:
+    @pytest.fixture
+    def events(self):
+        return Events(
+            upcoming=[
+                {
+                    "id": "e1",
+                    "heading": "Americano",
+                    "startTimestamp": "2025-09-01T10:00:00+00:00",
+                    "responses": {"acceptedIds": ["1", "2"], "waitinglistIds": ["3"]},
+                },
+                {
+                    "id": "e2",
+                    "heading": "Mexicano",
+                    "startTimestamp": "2025-09-02T10:00:00+00:00",
+                    "responses": {"acceptedIds": ["1"], "waitinglistIds": []},
+                },
+            ]
+        )
+
+    def test_no_changes(self, events):
+        signups = get_signups(events)
+        assert get_added_signups(signups, signups) == {}
+
+    def test_added_players(self, events):
+        previous = get_signups(events)
+        events.upcoming[0]["responses"] = {
+            "acceptedIds": ["2", "3"],
+            "waitinglistIds": ["4"],
+        }
+        added = get_added_signups(previous, get_signups(events))
+        # Moving from the waiting list to accepted changes which spot rules remove
+        assert added == {"e1": {"3", "4"}}
+
+    def test_new_and_changed_events(self, events):
+        previous = get_signups(Events(upcoming=events.upcoming[:1]))
+        events.upcoming[0]["heading"] = "Americano (moved)"
+        added = get_added_signups(previous, get_signups(events))
+        assert added == {"e1": {"1", "2", "3"}, "e2": {"1"}}
+
+
+class TestEventsFingerprint:
+    def test_fingerprint_changes_with_responses(self):
+        event = {
+            "id": "e1",
+            "startTimestamp": "2025-09-01T10:00:00+00:00",
+            "responses": {"acceptedIds": ["1"]},
+        }
+        fingerprint = events_fingerprint(Events(upcoming=[event]))
+        assert events_fingerprint(Events(upcoming=[dict(event)])) == fingerprint
+        assert events_fingerprint(Events(ongoing=[event])) != fingerprint
+        event["responses"] = {"acceptedIds": ["1", "2"]}
+        assert events_fingerprint(Events(upcoming=[event])) != fingerprint
+
+    def test_fingerprint_covers_given_fields(self):
+        event = {"id": "e1", "description": "Court: 1", "responses": {}}
+        fields = frozenset({"description", "responses"})
+        fingerprint = events_fingerprint(Events(upcoming=[event]), fields)
+        assert events_fingerprint(Events(upcoming=[event])) == events_fingerprint(
+            Events(upcoming=[{**event, "description": "Court: 2"}])
+        )
+        assert (
+            events_fingerprint(
+                Events(upcoming=[{**event, "description": "Court: 2"}]), fields
+            )
+            != fingerprint
+        )
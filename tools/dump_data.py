@@ -1,19 +1,79 @@
+#!/usr/bin/env python3
+"""Record Spond API responses into a snapshot file for offline replay.
+
+Every interval the events of the group are fetched, together with the group and
+the profile, and written as gzip compressed JSON lines. Each person that appears
+in an event is fetched once. Load the recording with
+`padelbot.snapshots.load_snapshots`, or replay it with `RecordedSpond`.
+"""
+
+import argparse
 import asyncio
-import pprint
+import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
-import aiofiles
 from dotenv import dotenv_values
 from spond import spond
 
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from padelbot.snapshots import SnapshotWriter  # noqa: E402
+
+
+async def record(
+    s: spond.Spond,
+    writer: SnapshotWriter,
+    group_id: str,
+    lookback: timedelta,
+    recorded_persons: set[str],
+) -> None:
+    now = datetime.now().astimezone()
+    # Unfiltered apart from the lookback, so replays can apply any time filter
+    min_end = now - lookback
+    events = await s.get_events(group_id=group_id, min_end=min_end) or []
+    writer.write(now, "get_events", {"group_id": group_id, "min_end": min_end}, events)
+
+    group = await s.get_group(group_id)
+    writer.write(now, "get_group", {"uid": group_id}, group)
+
+    profile = await s.get_profile()
+    writer.write(now, "get_profile", {}, profile)
+
+    for event in events:
+        responses = event.get("responses", {})
+        for player_id in responses.get("acceptedIds", []) + responses.get(
+            "waitinglistIds", []
+        ):
+            if player_id in recorded_persons:
+                continue
+            try:
+                person = await s.get_person(player_id)
+            except KeyError:
+                continue
+            writer.write(now, "get_person", {"uid": player_id}, person)
+            recorded_persons.add(player_id)
 
-async def write_dump(filename, data):
-    dumps = Path("dumps/")
-    async with aiofiles.open(dumps / filename, "w") as f:
-        await f.write(pprint.pformat(data))
+    print(f"{now.isoformat()}: recorded {len(events)} events")
 
 
 async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output", default="dumps/snapshots.jsonl.gz", help="Snapshot file"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=600, help="Seconds between recordings"
+    )
+    parser.add_argument(
+        "--count", type=int, default=1, help="Number of recordings, 0 for no limit"
+    )
+    parser.add_argument(
+        "--lookback-days", type=float, default=7, help="Days of ended events to record"
+    )
+    args = parser.parse_args()
+
     cfg = dotenv_values(".env")
     username = cfg.get("USERNAME")
     password = cfg.get("PASSWORD")
@@ -25,26 +85,24 @@ async def main():
         )
 
     s = spond.Spond(username, password)
-
-    group_task = asyncio.create_task(s.get_group(group_id))
-    events_task = asyncio.create_task(s.get_events(group_id))
-
-    group = await group_task
-    events = await events_task
-
-    write_group = asyncio.create_task(write_dump("group", group))
-    if not events:
-        raise ValueError("No events found")
-
-    write_event = asyncio.create_task(write_dump("event", events[0]))
-
-    userid = events[0]["recipients"]["group"]["members"][0]["id"]
-    person = await s.get_person(userid)
-    write_person = asyncio.create_task(write_dump("person", person))
-
-    await asyncio.gather(write_group, write_event, write_person)
-
-    await s.clientsession.close()
+    recorded_persons: set[str] = set()
+    try:
+        with SnapshotWriter(args.output) as writer:
+            recording = 0
+            while True:
+                await record(
+                    s,
+                    writer,
+                    group_id,
+                    timedelta(days=args.lookback_days),
+                    recorded_persons,
+                )
+                recording += 1
+                if args.count and recording >= args.count:
+                    break
+                await asyncio.sleep(args.interval)
+    finally:
+        await s.clientsession.close()
 
 
 if __name__ == "__main__":
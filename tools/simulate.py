@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Replay a snapshot recording through the configured rules and actions.
+
+Prints the removals, action intents and deadline wakeups the bot would have
+produced, e.g. to try out a new quarantine_hours before changing config.toml:
+
+    python tools/simulate.py dumps/snapshots.jsonl.gz \\
+        --set rules.quarantine_after_event.quarantine_hours=48
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import tomllib
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from padelbot.core.clock import VirtualClock  # noqa: E402
+from padelbot.core.config import defaults  # noqa: E402
+from padelbot.simulator import apply_overrides, simulate  # noqa: E402
+from padelbot.snapshots import RecordedSpond  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshots", help="Snapshot file recorded by dump_data.py")
+    parser.add_argument("--config", default="config.toml", help="Configuration file")
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a configuration value, e.g. rules.max_per_week.max_events=3",
+    )
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Start time")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="End time")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the bot")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+
+    with open(args.config, "rb") as f:
+        cfg = {**defaults, **tomllib.load(f)}
+    cfg = apply_overrides(cfg, args.set)
+
+    started = time.perf_counter()
+    recorded = RecordedSpond.from_file(args.snapshots, VirtualClock(datetime.now()))
+    report = await simulate(cfg, recorded, args.start, args.end)
+    elapsed = time.perf_counter() - started
+
+    for removal in report.removals:
+        action = "Remove" if removal.enforced else "Would remove"
+        print(
+            f"{removal.time.isoformat()} {action} {removal.player_name} "
+            f'from "{removal.heading}"'
+        )
+    for simulated in report.intents:
+        print(
+            f"{simulated.time.isoformat()} {type(simulated.intent).__name__}: {simulated.intent.event_id}"
+        )
+    for wakeup in report.wakeups:
+        print(f"{wakeup.isoformat()} Wakeup")
+    print(
+        f"{report.cycles} cycles ({report.skipped_cycles} skipped), "
+        f"{len(report.removals)} removals, {len(report.intents)} intents and "
+        f"{len(report.wakeups)} wakeups in {elapsed:.2f} seconds"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())